@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Script to combine a directory of overlapping key card exports into one file.
+Replaces archive/csv_combiner/csv_combiner.py: exports are sorted in parallel
+and merged in a single streaming pass, removing duplicate swipes.
+"""
+import argparse
+import shutil
+import sys
+import os
+from pathlib import Path
+import logging
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    handlers=[logging.StreamHandler(sys.stdout)]
+)
+logger = logging.getLogger("combine_key_card_data")
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from src.csv_combiner import combine_csv_files
+from src.config import RAW_DATA_DIR, KEY_CARD_DATA_PATH, KEY_CARD_CHUNK_SIZE, COMBINE_DEDUPE_COLUMNS
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description="Combine key card export files into one de-duplicated, time-ordered CSV."
+    )
+
+    parser.add_argument(
+        "--input-dir",
+        type=str,
+        help="Directory containing the export CSV files",
+        default=str(RAW_DATA_DIR / "csv_combiner" / "input_files")
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        help="Path to save the combined data",
+        default=str(KEY_CARD_DATA_PATH)
+    )
+
+    parser.add_argument(
+        "--dedupe-columns",
+        nargs="+",
+        help="Columns identifying a unique swipe (must start with Date/time)",
+        default=COMBINE_DEDUPE_COLUMNS
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of worker processes used to sort the exports (default: CPU count)"
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        help="Rows read from each sorted export at a time during the merge",
+        default=KEY_CARD_CHUNK_SIZE
+    )
+
+    parser.add_argument(
+        "--oldest-first",
+        action="store_true",
+        help="Write the oldest swipes first (default: newest first, like the raw exports)"
+    )
+
+    parser.add_argument(
+        "--no-backup",
+        action="store_true",
+        help="Skip creating a backup of an existing output file"
+    )
+
+    return parser.parse_args()
+
+def main():
+    """Main function to combine key card exports."""
+    args = parse_arguments()
+
+    input_dir = Path(args.input_dir)
+    output_path = Path(args.output)
+
+    logger.info(f"Input directory: {input_dir}")
+    logger.info(f"Output path: {output_path}")
+
+    if not input_dir.is_dir():
+        logger.error(f"Input directory not found: {input_dir}")
+        return 1
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if output_path.exists() and not args.no_backup:
+        backup_path = output_path.with_suffix('.backup.csv')
+        logger.info(f"Creating backup of existing data at {backup_path}")
+        shutil.copy2(output_path, backup_path)
+
+    rows = combine_csv_files(
+        str(input_dir),
+        str(output_path),
+        dedupe_columns=args.dedupe_columns,
+        newest_first=not args.oldest_first,
+        max_workers=args.workers,
+        chunksize=args.chunk_size
+    )
+
+    if rows < 0:
+        logger.error("Combining process failed")
+        return 1
+
+    logger.info(f"Success! Combined data with {rows:,} rows saved to {output_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,4 @@
-from src.data_ingestion import load_key_card_data, load_employee_info, calculate_default_date_range
+from src.data_ingestion import load_sources_concurrently, calculate_default_date_range
 from src.data_cleaning import (
     clean_key_card_data,
     clean_employee_info,
@@ -10,6 +10,7 @@ from src.data_analysis import (
     calculate_visit_counts,
     calculate_average_arrival_hour
 )
+from src.results_store import update_results_store
 from src.utils import setup_logging, safe_data_frame_operation, optimize_dataframe_memory
 from src.config import (
     KEY_CARD_DATA_PATH, 
@@ -19,7 +20,8 @@ from src.config import (
     VISIT_COUNTS_TEMPLATE,
     AVG_ARRIVAL_HOURS_TEMPLATE,
     DAYS_SUMMARY_TEMPLATE,
-    DEFAULT_ANALYSIS_DAYS
+    DEFAULT_ANALYSIS_DAYS,
+    KEY_CARD_CHUNK_SIZE
 )
 import argparse
 from datetime import datetime, timedelta
@@ -38,6 +40,7 @@ def main():
     5. Merge them
     6. Run attendance analysis
     7. Save results
+    8. Optionally update the results store the dashboard reads (all data, standard date ranges)
     """
     # Set up logging
     logger = setup_logging()
@@ -49,6 +52,15 @@ def main():
     parser.add_argument('--end-date', type=str, help='End date in YYYY-MM-DD format')
     parser.add_argument('--all-data', action='store_true', help='Process all data regardless of date')
     parser.add_argument('--optimize-memory', action='store_true', help='Optimize memory usage (slower but uses less RAM)')
+    parser.add_argument('--stream', action='store_true',
+                      help='Read key card data in chunks so peak memory scales with the filtered output')
+    parser.add_argument('--chunk-size', type=int, default=KEY_CARD_CHUNK_SIZE,
+                      help=f'Rows per chunk when streaming (default: {KEY_CARD_CHUNK_SIZE:,})')
+    parser.add_argument('--update-results-store', action='store_true',
+                      help='Also update the precomputed results store used by the dashboard '
+                           '(loads and processes all data, whatever the date range)')
+    parser.add_argument('--rebuild-results-store', action='store_true',
+                      help='Rewrite the results store even if it is up to date (implies --update-results-store)')
     args = parser.parse_args()
     
     # Start timing
@@ -73,19 +85,22 @@ def main():
     optimize_memory = args.optimize_memory
     if optimize_memory:
         logger.info("Memory optimization enabled - this may slow down processing but will use less RAM")
+    if args.stream:
+        logger.info(f"Streaming key card data in chunks of {args.chunk_size:,} rows")
 
     # STEP 1: Load data with date filtering
     logger.info("STEP 1: Loading data...")
     step_start_time = time.time()
     
-    key_card_df = safe_data_frame_operation(
-        load_key_card_data,
-        "Failed to load key card data",
-        logger,
+    # Key card and employee files are read concurrently (no employment history is used here)
+    key_card_df, employee_df, _ = load_sources_concurrently(
         str(KEY_CARD_DATA_PATH), 
+        str(EMPLOYEE_INFO_PATH),
         start_date=start_date, 
         end_date=end_date, 
-        last_n_days=last_n_days
+        last_n_days=last_n_days,
+        stream=args.stream,
+        chunksize=args.chunk_size
     )
     
     # Optimize memory if requested
@@ -99,13 +114,6 @@ def main():
     logger.info(f"Loaded key card data: {len(key_card_df):,} rows with {len(key_card_df.columns)} columns")
     if not key_card_df.empty:
         logger.info(f"Date range: {key_card_df['Date/time'].min()} to {key_card_df['Date/time'].max()}")
-
-    employee_df = safe_data_frame_operation(
-        load_employee_info,
-        "Failed to load employee data",
-        logger,
-        str(EMPLOYEE_INFO_PATH)
-    )
     
     # Optimize memory if requested
     if optimize_memory and employee_df is not None:
@@ -293,6 +301,27 @@ def main():
     
     logger.info(f"Results saved in {time.time() - step_start_time:.2f} seconds")
     logger.info(f"All data has been saved to the data/processed directory with suffix '{suffix}'")
+    
+    # STEP 8: Update the results store (independent of the date filtering above)
+    if not (args.update_results_store or args.rebuild_results_store):
+        # The store needs a full, non-streamed load of all the data, so it is never
+        # built behind the back of a run that was bounded in time or memory
+        logger.info("STEP 8: Skipping the results store (use --update-results-store to update it)")
+    else:
+        logger.info("STEP 8: Updating the results store...")
+        step_start_time = time.time()
+        if args.stream or not args.all_data:
+            logger.warning("The results store is built from all the data without streaming, "
+                           "regardless of the date range and --stream options")
+        
+        # Free the filtered data first; the store is built from all the data
+        del combined_df, attendance_table, visit_counts, avg_arrival_hours, days_summary
+        gc.collect()
+        
+        if update_results_store(force=args.rebuild_results_store) is None:
+            logger.error("Failed to update the results store. The dashboard will calculate results live.")
+        logger.info(f"Results store step completed in {time.time() - step_start_time:.2f} seconds")
+    
     logger.info(f"Total processing time: {time.time() - total_start_time:.2f} seconds")
     logger.info("To view the dashboard, run: streamlit run src/dashboard.py")
 
@@ -20,6 +20,7 @@ logger = logging.getLogger("merge_key_card_data")
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 from src.data_ingestion import merge_key_card_data
+from src.key_card_index import build_key_card_index, load_key_card_index
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -37,7 +38,6 @@ def parse_arguments():
     parser.add_argument(
         "--new", 
         type=str, 
-        required=True,
         help="Path to new key card data CSV file to merge"
     )
     
@@ -53,7 +53,24 @@ def parse_arguments():
         help="Skip creating a backup of the existing file"
     )
     
-    return parser.parse_args()
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Append only rows not already present instead of rewriting the whole file "
+             "(a newest-first file is left unsorted, so date-filtered loads stop using the day index)"
+    )
+    
+    parser.add_argument(
+        "--build-index",
+        action="store_true",
+        help="Only (re)build the byte-offset date index for the existing file"
+    )
+    
+    args = parser.parse_args()
+    if not args.new and not args.build_index:
+        parser.error("--new is required unless --build-index is given")
+    
+    return args
 
 def main():
     """Main function to merge key card data."""
@@ -66,6 +83,18 @@ def main():
         existing_path = base_dir / args.existing
     else:
         existing_path = Path(args.existing)
+    
+    # Index-only mode: rebuild the sidecar index and exit
+    if args.build_index:
+        if not existing_path.exists():
+            logger.error(f"Existing file not found: {existing_path}")
+            return 1
+        index = build_key_card_index(str(existing_path), incremental=False)
+        if index is None:
+            logger.error("Failed to build key card index")
+            return 1
+        logger.info(f"Built key card index for {existing_path} ({index['order']} order)")
+        return 0
         
     if not Path(args.new).is_absolute():
         new_path = base_dir / args.new
@@ -88,7 +117,15 @@ def main():
     
     # Create backup?
     create_backup = not args.no_backup
-    if create_backup:
+    if args.incremental:
+        logger.info("Incremental mode: only new rows will be appended (no backup needed)")
+        # New rows go at the end of the file, which breaks the time order of a newest-first file
+        day_index = load_key_card_index(str(existing_path)) if existing_path.exists() else None
+        if day_index is not None and day_index['order'] == 'desc':
+            logger.warning(f"{existing_path} is sorted newest first - appending will leave it unsorted and "
+                           "date-filtered loads will no longer seek via the day index until it is "
+                           "rebuilt with combine_key_card_data.py")
+    elif create_backup:
         logger.info("Will create backup of existing data")
     else:
         logger.warning("Skipping backup (--no-backup flag provided)")
@@ -119,15 +156,21 @@ def main():
             str(existing_path),
             str(new_path),
             str(output_path),
-            create_backup
+            create_backup,
+            incremental=args.incremental
         )
         
-        if merged_df.empty:
+        # A failed merge returns a DataFrame without columns; an incremental
+        # merge with nothing new to add returns an empty one with columns
+        if merged_df.columns.empty:
             logger.error("Merging process failed")
             return 1
             
-        logger.info(f"Success! Merged data saved to {output_path}")
-        logger.info(f"Final dataset has {len(merged_df):,} rows")
+        if args.incremental:
+            logger.info(f"Success! Appended {len(merged_df):,} new rows to {output_path}")
+        else:
+            logger.info(f"Success! Merged data saved to {output_path}")
+            logger.info(f"Final dataset has {len(merged_df):,} rows")
         
         return 0
     
@@ -16,6 +16,7 @@ function show_help {
     echo "  -s, --start DATE     Start date in YYYY-MM-DD format"
     echo "  -e, --end DATE       End date in YYYY-MM-DD format"
     echo "  -m, --memory-opt     Optimize memory usage (slower but uses less RAM)"
+    echo "  -S, --stream         Stream key card data in chunks (bounded memory)"
     echo "  -c, --compact        Generate compact terminal output"
     echo "  -v, --view           Launch the dashboard after processing"
     echo
@@ -31,6 +32,7 @@ DAYS=365
 START_DATE=""
 END_DATE=""
 MEMORY_OPT=false
+STREAM=false
 COMPACT=false
 VIEW_DASHBOARD=false
 
@@ -61,6 +63,10 @@ while [[ $# -gt 0 ]]; do
             MEMORY_OPT=true
             shift
             ;;
+        -S|--stream)
+            STREAM=true
+            shift
+            ;;
         -c|--compact)
             COMPACT=true
             shift
@@ -92,6 +98,10 @@ if [ "$MEMORY_OPT" = true ]; then
     CMD="$CMD --optimize-memory"
 fi
 
+if [ "$STREAM" = true ]; then
+    CMD="$CMD --stream"
+fi
+
 if [ "$COMPACT" = true ]; then
     CMD="$CMD --compact-output"
 fi
@@ -0,0 +1,193 @@
+"""
+Dataset building and date range analyses shared by the dashboard and main.py.
+
+The dashboard wraps these functions in Streamlit caches; main.py runs them
+for the standard date ranges and writes the results to the results store
+(see results_store), so both produce the same tables from the same code.
+"""
+import pandas as pd
+import numpy as np
+import logging
+import os
+import sys
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_cleaning import clean_key_card_data, clean_employee_info
+from src.combined_dataset import build_combined_dataset
+from src.data_analysis import (
+    build_attendance_table,
+    build_daily_aggregate,
+    calculate_tue_thu_attendance_percentage,
+    calculate_daily_attendance_counts,
+    calculate_weekly_attendance_counts,
+    calculate_period_summary,
+    create_employee_summary,
+    calculate_division_attendance_tue_thu,
+    calculate_division_attendance_by_location
+)
+
+logger = logging.getLogger("attendance_dashboard.analysis_pipeline")
+
+# Per-swipe columns the analyses read (Where, Department and the other employee
+# columns are not materialized for them)
+ANALYSIS_COLUMNS = [
+    'employee_id', 'parsed_time', 'date_only', 'day_number', 'weekday', 'iso_week', 'is_core_day',
+    'is_full_time', 'Last name, First name', 'Location', 'Working Status', 'Division',
+    'Combined hire date', 'Most recent day worked'
+]
+
+# Analyses available for a date range, each calculated and cached on its own
+ANALYSIS_METRICS = [
+    'attendance_table',
+    'tue_thu_attendance',
+    'daily_counts',
+    'weekly_counts',
+    'period_summary',
+    'employee_summary',
+    'division_tue_thu',
+    'division_by_location'
+]
+
+def standard_date_ranges(most_recent_date, today=None) -> dict:
+    """
+    Resolve the dashboard's date range presets.
+
+    Args:
+        most_recent_date: Most recent swipe time in the data
+        today: Date the "Last 30 Days" preset ends on (default: now)
+
+    Returns:
+        Dictionary of preset name to (start_date, end_date) 'YYYY-MM-DD' strings, in display order
+    """
+    most_recent_date = pd.Timestamp(most_recent_date)
+    today = pd.Timestamp.now() if today is None else pd.Timestamp(today)
+    end_date = most_recent_date.strftime("%Y-%m-%d")
+    return {
+        "Year to Date": ((most_recent_date - pd.Timedelta(days=365)).strftime("%Y-%m-%d"), end_date),
+        # The 30 days up to today
+        "Last 30 Days": ((today - pd.Timedelta(days=30)).strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d")),
+        "Last 3 Months": ((most_recent_date - pd.Timedelta(days=90)).strftime("%Y-%m-%d"), end_date),
+        "Last 6 Months": ((most_recent_date - pd.Timedelta(days=180)).strftime("%Y-%m-%d"), end_date),
+        "2023 Full Year": ("2023-01-01", "2023-12-31"),
+        "2024 Full Year": ("2024-01-01", "2024-12-31")
+    }
+
+def build_base_dataset(key_card_df: pd.DataFrame, employee_df: pd.DataFrame, history_df: pd.DataFrame = None,
+                       cache_key: str = None):
+    """
+    Clean the raw data and build the combined dataset.
+
+    Args:
+        key_card_df: Raw key card data
+        employee_df: Raw employee info
+        history_df: Optional raw employment history
+        cache_key: Optional identifier of the inputs (see build_combined_dataset)
+
+    Returns:
+        CombinedDataset
+    """
+    # Clean key card data first
+    key_card_df = clean_key_card_data(key_card_df)
+
+    # Clean employee data, passing the maximum date in the key card data
+    max_data_date = key_card_df['date_only'].max()
+    logger.info(f"Maximum date in key card data: {max_data_date}")
+    employee_df = clean_employee_info(employee_df, max_data_date)
+
+    # Combine the datasets as swipe facts plus an employee dimension, including
+    # employment history if provided
+    return build_combined_dataset(key_card_df, employee_df, history_df, cache_key=cache_key)
+
+def build_analysis_inputs(dataset, start_date=None, end_date=None) -> tuple:
+    """
+    Build the frame the analyses of a date range share.
+
+    Args:
+        dataset: CombinedDataset with all the data
+        start_date: Optional first date of the range
+        end_date: Optional last date of the range
+
+    Returns:
+        Tuple of (filtered_df, attendance_table, daily_aggregate)
+    """
+    # CRITICAL: Save a copy of the full dataset's employee information for consistent counting
+    # Get distinct employees with their status info before filtering by date range. is_full_time
+    # varies per swipe, so each employee keeps their latest swipe (as the first row of a
+    # newest-first export did), whatever order the dataset is in
+    sorted_dataset = dataset if dataset.time_sorted else dataset.sort_by_time()
+    full_employee_info = sorted_dataset.to_frame([
+        'employee_id', 'Location', 'Working Status', 'is_full_time',
+        'Combined hire date', 'Most recent day worked', 'Division'
+    ]).drop_duplicates('employee_id', keep='last')
+
+    # Filter by date range, then resolve the employee attributes the analyses use for the selected swipes only
+    if start_date and end_date:
+        dataset = dataset.filter_dates(start_date, end_date)
+    filtered_df = dataset.to_frame(ANALYSIS_COLUMNS)
+
+    # Ensure date columns are datetime type
+    for col in ['Combined hire date', 'Most recent day worked']:
+        if not pd.api.types.is_datetime64_any_dtype(filtered_df[col]):
+            filtered_df[col] = pd.to_datetime(filtered_df[col])
+
+    # Create attendance table
+    attendance_table = build_attendance_table(filtered_df)
+
+    # Attendance of each swipe's employee and day, resolved on the integer codes rather than
+    # merging the attendance table back on (employee_id, date_only)
+    filtered_df['visits'] = dataset.daily_visits()
+    filtered_df['is_present'] = filtered_df['visits'] > 0
+    filtered_df['present'] = np.where(filtered_df['is_present'], 'Yes', 'No')
+
+    # Store the full employee info for consistent denominators
+    filtered_df.attrs['full_employee_info'] = full_employee_info
+
+    # Per-date present and eligible counts, shared by the daily, weekly and period reports
+    daily_aggregate = build_daily_aggregate(filtered_df)
+
+    return filtered_df, attendance_table, daily_aggregate
+
+def compute_analysis(metric: str, inputs: tuple, start_date=None, end_date=None) -> pd.DataFrame:
+    """
+    Calculate one analysis of a date range.
+
+    Args:
+        metric: One of ANALYSIS_METRICS, or 'daily_aggregate'
+        inputs: Tuple from build_analysis_inputs for the date range
+        start_date: Optional first date of the range
+        end_date: Optional last date of the range
+
+    Returns:
+        DataFrame with the analysis results
+
+    Raises:
+        KeyError: If the metric is unknown
+    """
+    filtered_df, attendance_table, daily_aggregate = inputs
+
+    # Analyses get a shallow copy, so column assignments cannot change the shared frame
+    df = filtered_df.copy(deep=False)
+
+    if metric == 'attendance_table':
+        return attendance_table
+    elif metric == 'daily_aggregate':
+        return daily_aggregate
+    elif metric == 'tue_thu_attendance':
+        return calculate_tue_thu_attendance_percentage(df, daily_aggregate)
+    elif metric == 'daily_counts':
+        return calculate_daily_attendance_counts(df, daily_aggregate)
+    elif metric == 'weekly_counts':
+        return calculate_weekly_attendance_counts(df, daily_aggregate)
+    elif metric == 'period_summary':
+        return calculate_period_summary(df,
+                                        pd.to_datetime(start_date) if start_date else None,
+                                        pd.to_datetime(end_date) if end_date else None,
+                                        daily_aggregate)
+    elif metric == 'employee_summary':
+        return create_employee_summary(df)
+    elif metric == 'division_tue_thu':
+        return calculate_division_attendance_tue_thu(df)
+    elif metric == 'division_by_location':
+        return calculate_division_attendance_by_location(df)
+    raise KeyError(f"Unknown analysis: {metric}")
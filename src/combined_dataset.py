@@ -0,0 +1,263 @@
+"""
+Dimension-based combined dataset of swipes and employee attributes.
+
+merge_key_card_with_employee_info joins every employee column onto every swipe
+row, repeating names, locations, divisions and dates millions of times. This
+module keeps the same information as a star schema instead: a narrow fact
+table with one row per swipe (integer employee code, day, second of day, door
+code and the full-time flag) and a small employee dimension indexed by code.
+Attributes are resolved by integer take, and the wide frame the analyses
+expect is only materialized on demand, for the columns and dates needed.
+"""
+import pandas as pd
+import numpy as np
+import hashlib
+import logging
+import os
+import sys
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.utils import add_calendar_columns, day_numbers_to_dates, MISSING_DAY_NUMBER
+from src.data_cleaning import add_full_time_indicators
+from src.employment_status import build_status_change_table
+
+logger = logging.getLogger("attendance_dashboard.combined_dataset")
+
+_NANOSECONDS_PER_SECOND = 1_000_000_000
+_SECONDS_PER_DAY = 86_400
+
+class CombinedDataset:
+    """
+    Swipe facts plus an employee dimension.
+
+    Attributes:
+        facts: DataFrame with one row per swipe and columns employee_code (int32,
+            -1 for swipes without an employee ID), day_number (int32 days since
+            1970-01-01), second (int32 second of day), door_code (int16 code into
+            doors, -1 if missing) and, when employment history was given,
+            is_full_time (bool)
+        employees: DataFrame indexed by employee code with employee_id and the
+            employee info columns
+        doors: Index of door names ('Where' values)
+        time_sorted: Whether the facts are sorted by (day_number, second)
+    """
+
+    def __init__(self, facts: pd.DataFrame, employees: pd.DataFrame, doors: pd.Index, cache_key: str = None,
+                 time_sorted: bool = False):
+        self.facts = facts
+        self.employees = employees
+        self.doors = doors
+        self.time_sorted = time_sorted
+        self._cache_key = cache_key
+
+    def __len__(self) -> int:
+        return len(self.facts)
+
+    def date_range(self):
+        """Return the (first, last) swipe dates, or (NaT, NaT) if there are none."""
+        days = self.facts['day_number'].to_numpy()
+        if self.time_sorted:
+            days = days[np.searchsorted(days, MISSING_DAY_NUMBER, side='right'):]
+            bounds = [days[0], days[-1]] if len(days) else []
+        else:
+            days = days[days != MISSING_DAY_NUMBER]
+            bounds = [days.min(), days.max()] if len(days) else []
+        if not bounds:
+            return pd.NaT, pd.NaT
+        first, last = day_numbers_to_dates(bounds)
+        return pd.Timestamp(first), pd.Timestamp(last)
+
+    def sort_by_time(self) -> 'CombinedDataset':
+        """
+        Return the dataset with the facts sorted by swipe time.
+
+        Swipes without a date come first. On a sorted dataset filter_dates
+        is a binary search and a slice instead of a scan of every swipe.
+        """
+        order = np.lexsort((self.facts['second'].to_numpy(), self.facts['day_number'].to_numpy()))
+        return CombinedDataset(self.facts.iloc[order], self.employees, self.doors, self._cache_key, time_sorted=True)
+
+    def filter_dates(self, start_date=None, end_date=None) -> 'CombinedDataset':
+        """
+        Select the swipes between two dates (both inclusive).
+
+        The employee dimension is shared with the returned dataset. If this
+        dataset has a preset cache key, the selection's key is derived from it
+        and the date range.
+
+        Args:
+            start_date: First date to keep (default: no lower bound)
+            end_date: Last date to keep (default: no upper bound)
+
+        Returns:
+            CombinedDataset with the selected facts
+        """
+        days = self.facts['day_number'].to_numpy()
+        first_day = MISSING_DAY_NUMBER + 1 if start_date is None else _day_number(start_date)
+        last_day = None if end_date is None else _day_number(end_date)
+        if self.time_sorted:
+            start = np.searchsorted(days, first_day, side='left')
+            stop = len(days) if last_day is None else np.searchsorted(days, last_day, side='right')
+            facts = self.facts.iloc[start:max(start, stop)]
+        else:
+            mask = days >= first_day
+            if last_day is not None:
+                mask &= days <= last_day
+            facts = self.facts[mask]
+
+        cache_key = None if self._cache_key is None else f"{self._cache_key}[{first_day}:{last_day}]"
+        return CombinedDataset(facts, self.employees, self.doors, cache_key, time_sorted=self.time_sorted)
+
+    def employee_attribute(self, column: str) -> pd.Series:
+        """Resolve an employee column for every swipe by integer take on the dimension."""
+        values = self.employees[column].array.take(self.facts['employee_code'].to_numpy(), allow_fill=True)
+        return pd.Series(values, index=self.facts.index, name=column)
+
+    def daily_visits(self) -> np.ndarray:
+        """
+        Count each swipe's employee's swipes on its day, from the integer codes.
+
+        This is the attendance table's visits for the swipe's (employee_id,
+        date_only), resolved by code instead of a merge. Swipes without an
+        employee ID or a date get 0.
+
+        Returns:
+            float64 array with one count per swipe
+        """
+        codes = self.facts['employee_code'].to_numpy(np.int64)
+        days = self.facts['day_number'].to_numpy(np.int64)
+        counted = (codes >= 0) & (days != MISSING_DAY_NUMBER)
+        visits = np.zeros(len(codes), dtype=np.float64)
+        if not counted.any():
+            return visits
+
+        # One integer per (employee, day) pair, factorized to count the swipes of each
+        codes, days = codes[counted], days[counted]
+        first_day = days.min()
+        pair_codes, _ = pd.factorize(codes * (days.max() - first_day + 1) + (days - first_day))
+        visits[counted] = np.bincount(pair_codes)[pair_codes]
+        return visits
+
+    def to_frame(self, columns: list = None) -> pd.DataFrame:
+        """
+        Materialize the wide per-swipe frame the analyses use.
+
+        The frame has employee_id, parsed_time, date_only, the calendar columns,
+        Where, is_full_time (when available) and the employee dimension columns,
+        matching the output of merge_key_card_with_employee_info.
+
+        Args:
+            columns: Columns to include (default: all)
+
+        Returns:
+            DataFrame with one row per swipe
+        """
+        days = self.facts['day_number'].to_numpy(np.int64)
+        missing = days == MISSING_DAY_NUMBER
+        seconds = days * _SECONDS_PER_DAY + self.facts['second'].to_numpy(np.int64)
+        parsed_time = (np.where(missing, 0, seconds) * _NANOSECONDS_PER_SECOND).view('datetime64[ns]').copy()
+        parsed_time[missing] = np.datetime64('NaT')
+
+        frame = pd.DataFrame(index=self.facts.index)
+        frame['employee_id'] = self.employee_attribute('employee_id')
+        frame['parsed_time'] = parsed_time
+        frame['date_only'] = frame['parsed_time'].dt.floor('d')
+        add_calendar_columns(frame)
+        if columns is None or 'Where' in columns:
+            frame['Where'] = pd.Categorical.from_codes(self.facts['door_code'].to_numpy(), categories=self.doors)
+        if 'is_full_time' in self.facts.columns:
+            frame['is_full_time'] = self.facts['is_full_time']
+
+        for col in self.employees.columns.drop('employee_id'):
+            if columns is not None and col not in columns:
+                continue
+            frame[col] = self.employee_attribute(col)
+
+        return frame if columns is None else frame[[col for col in columns if col in frame.columns]]
+
+    def cache_key(self) -> str:
+        """
+        Return a content hash of the dataset, for use as a cache key.
+
+        Hashing the narrow facts is much cheaper than hashing the wide merged
+        frame; the result is computed once and reused. A key given when the
+        dataset was built (e.g. from the source file fingerprints) is used
+        as-is, without hashing the data.
+        """
+        if self._cache_key is None:
+            digest = hashlib.sha256()
+            digest.update(pd.util.hash_pandas_object(self.facts).to_numpy().tobytes())
+            digest.update(pd.util.hash_pandas_object(self.employees.astype(str)).to_numpy().tobytes())
+            digest.update(pd.util.hash_array(self.doors.to_numpy()).tobytes())
+            self._cache_key = digest.hexdigest()
+        return self._cache_key
+
+    def memory_usage(self) -> int:
+        """Return the memory used by the facts and the dimension, in bytes."""
+        return int(self.facts.memory_usage(deep=True).sum() + self.employees.memory_usage(deep=True).sum())
+
+def _day_number(date) -> int:
+    """Convert a date to its day number (days since 1970-01-01)."""
+    return int(pd.Timestamp(date).normalize().value // (_SECONDS_PER_DAY * _NANOSECONDS_PER_SECOND))
+
+def build_combined_dataset(
+    key_card_df: pd.DataFrame,
+    employee_df: pd.DataFrame,
+    history_df: pd.DataFrame = None,
+    cache_key: str = None
+) -> CombinedDataset:
+    """
+    Build the dimension-based combined dataset from cleaned key card and employee data.
+
+    Equivalent to merge_key_card_with_employee_info, except that the raw User,
+    Event and Details columns are not kept, and an employee ID that appears
+    more than once in the employee info keeps its first row instead of
+    duplicating that employee's swipes.
+
+    Args:
+        key_card_df: Cleaned key card data (from clean_key_card_data)
+        employee_df: Cleaned employee info (from clean_employee_info)
+        history_df: Optional DataFrame with employment history
+        cache_key: Optional identifier of the inputs, returned by cache_key()
+            instead of a content hash
+
+    Returns:
+        CombinedDataset
+    """
+    if 'employee_id' not in key_card_df.columns or 'employee_id' not in employee_df.columns:
+        raise KeyError("Both DataFrames must have 'employee_id' column")
+
+    # Employee dimension: one row per distinct ID in the swipes, in first-seen order
+    codes, employee_ids = pd.factorize(key_card_df['employee_id'])
+    employees = (employee_df.drop_duplicates('employee_id')
+                 .set_index('employee_id')
+                 .reindex(pd.Index(employee_ids, name='employee_id'))
+                 .reset_index())
+
+    # Fact table: integer codes only
+    parsed_time = pd.to_datetime(key_card_df['parsed_time'])
+    missing = parsed_time.isna().to_numpy()
+    seconds = np.where(missing, 0, parsed_time.to_numpy().astype(np.int64) // _NANOSECONDS_PER_SECOND)
+    days = np.where(missing, MISSING_DAY_NUMBER, np.floor_divide(seconds, _SECONDS_PER_DAY))
+    if 'Where' in key_card_df.columns:
+        door_codes, doors = pd.factorize(key_card_df['Where'])
+    else:
+        door_codes, doors = np.full(len(key_card_df), -1), pd.Index([])
+
+    facts = pd.DataFrame({
+        'employee_code': codes.astype(np.int32),
+        'day_number': days.astype(np.int32),
+        'second': np.mod(seconds, _SECONDS_PER_DAY).astype(np.int32),
+        'door_code': door_codes.astype(np.int16)
+    }, index=key_card_df.index)
+
+    if history_df is not None:
+        status_table = build_status_change_table(history_df, employee_df)
+        flagged = add_full_time_indicators(key_card_df[['employee_id', 'date_only']], status_table)
+        facts['is_full_time'] = flagged['is_full_time'].to_numpy()
+
+    dataset = CombinedDataset(facts, employees, pd.Index(np.asarray(doors, dtype=object)), cache_key)
+    logger.info(f"Built combined dataset with {len(facts):,} swipes and {len(employees):,} employees "
+                f"({dataset.memory_usage() / 1024**2:.1f} MB)")
+    return dataset
@@ -21,6 +21,74 @@ KEY_CARD_DATA_PATH = RAW_DATA_DIR / 'key_card_access.csv'
 EMPLOYEE_INFO_PATH = RAW_DATA_DIR / 'employee_info.csv'
 EMPLOYMENT_HISTORY_PATH = RAW_DATA_DIR / 'employment_status_history.csv'
 
+# Key card timestamp layout, e.g. "31/07/2023 22:48:58"
+KEY_CARD_DATETIME_FORMAT = "%d/%m/%Y %H:%M:%S"
+
+# Schema registry - for each raw source, the columns the pipelines need and how to type them.
+# Loaders read only these columns (columns missing from a file are skipped).
+# dtype is one of 'str', 'category', 'numeric' (float, invalid values become NaN) or
+# 'datetime' (parsed with 'format' if given, otherwise with the 'dayfirst' flag).
+KEY_CARD_SCHEMA = {
+    'Date/time': {'dtype': 'datetime', 'format': KEY_CARD_DATETIME_FORMAT},
+    'User': {'dtype': 'str'},
+    'Where': {'dtype': 'category'},
+    'Event': {'dtype': 'category'},
+    'Details': {'dtype': 'str'}
+}
+EMPLOYEE_INFO_SCHEMA = {
+    # Used by clean_employee_info
+    'Employee #': {'dtype': 'numeric'},
+    'Last name, First name': {'dtype': 'str'},
+    'Working Status': {'dtype': 'str'},
+    'Location': {'dtype': 'str'},
+    'Division': {'dtype': 'str'},
+    'Department': {'dtype': 'str'},
+    'Status': {'dtype': 'str'},
+    'Employment Status': {'dtype': 'str'},
+    'Hire Date': {'dtype': 'datetime', 'dayfirst': True},
+    'Original Hire Date': {'dtype': 'datetime', 'dayfirst': True},
+    'Resignation Date': {'dtype': 'datetime', 'dayfirst': True},
+    'Employment Status: Date': {'dtype': 'datetime', 'dayfirst': True},
+    # Shown in the dashboard's Employee Details tab
+    'Job Title': {'dtype': 'str'},
+    'Level': {'dtype': 'str'},
+    'Reporting to': {'dtype': 'str'},
+    'Entity': {'dtype': 'str'},
+    'Gender': {'dtype': 'str'},
+    'FTE': {'dtype': 'numeric'}
+}
+EMPLOYMENT_HISTORY_SCHEMA = {
+    'Employee': {'dtype': 'str'},
+    'Date': {'dtype': 'datetime', 'dayfirst': False},
+    'Employment Status': {'dtype': 'category'}
+}
+DATA_SCHEMAS = {
+    'key_card': KEY_CARD_SCHEMA,
+    'employee_info': EMPLOYEE_INFO_SCHEMA,
+    'employment_history': EMPLOYMENT_HISTORY_SCHEMA
+}
+
+# Streaming ingestion - rows read per chunk by load_key_card_data(stream=True)
+KEY_CARD_CHUNK_SIZE = 200_000
+
+# Columns identifying a unique swipe when combining overlapping exports
+COMBINE_DEDUPE_COLUMNS = ['Date/time', 'User']
+
+# Raw data caching - sidecar files are written next to the raw CSVs
+PARQUET_MIRROR_SUFFIX = '.parquet'  # Monthly row-grouped mirror of a raw CSV
+KEY_CARD_INDEX_SUFFIX = '.idx.json'  # Byte offset of the first row of each day
+KEY_CARD_INDEX_BLOCK_BYTES = 16 * 1024 * 1024  # Bytes scanned per block when building the index
+DATASET_MANIFEST_SUFFIX = '.meta.json'  # Date range, row count and employee count of a raw CSV
+ROW_HASH_INDEX_SUFFIX = '.hashes.npz'  # Sorted 64-bit row hashes used to de-duplicate appends
+FINGERPRINT_SAMPLE_BYTES = 64 * 1024  # Bytes hashed from each end of a file when fingerprinting
+
+# Dashboard caching - bump when cleaning or analysis logic changes so cached results are not reused
+CACHE_VERSION = 1
+
+# Precomputed results written by main.py and read by the dashboard, one directory per data version
+RESULTS_STORE_DIR = PROCESSED_DATA_DIR / 'results_store'
+RESULTS_STORE_KEEP_VERSIONS = 2  # Older version directories are removed after a successful write
+
 # Output file paths - templates that will be formatted with specific suffixes
 COMBINED_DATA_TEMPLATE = str(PROCESSED_DATA_DIR / 'combined_data_{}.parquet')
 ATTENDANCE_TABLE_TEMPLATE = str(PROCESSED_DATA_DIR / 'attendance_table_{}.csv')
@@ -40,6 +108,15 @@ SPECIAL_EMPLOYEE_IDS = {
     'BENJAMIN_MUELLER': 867
 }
 
+# Employee IDs for key card users whose 'User' value has no numeric ID prefix.
+# Any 'User' containing one of these names is given the ID (later entries win).
+EMPLOYEE_ID_OVERRIDES = {
+    'Arorra, Aakash': 378,
+    'Payne, James': 735,
+    'Mueller, Benjamin': SPECIAL_EMPLOYEE_IDS['BENJAMIN_MUELLER'],
+    'Hindhaugh, Robert': SPECIAL_EMPLOYEE_IDS['ROBERT_HINDHAUGH']
+}
+
 # Analysis settings
 DEFAULT_ANALYSIS_DAYS = 365  # Default number of days to analyze
 ATTENDANCE_OUTLIER_THRESHOLD = 120  # Minutes (2 hours) threshold for outlier detection
@@ -0,0 +1,183 @@
+"""
+Combine many overlapping key card exports into a single time-ordered CSV.
+
+Each export is parsed and sorted independently in a process pool and written
+to a temporary run file. The sorted runs are then stream-merged with a
+heap-based k-way merge, duplicates on the dedupe columns are dropped as they
+meet in the merged stream, and the output is written in a single pass. Only
+one chunk per run is held in memory during the merge.
+"""
+import pandas as pd
+import numpy as np
+import csv
+import glob
+import heapq
+import logging
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.config import KEY_CARD_CHUNK_SIZE, COMBINE_DEDUPE_COLUMNS
+from src.utils import parse_key_card_datetime
+from src.key_card_index import build_key_card_index
+
+logger = logging.getLogger("attendance_dashboard.csv_combiner")
+
+# Sort key column added to each run file, and the key given to unparseable timestamps
+_SORT_KEY_COLUMN = '_sort_key'
+_NAT_SORT_KEY = np.iinfo(np.int64).max
+
+def _read_columns(filepath: str) -> list:
+    """Read the header of a CSV file."""
+    return pd.read_csv(filepath, nrows=0).columns.tolist()
+
+def sort_export(filepath: str, run_path: str, columns: list, dedupe_columns: list,
+                newest_first: bool = True) -> int:
+    """
+    Sort one export by time and write it to a run file for the k-way merge.
+
+    Runs in a worker process. Rows are ordered by timestamp (unparseable
+    timestamps last) and then by the remaining dedupe columns, so duplicates
+    of a row are adjacent in the merged stream.
+
+    Args:
+        filepath: Path to the export CSV
+        run_path: Path of the run file to write
+        columns: Output columns; columns missing from this export are left empty
+        dedupe_columns: Columns identifying a unique swipe, starting with 'Date/time'
+        newest_first: Whether to order newest swipes first
+
+    Returns:
+        Number of rows written to the run
+    """
+    df = pd.read_csv(filepath, dtype=str, keep_default_na=False).reindex(columns=columns, fill_value='')
+
+    times = parse_key_card_datetime(df['Date/time'].replace('', np.nan))
+    keys = times.to_numpy().astype(np.int64)
+    if newest_first:
+        keys = -keys
+    unparsed = times.isna().to_numpy()
+    keys[unparsed] = _NAT_SORT_KEY
+    df.insert(0, _SORT_KEY_COLUMN, keys)
+
+    # Order rows exactly as the merge keys compare (see _iterate_run)
+    df['_raw_timestamp'] = df['Date/time'].where(unparsed, '')
+    df = df.sort_values([_SORT_KEY_COLUMN, '_raw_timestamp'] + dedupe_columns[1:], kind='stable')
+    df.drop(columns='_raw_timestamp').to_csv(run_path, index=False)
+    return len(df)
+
+def _iterate_run(run_path: str, dedupe_columns: list, chunksize: int):
+    """
+    Yield (merge key, row values) for each row of a sorted run, reading it in chunks.
+
+    The merge key is the sort key followed by the dedupe column values; the
+    raw timestamp is only part of it for unparseable timestamps.
+    """
+    for chunk in pd.read_csv(run_path, dtype=str, keep_default_na=False, chunksize=chunksize):
+        sort_keys = chunk.pop(_SORT_KEY_COLUMN).astype(np.int64).tolist()
+        dedupe_values = chunk[dedupe_columns].itertuples(index=False, name=None)
+        rows = chunk.itertuples(index=False, name=None)
+        for sort_key, values, row in zip(sort_keys, dedupe_values, rows):
+            timestamp = values[0] if sort_key == _NAT_SORT_KEY else ''
+            yield (sort_key, timestamp) + values[1:], row
+
+def merge_sorted_runs(run_paths: list, output_file: str, columns: list, dedupe_columns: list,
+                      chunksize: int = KEY_CARD_CHUNK_SIZE):
+    """
+    Stream-merge sorted runs into one CSV, dropping duplicates as they meet.
+
+    heapq.merge is stable, so when several runs contain the same swipe the copy
+    from the earliest run is kept.
+
+    Args:
+        run_paths: Sorted run files, in priority order
+        output_file: Path of the combined CSV
+        columns: Output columns
+        dedupe_columns: Columns identifying a unique swipe
+        chunksize: Number of rows read from each run at a time
+
+    Returns:
+        Tuple of (rows written, duplicates dropped)
+    """
+    runs = [_iterate_run(path, dedupe_columns, chunksize) for path in run_paths]
+    written = 0
+    duplicates = 0
+    previous_key = None
+
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.writer(f, lineterminator='\n')
+        writer.writerow(columns)
+        for key, row in heapq.merge(*runs, key=lambda item: item[0]):
+            if key == previous_key:
+                duplicates += 1
+                continue
+            previous_key = key
+            writer.writerow(row)
+            written += 1
+
+    return written, duplicates
+
+def combine_csv_files(input_dir: str, output_file: str, dedupe_columns: list = None,
+                      newest_first: bool = True, max_workers: int = None,
+                      chunksize: int = KEY_CARD_CHUNK_SIZE) -> int:
+    """
+    Combine all CSV exports in input_dir into one de-duplicated, time-ordered CSV.
+
+    Args:
+        input_dir: Directory containing the export CSV files
+        output_file: Path of the combined CSV (replaced atomically)
+        dedupe_columns: Columns identifying a unique swipe (default: COMBINE_DEDUPE_COLUMNS)
+        newest_first: Whether to order newest swipes first, as the raw exports are
+        max_workers: Number of worker processes used to sort the exports
+        chunksize: Number of rows read from each run at a time during the merge
+
+    Returns:
+        Number of rows written, or -1 on error
+    """
+    dedupe_columns = list(dedupe_columns or COMBINE_DEDUPE_COLUMNS)
+    csv_files = sorted(glob.glob(os.path.join(input_dir, "*.csv")))
+    if not csv_files:
+        logger.error(f"No CSV files found in {input_dir}")
+        return -1
+
+    try:
+        # Union of all export columns, in first-seen order
+        columns = []
+        for filepath in csv_files:
+            columns.extend(col for col in _read_columns(filepath) if col not in columns)
+        missing = [col for col in dedupe_columns if col not in columns]
+        if dedupe_columns[0] != 'Date/time' or missing:
+            logger.error(f"Dedupe columns must start with 'Date/time' and exist in the exports: {dedupe_columns}")
+            return -1
+
+        with tempfile.TemporaryDirectory(dir=Path(output_file).parent) as run_dir:
+            run_paths = [os.path.join(run_dir, f"run_{i:04d}.csv") for i in range(len(csv_files))]
+
+            logger.info(f"Sorting {len(csv_files)} exports with up to {max_workers or os.cpu_count()} workers")
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                row_counts = list(executor.map(
+                    sort_export, csv_files, run_paths,
+                    [columns] * len(csv_files), [dedupe_columns] * len(csv_files),
+                    [newest_first] * len(csv_files)
+                ))
+            for filepath, rows in zip(csv_files, row_counts):
+                logger.info(f"Sorted {filepath} with {rows:,} rows")
+
+            tmp_output = os.path.join(run_dir, 'combined.csv')
+            written, duplicates = merge_sorted_runs(run_paths, tmp_output, columns, dedupe_columns, chunksize)
+            os.replace(tmp_output, output_file)
+
+        logger.info(f"Combined {sum(row_counts):,} rows into {written:,} rows "
+                    f"({duplicates:,} duplicates removed) in {output_file}")
+
+        # Keep the day index in step with the file
+        build_key_card_index(output_file)
+        return written
+
+    except Exception as e:
+        logger.error(f"Error combining CSV files from {input_dir}: {str(e)}")
+        return -1
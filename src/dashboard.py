@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 from pathlib import Path
-from datetime import datetime, timedelta
 import time
 import gc  # For garbage collection
 import altair as alt
@@ -12,7 +11,8 @@ from data_ingestion import (
     load_key_card_data,
     load_employee_info,
     calculate_default_date_range,
-    load_employment_history
+    load_employment_history,
+    load_sources_concurrently
 )
 from data_cleaning import (
     clean_key_card_data,
@@ -21,29 +21,29 @@ from data_cleaning import (
     add_time_analysis_columns
 )
 
+from data_cache import load_dataset_manifest, data_version
+from combined_dataset import build_combined_dataset, CombinedDataset
+from config import KEY_CARD_DATA_PATH, EMPLOYEE_INFO_PATH, EMPLOYMENT_HISTORY_PATH
+from analysis_pipeline import ANALYSIS_METRICS, build_analysis_inputs, compute_analysis, standard_date_ranges
+from results_store import load_results_manifest, read_stored_dataset, read_stored_analysis, source_paths
+
 # Data analysis imports
 from data_analysis import (
     build_attendance_table,
+    build_daily_attendance_index,
     calculate_visit_counts,
     calculate_average_arrival_hour,
     calculate_daily_attendance_percentage,
     calculate_weekly_attendance_percentage,
     calculate_attendance_by_weekday,
     calculate_attendance_by_division,
-    calculate_division_attendance_tue_thu,
-    calculate_division_attendance_by_location,
     calculate_individual_attendance,
-    create_employee_summary,
-    calculate_tue_thu_attendance_percentage,
-    calculate_daily_attendance_counts,
-    calculate_weekly_attendance_counts,
-    calculate_period_summary
+    create_employee_summary
 )
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
 def load_data(start_date=None, end_date=None, last_n_days=None):
     """
-    Load and preprocess the data with caching.
+    Load the raw data for a date range.
     
     Args:
         start_date: Optional start date string in format 'YYYY-MM-DD'
@@ -51,36 +51,46 @@ def load_data(start_date=None, end_date=None, last_n_days=None):
         last_n_days: If provided, load only the last N days of data
         
     Returns:
-        Tuple of (key_card_df, employee_df, history_df)
+        Tuple of (key_card_df, employee_df, history_df); history_df is None if it could not be loaded
+        
+    Raises:
+        RuntimeError: If the key card or employee data could not be loaded
     """
-    start_time = time.time()
-    
-    key_card_path = Path("data/raw/key_card_access.csv")
-    key_card_df = load_key_card_data(
-        str(key_card_path), 
+    # Read the three sources concurrently; the small files load while the key card file is read
+    timings = {}
+    errors = {}
+    key_card_df, employee_df, history_df = load_sources_concurrently(
+        str(KEY_CARD_DATA_PATH),
+        str(EMPLOYEE_INFO_PATH),
+        str(EMPLOYMENT_HISTORY_PATH),
+        timings=timings,
+        errors=errors,
         start_date=start_date, 
         end_date=end_date, 
         last_n_days=last_n_days
     )
-    print(f"\nLoaded key card data: {len(key_card_df)} rows, "
-          f"from {key_card_df['Date/time'].min()} to {key_card_df['Date/time'].max()}")
     
-    employee_path = Path("data/raw/employee_info.csv")
-    employee_df = load_employee_info(str(employee_path))
-    print(f"\nLoaded employee data: {len(employee_df)} rows")
+    # A failed source is returned as None; report the loader's error instead of failing on the None
+    if key_card_df is None:
+        raise RuntimeError(f"Failed to load key card data: {errors.get('key_card', 'unknown error')}")
+    if employee_df is None:
+        raise RuntimeError(f"Failed to load employee data: {errors.get('employee_info', 'unknown error')}")
     
-    # Load employment history data
-    history_path = Path("/Users/rob.hindhaugh/Documents/GitHub/Attendance_Dashboard/data/raw/employment_status_history.csv")
-    history_df = load_employment_history(str(history_path))
-    print(f"\nLoaded employment history data: {len(history_df)} rows")
+    print(f"\nLoaded key card data: {len(key_card_df)} rows in {timings['key_card']:.2f} seconds, "
+          f"from {key_card_df['Date/time'].min()} to {key_card_df['Date/time'].max()}")
+    print(f"\nLoaded employee data: {len(employee_df)} rows in {timings['employee_info']:.2f} seconds")
+    if history_df is None:
+        print(f"\nEmployment history not loaded ({errors.get('employment_history', 'unknown error')}), "
+              "continuing without it")
+    else:
+        print(f"\nLoaded employment history data: {len(history_df)} rows in {timings['employment_history']:.2f} seconds")
     
-    print(f"Data loading completed in {time.time() - start_time:.2f} seconds")
+    print(f"Data loading completed in {timings['total']:.2f} seconds")
     
     return key_card_df, employee_df, history_df
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def process_data(key_card_df, employee_df, history_df=None):
-    """Process and merge data with caching."""
+def process_data(key_card_df, employee_df, history_df=None, cache_key=None):
+    """Process and merge data into a combined dataset identified by cache_key."""
     start_time = time.time()
     
     # Clean key card data first
@@ -93,8 +103,9 @@ def process_data(key_card_df, employee_df, history_df=None):
     # Clean employee data, passing the max_data_date
     employee_df = clean_employee_info(employee_df, max_data_date)
     
-    # Merge the datasets, including employment history if provided
-    combined_df = merge_key_card_with_employee_info(key_card_df, employee_df, history_df)
+    # Combine the datasets as swipe facts plus an employee dimension, including
+    # employment history if provided
+    dataset = build_combined_dataset(key_card_df, employee_df, history_df, cache_key=cache_key)
     
     # Clean up memory
     del key_card_df
@@ -102,82 +113,115 @@ def process_data(key_card_df, employee_df, history_df=None):
     
     print(f"Data processing completed in {time.time() - start_time:.2f} seconds")
     
-    return combined_df
+    return dataset
 
-@st.cache_data(ttl=3600)  # Cache for 1 hour
-def calculate_analyses(combined_df, start_date=None, end_date=None):
-    """Calculate all analyses with caching."""
-    start_time = time.time()
-    
-    # Ensure date columns are datetime type
-    if not pd.api.types.is_datetime64_any_dtype(combined_df['Combined hire date']):
-        combined_df['Combined hire date'] = pd.to_datetime(combined_df['Combined hire date'])
-    if not pd.api.types.is_datetime64_any_dtype(combined_df['Most recent day worked']):
-        combined_df['Most recent day worked'] = pd.to_datetime(combined_df['Most recent day worked'])
-    
-    # CRITICAL: Save a copy of the full dataset's employee information for consistent counting
-    # Get distinct employees with their status info before filtering by date range
-    full_employee_info = combined_df[[
-        'employee_id', 'Location', 'Working Status', 'is_full_time', 
-        'Combined hire date', 'Most recent day worked', 'Division'
-    ]].drop_duplicates('employee_id')
-    
-    # Filter by date range
-    if start_date and end_date:
-        date_mask = (
-            (combined_df['date_only'] >= pd.to_datetime(start_date)) &
-            (combined_df['date_only'] <= pd.to_datetime(end_date))
-        )
-        filtered_df = combined_df[date_mask]
-    else:
-        filtered_df = combined_df
-    
-    # Create attendance table
-    attendance_table = build_attendance_table(filtered_df)
+@st.cache_resource(ttl=3600, max_entries=2, show_spinner="Loading data...")  # Cache for 1 hour
+def load_base_dataset(version):
+    """
+    Load and process all the data once per data version, with caching.
     
-    # Merge attendance data back to filtered_df
-    filtered_df = filtered_df.merge(
-        attendance_table[['employee_id', 'date_only', 'present', 'is_present', 'visits']],
-        on=['employee_id', 'date_only'],
-        how='left'
-    )
+    The cache is keyed by the data version only (raw file fingerprints and
+    cache version, from data_version). If main.py stored the dataset for this
+    version in the results store it is read from there, otherwise the raw
+    data is loaded and processed. The dataset is sorted by swipe time, so
+    every date range preset is a slice of it (see CombinedDataset.filter_dates),
+    and it is shared between reruns and sessions without copying, so it must
+    be treated as read-only.
     
-    # Fill any missing values in present and is_present columns
-    filtered_df['present'] = filtered_df['present'].fillna('No')
-    filtered_df['is_present'] = filtered_df['is_present'].fillna(False)
+    Returns:
+        Time-sorted CombinedDataset whose cache_key() is the data version
+    """
+    results_manifest = load_results_manifest(version)
+    if results_manifest is not None:
+        stored = read_stored_dataset(results_manifest)
+        if stored is not None:
+            facts, employees, doors = stored
+            dataset = CombinedDataset(facts, employees, doors, cache_key=version,
+                                      time_sorted=results_manifest['time_sorted'])
+            return dataset if dataset.time_sorted else dataset.sort_by_time()
     
-    # Store the full employee info for consistent denominators
-    filtered_df.attrs['full_employee_info'] = full_employee_info
+    key_card_df, employee_df, history_df = load_data()
+    return process_data(key_card_df, employee_df, history_df, cache_key=version).sort_by_time()
+
+@st.cache_resource(ttl=3600, hash_funcs={CombinedDataset: CombinedDataset.cache_key})  # Cache for 1 hour
+def build_daily_lookup(dataset):
+    """Build the Daily Attendance Lookup index once per dataset (shared, read-only, between reruns)."""
+    lookup_df = dataset.to_frame([
+        'employee_id', 'parsed_time', 'date_only', 'is_full_time', 'Last name, First name',
+        'Location', 'Working Status', 'Division', 'Department', 'Combined hire date', 'Most recent day worked'
+    ])
+    
+    # Display missing divisions and departments as text, so they can be filtered
+    for col in ['Division', 'Department']:
+        if col in lookup_df.columns:
+            lookup_df[col] = lookup_df[col].astype(str)
+    
+    return build_daily_attendance_index(lookup_df)
+
+# Dashboard views, in display order
+DASHBOARD_VIEWS = [
+    "Daily Overview",
+    "Weekly Overview",
+    "Division Attendance",
+    "Individual Employee Attendance",
+    "Employee Details",
+    "Daily Attendance Lookup"
+]
+
+@st.cache_resource(ttl=3600, max_entries=4, hash_funcs={CombinedDataset: CombinedDataset.cache_key})  # Cache for 1 hour
+def prepare_analysis_data(dataset, start_date=None, end_date=None):
+    """
+    Build the frame the analyses of a date range share, with caching.
     
-    # Calculate all analyses
-    tue_thu_attendance = calculate_tue_thu_attendance_percentage(filtered_df)
-    daily_counts = calculate_daily_attendance_counts(filtered_df)
-    weekly_counts = calculate_weekly_attendance_counts(filtered_df)
-    period_summary = calculate_period_summary(filtered_df, 
-                                           pd.to_datetime(start_date) if start_date else None,
-                                           pd.to_datetime(end_date) if end_date else None)
-    employee_summary = create_employee_summary(filtered_df)
+    The frame and attendance table are cached as shared objects (not copied on
+    each use), so they must be treated as read-only.
     
-    # Calculate division attendance
-    division_tue_thu = calculate_division_attendance_tue_thu(filtered_df)
-    division_by_location = calculate_division_attendance_by_location(filtered_df)
+    Returns:
+        Tuple of (filtered_df, attendance_table, daily_aggregate)
+    """
+    start_time = time.time()
+    inputs = build_analysis_inputs(dataset, start_date, end_date)
+    print(f"Analysis data prepared in {time.time() - start_time:.2f} seconds")
+    return inputs
+
+@st.cache_data(ttl=3600, show_spinner="Calculating analytics...",
+               hash_funcs={CombinedDataset: CombinedDataset.cache_key})  # Cache for 1 hour
+def calculate_analysis(dataset, start_date, end_date, metric):
+    """Calculate one analysis for a date range, with caching per (dataset, date range, metric)."""
+    start_time = time.time()
+    result = compute_analysis(metric, prepare_analysis_data(dataset, start_date, end_date), start_date, end_date)
+    print(f"Calculated {metric} in {time.time() - start_time:.2f} seconds")
+    return result
+
+@st.cache_data(ttl=3600, show_spinner=False)  # Cache for 1 hour
+def load_stored_analysis(results_manifest, start_date, end_date, metric):
+    """Read one analysis of a date range from the results store, with caching (None if not stored)."""
+    return read_stored_analysis(results_manifest, start_date, end_date, metric)
+
+class LazyAnalyses:
+    """
+    Analyses of a date range, looked up by name like a dict.
     
-    # Clean up memory
-    del filtered_df
-    gc.collect()
+    Each analysis is only read from the results store, or calculated (or read
+    from the cache), when it is first used, so a view only pays for the
+    results it displays.
+    """
     
-    print(f"Analysis calculations completed in {time.time() - start_time:.2f} seconds")
-    
-    return {
-        'attendance_table': attendance_table,
-        'tue_thu_attendance': tue_thu_attendance,
-        'daily_counts': daily_counts,
-        'weekly_counts': weekly_counts,
-        'period_summary': period_summary,
-        'employee_summary': employee_summary,
-        'division_tue_thu': division_tue_thu,
-        'division_by_location': division_by_location
-    }
+    def __init__(self, dataset, start_date=None, end_date=None, results_manifest=None):
+        self.dataset = dataset
+        self.start_date = start_date
+        self.end_date = end_date
+        self.results_manifest = results_manifest
+    
+    def __getitem__(self, metric):
+        if self.results_manifest is not None:
+            result = load_stored_analysis(self.results_manifest, self.start_date, self.end_date, metric)
+            if result is not None:
+                return result
+        return calculate_analysis(self.dataset, self.start_date, self.end_date, metric)
+    
+    def __contains__(self, metric):
+        return metric in ANALYSIS_METRICS
 
 def save_processed_data(attendance_table, daily_attendance_pct, avg_arrival_hours):
     """Save processed data to CSV files."""
@@ -254,22 +298,17 @@ def main():
     
     st.sidebar.header("Data Range Selection")
     
-    # Get the most recent date in the data
-    key_card_df = pd.read_csv("data/raw/key_card_access.csv")
-    most_recent_date = pd.to_datetime(key_card_df['Date/time'], dayfirst=True).max()
-    del key_card_df  # Clean up memory
+    # Get the most recent date in the data from the metadata manifest
+    manifest = load_dataset_manifest(str(KEY_CARD_DATA_PATH))
+    if manifest is None or manifest['max_timestamp'] is None:
+        st.error("Key card data not found or contains no valid timestamps")
+        return
+    most_recent_date = manifest['max_timestamp']
     
+    date_ranges = standard_date_ranges(most_recent_date)
     data_range_option = st.sidebar.radio(
         "Select data range to analyze:",
-        [
-            "Year to Date",
-            "Last 30 Days",
-            "Last 3 Months",
-            "Last 6 Months",
-            "2023 Full Year",
-            "2024 Full Year",
-            "Custom Date Range"
-        ]
+        list(date_ranges) + ["Custom Date Range"]
     )
     
     # Set date parameters based on selection
@@ -278,35 +317,9 @@ def main():
             f"Data shown is for the one-year period ending {most_recent_date.strftime('%d %B %Y')}, "
             "which is the most recent data available."
         )
-        start_date = (most_recent_date - pd.Timedelta(days=365)).strftime("%Y-%m-%d")
-        end_date = most_recent_date.strftime("%Y-%m-%d")
-        last_n_days = None
-        
-    elif data_range_option == "Last 30 Days":
-        start_date = None
-        end_date = None
-        last_n_days = 30
-        
-    elif data_range_option == "Last 3 Months":
-        start_date = (most_recent_date - pd.Timedelta(days=90)).strftime("%Y-%m-%d")
-        end_date = most_recent_date.strftime("%Y-%m-%d")
-        last_n_days = None
-        
-    elif data_range_option == "Last 6 Months":
-        start_date = (most_recent_date - pd.Timedelta(days=180)).strftime("%Y-%m-%d")
-        end_date = most_recent_date.strftime("%Y-%m-%d")
-        last_n_days = None
-        
-    elif data_range_option == "2023 Full Year":
-        start_date = "2023-01-01"
-        end_date = "2023-12-31"
-        last_n_days = None
-        
-    elif data_range_option == "2024 Full Year":
-        start_date = "2024-01-01"
-        end_date = "2024-12-31"
-        last_n_days = None
-        
+    
+    if data_range_option in date_ranges:
+        start_date, end_date = date_ranges[data_range_option]
     else:  # Custom Date Range
         default_start = most_recent_date - pd.Timedelta(days=30)
         date_range = st.sidebar.date_input(
@@ -321,39 +334,31 @@ def main():
         else:
             st.error("Please select both start and end dates")
             return
-        last_n_days = None
 
     data_load_state = st.text("Loading data... This may take a moment.")
     
     try:
-        key_card_df, employee_df, history_df = load_data(start_date, end_date, last_n_days)
-        data_load_state.text("Processing data...")
-        combined_df = process_data(key_card_df, employee_df, history_df)
+        # Cached by the raw file fingerprints, so a rerun never hashes the data
+        version = data_version(source_paths())
+        base_dataset = load_base_dataset(version)
         
-        del key_card_df
-        del employee_df
-        del history_df
-        gc.collect()
+        # Precomputed analyses of the standard date ranges, if main.py stored them for this data version
+        results_manifest = load_results_manifest(version)
         
-        data_load_state.text("Calculating analytics...")
-        analyses = calculate_analyses(combined_df, start_date, end_date)
+        # Every date range is a slice of the time-sorted base dataset
+        dataset = base_dataset.filter_dates(start_date, end_date)
+        
+        # Analyses are read from the results store, or calculated, when a view first uses them
+        analyses = LazyAnalyses(dataset, start_date, end_date, results_manifest)
         data_load_state.empty()
         
-        min_date = combined_df['date_only'].min()
-        max_date = combined_df['date_only'].max()
-        st.success(f"Loaded {len(combined_df):,} records from {min_date.strftime('%d %b %Y')} to {max_date.strftime('%d %b %Y')}")
+        min_date, max_date = dataset.date_range()
+        st.success(f"Loaded {len(dataset):,} records from {min_date.strftime('%d %b %Y')} to {max_date.strftime('%d %b %Y')}")
         
-        # Create tabs and display data (keep existing tab code, but use analyses dict)
-        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
-            "Daily Overview", 
-            "Weekly Overview", 
-            "Division Attendance",
-            "Individual Employee Attendance",
-            "Employee Details",
-            "Daily Attendance Lookup"  # New tab for checking attendance by date
-        ])
+        # Only the selected view is rendered, so only the analyses it displays are calculated
+        selected_view = st.radio("View", DASHBOARD_VIEWS, horizontal=True, label_visibility="collapsed")
         
-        with tab1:
+        if selected_view == "Daily Overview":
             st.subheader("Daily Attendance Percentage (Tuesday-Thursday)")
             if len(analyses['tue_thu_attendance']) > 0:
                 fig_daily_pct = px.line(
@@ -504,7 +509,7 @@ def main():
             styled_df = styled_df[column_order]
             st.dataframe(styled_df, hide_index=True)
         
-        with tab2:
+        if selected_view == "Weekly Overview":
             st.subheader("Weekly Attendance Percentage (Tuesday-Thursday only)")
             if len(analyses['weekly_counts']) > 0:
                 fig_weekly_pct = px.line(
@@ -612,7 +617,7 @@ def main():
             styled_weekly = styled_weekly[weekly_column_order]
             st.dataframe(styled_weekly, hide_index=True)
         
-        with tab3:
+        if selected_view == "Division Attendance":
             st.subheader("Division Attendance Analysis")
             
             # Division attendance percentage chart (only Tuesdays, Wednesdays, Thursdays)
@@ -746,33 +751,24 @@ def main():
                 
                 st.dataframe(styled_div_location, hide_index=True)
         
-        with tab4:
+        if selected_view == "Individual Employee Attendance":
             st.subheader("Individual Employee Attendance")
             
-            # Filter employee summary for selected date range only if both dates are provided
-            if start_date and end_date:
-                date_filtered_df = combined_df[
-                    (combined_df['date_only'] >= pd.to_datetime(start_date)) &
-                    (combined_df['date_only'] <= pd.to_datetime(end_date))
-                ]
-            else:
-                date_filtered_df = combined_df  # Use all data if no date range
-            
             # Get employee summary with friendly column headers
             filtered_employee_summary = analyses['employee_summary']
             
             # Display the table (no additional renaming needed as it's done in create_employee_summary)
             st.dataframe(filtered_employee_summary, hide_index=True)
         
-        with tab5:
+        if selected_view == "Employee Details":
             st.subheader("Employee Details")
             
             # Get the cleaned employee data
             # Load the employee data directly
-            employee_df = load_employee_info("data/raw/employee_info.csv")
+            employee_df = load_employee_info(str(EMPLOYEE_INFO_PATH))
             
             # Get the maximum date from the combined data for proper date handling
-            max_data_date = combined_df['date_only'].max() if 'date_only' in combined_df.columns else None
+            max_data_date = dataset.date_range()[1]
             
             # Clean the employee data with the max date
             employee_df = clean_employee_info(employee_df, max_data_date)
@@ -844,13 +840,12 @@ def main():
                 mime="text/csv"
             )
         
-        with tab6:  # Daily Attendance Lookup tab
+        if selected_view == "Daily Attendance Lookup":
             st.subheader("London Hybrid Full-Time Employee Daily Attendance")
             st.write("Select a date to view attendance data for London-based Hybrid Full-Time employees on that day.")
             
             # Get min and max dates from the data
-            min_date = combined_df['date_only'].min()
-            max_date = combined_df['date_only'].max()
+            min_date, max_date = dataset.date_range()
             
             # Date selector
             selected_date = st.date_input(
@@ -871,35 +866,9 @@ def main():
                 # Run attendance lookup
                 with st.spinner(f"Analyzing attendance data for {date_formatted}..."):
                     try:
-                        from data_analysis import get_daily_employee_attendance
-                        
-                        # Create a deep copy to ensure we don't modify the original 
-                        debug_df = combined_df.copy(deep=True)
-                        
-                        # Ensure ALL columns have proper types for safe comparison
-                        if 'employee_id' in debug_df.columns:
-                            # Ensure employee_id is numeric - explicitly use float64 dtype
-                            debug_df['employee_id'] = pd.to_numeric(debug_df['employee_id'], errors='coerce').astype('float64')
-                        
-                        # Handle string columns consistently
-                        for col in ['Location', 'Working Status', 'Division', 'Department']:
-                            if col in debug_df.columns:
-                                debug_df[col] = debug_df[col].astype(str)
-                        
-                        # Handle date columns consistently
-                        for col in ['date_only', 'Combined hire date', 'Most recent day worked']:
-                            if col in debug_df.columns:
-                                debug_df[col] = pd.to_datetime(debug_df[col], errors='coerce')
-                        
-                        # Explicitly convert date_info to pandas Timestamp
-                        date_info = pd.to_datetime(date_info)
-                        
-                        # Add debugging output
-                        print(f"Data types before get_daily_employee_attendance:")
-                        print(debug_df.dtypes)
-                        print(f"Selected date: {date_info}, type: {type(date_info)}")
-                        
-                        daily_attendance = get_daily_employee_attendance(debug_df, date_info)
+                        # Index the swipes by date once per dataset; a lookup is then a slice of one day
+                        daily_lookup = build_daily_lookup(dataset)
+                        daily_attendance = daily_lookup.lookup(pd.to_datetime(date_info))
                         
                         if daily_attendance.empty:
                             st.warning(f"No London-based Hybrid Full-Time employees found for {date_formatted}.")
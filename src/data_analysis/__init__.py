@@ -7,6 +7,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 # Now import the modules
 from .attendance_table import build_attendance_table
+from .presence_matrix import PresenceMatrix, build_presence_matrix
+from .daily_aggregate import build_daily_aggregate
+from .daily_lookup import DailyAttendanceIndex, build_daily_attendance_index
 from .attendance_counts import (
     calculate_visit_counts,
     calculate_average_arrival_hour,
@@ -1,4 +1,10 @@
 import pandas as pd
+import sys
+import os
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.config import ATTENDANCE_OUTLIER_THRESHOLD
 
 def calculate_visit_counts(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -73,8 +79,8 @@ def calculate_mean_arrival_time(times_series: pd.Series) -> tuple[str, list]:
     # Calculate median
     median_minutes = minutes.median()
     
-    # Define outlier threshold (2 hours = 120 minutes)
-    threshold = 120
+    # Outlier threshold from config (ATTENDANCE_OUTLIER_THRESHOLD, 2 hours)
+    threshold = ATTENDANCE_OUTLIER_THRESHOLD
     
     # Identify and exclude outliers
     is_outlier = abs(minutes - median_minutes) > threshold
@@ -89,4 +95,55 @@ def calculate_mean_arrival_time(times_series: pd.Series) -> tuple[str, list]:
     mean_hours = mean_minutes // 60
     mean_mins = mean_minutes % 60
     
-    return f"{int(mean_hours):02d}:{int(mean_mins):02d}", list(excluded_times)
\ No newline at end of file
+    return f"{int(mean_hours):02d}:{int(mean_mins):02d}", list(excluded_times)
+
+def calculate_first_arrival_minutes(df: pd.DataFrame, time_column: str = 'parsed_time',
+                                    mask: pd.Series = None) -> pd.Series:
+    """
+    Get the minute of day (hour * 60 + minute) of every employee's first swipe of each day.
+    
+    Args:
+        df: DataFrame with employee_id, date_only and a timestamp column
+        time_column: Timestamp column to take the first swipe from
+        mask: Optional boolean mask of the rows to consider
+        
+    Returns:
+        Series indexed by (employee_id, date_only); days without a valid timestamp are dropped
+    """
+    rows = df if mask is None else df[mask.to_numpy(dtype=bool)]
+    first_swipes = rows.groupby(['employee_id', 'date_only'])[time_column].min().dropna()
+    return first_swipes.dt.hour * 60 + first_swipes.dt.minute
+
+def calculate_arrival_time_statistics(minutes: pd.Series) -> pd.DataFrame:
+    """
+    Calculate arrival time statistics for all employees at once.
+    
+    The outlier-excluded mean drops arrivals more than
+    ATTENDANCE_OUTLIER_THRESHOLD minutes from the employee's median, as
+    calculate_mean_arrival_time does.
+    
+    Args:
+        minutes: Arrival minutes of day indexed by (employee_id, date_only),
+            e.g. from calculate_first_arrival_minutes
+            
+    Returns:
+        DataFrame indexed by employee_id with mean, median and mean_no_outliers
+        columns (in minutes; NaN where there are no arrivals left)
+    """
+    by_employee = minutes.groupby(level=0)
+    median = by_employee.transform('median')
+    clean = minutes[(minutes - median).abs() <= ATTENDANCE_OUTLIER_THRESHOLD]
+    
+    statistics = pd.DataFrame({
+        'mean': by_employee.mean(),
+        'median': by_employee.median()
+    })
+    statistics['mean_no_outliers'] = clean.groupby(level=0).mean()
+    return statistics
+
+def format_minutes_as_time(minutes) -> str:
+    """Format a (fractional) number of minutes since midnight as "HH:MM", or None if missing."""
+    if pd.isna(minutes):
+        return None
+    minutes = round(minutes)
+    return f"{int(minutes // 60):02d}:{int(minutes % 60):02d}"
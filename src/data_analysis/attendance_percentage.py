@@ -5,17 +5,12 @@ import os
 
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from src.data_analysis.common import (
-    get_employment_date_mask, 
-    get_london_hybrid_ft_mask, 
-    calculate_eligible_employees,
-    calculate_present_employees,
-    calculate_attendance_percentage
-)
+from src.data_analysis.common import get_core_days_mask, calculate_attendance_percentage
+from src.data_analysis.daily_aggregate import build_daily_aggregate
 
 logger = logging.getLogger("attendance_dashboard.data_analysis.attendance_percentage")
 
-def calculate_daily_attendance_percentage(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_daily_attendance_percentage(df: pd.DataFrame, daily_aggregate: pd.DataFrame = None) -> pd.DataFrame:
     """
     Calculate the daily attendance percentage for London, Hybrid, Full-Time employees.
     Only counts employees who:
@@ -24,7 +19,14 @@ def calculate_daily_attendance_percentage(df: pd.DataFrame) -> pd.DataFrame:
     - Are full-time employees on that date
     - Were employed on that date (after hire date, before resignation)
     
-    Uses common utility functions to ensure consistent calculations across the application.
+    Counts are read from the daily aggregate table, so they match the other reports.
+    
+    Args:
+        df: DataFrame with attendance and employee data
+        daily_aggregate: Optional table from build_daily_aggregate(df), to share between reports
+        
+    Returns:
+        DataFrame with one row per date with data
     """
     # Validate input
     if df is None or df.empty:
@@ -38,223 +40,94 @@ def calculate_daily_attendance_percentage(df: pd.DataFrame) -> pd.DataFrame:
         logger.error(f"Missing required columns for daily attendance percentage: {missing_columns}")
         return pd.DataFrame()
     
-    # Get full employee DataFrame if available for more accurate counts
-    full_employee_df = df.attrs['full_employee_info'] if hasattr(df, 'attrs') and 'full_employee_info' in df.attrs else None
-    
-    # Get all unique dates and sort them
-    logger.debug(f"Calculating daily attendance percentage for {df['date_only'].nunique()} unique dates")
-    all_dates = sorted(df['date_only'].unique())
-    
-    # Initialize results
-    daily_attendance = []
-    
-    for date in all_dates:
-        try:
-            # Calculate eligible employees using common utility function
-            eligible_employees = calculate_eligible_employees(df, date, full_employee_df)
-            
-            # Calculate present employees using common utility function
-            present_employees = calculate_present_employees(df, date, lhft_only=True)
-            
-            # Calculate percentage using common utility function
-            percentage = calculate_attendance_percentage(present_employees, eligible_employees)
-            
-            daily_attendance.append({
-                'date': date,
-                'total_eligible': eligible_employees,
-                'total_present': present_employees,
-                'percentage': round(percentage, 1)
-            })
-        except Exception as e:
-            logger.error(f"Error calculating attendance for date {date}: {e}")
-            # Skip this date but continue processing others
+    if daily_aggregate is None:
+        daily_aggregate = build_daily_aggregate(df)
+    daily = daily_aggregate[daily_aggregate['has_data']]
+    logger.debug(f"Calculating daily attendance percentage for {len(daily)} unique dates")
+    if daily.empty:
+        return pd.DataFrame()
     
-    return pd.DataFrame(daily_attendance)
+    return pd.DataFrame({
+        'date': daily['date'].to_numpy(),
+        'total_eligible': daily['london_hybrid_ft_eligible'].to_numpy(),
+        'total_present': daily['london_hybrid_ft_present'].to_numpy(),
+        'percentage': [
+            round(calculate_attendance_percentage(present, eligible), 1)
+            for present, eligible in zip(daily['london_hybrid_ft_present'].tolist(),
+                                         daily['london_hybrid_ft_eligible'].tolist())
+        ]
+    })
 
-def calculate_weekly_attendance_percentage(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_weekly_attendance_percentage(df: pd.DataFrame, daily_aggregate: pd.DataFrame = None) -> pd.DataFrame:
     """
     Calculate weekly attendance percentage, considering Tuesday-Thursday.
     Uses the attendance table (one row per employee per day).
-    FIXED: Now uses the same calculation logic as daily attendance for consistent results.
-    """
-    # Ensure we're working with datetime
-    df = df.copy()
-    df['date_only'] = pd.to_datetime(df['date_only'])
     
-    # Filter for office days (Tuesday-Thursday) and calculate week start
-    office_days = df[df['day_of_week'].isin(['Tuesday', 'Wednesday', 'Thursday'])]
-    office_days['week_commencing'] = office_days['date_only'] - pd.to_timedelta(
-        office_days['date_only'].dt.dayofweek, unit='d')
+    Every week with core-day data is averaged over all of its core days, as a
+    rollup of the daily aggregate table (the same counts as the daily calculation).
     
-    # Check if we have full employee info available for consistent calculations
-    has_full_employee_info = hasattr(df, 'attrs') and 'full_employee_info' in df.attrs
-    
-    result = []
-    for week in sorted(office_days['week_commencing'].unique()):
-        week_end = week + pd.Timedelta(days=6)
-        
-        # Get daily attendance and eligible counts for Tue-Thu
-        daily_eligible = []
-        daily_attendance = []
-        
-        for date in pd.date_range(week, week_end):
-            if date.strftime('%A') in ['Tuesday', 'Wednesday', 'Thursday']:
-                # Consider employment dates - exactly like daily calculation
-                active_mask = (
-                    (pd.to_datetime(df['Combined hire date']) <= date) &
-                    (
-                        (df['Most recent day worked'].isna()) |
-                        (pd.to_datetime(df['Most recent day worked']) >= date)
-                    )
-                )
-                
-                # London, Hybrid, Full-Time mask
-                london_hybrid_ft_mask = (
-                    (df['Location'] == 'London UK') & 
-                    (df['Working Status'] == 'Hybrid') &
-                    (df['is_full_time'] == True)
-                )
-                
-                # Get daily eligible count using the same method as daily calculation
-                if has_full_employee_info:
-                    # Get full employee info DataFrame 
-                    full_emp_df = df.attrs['full_employee_info']
-                    
-                    # Apply employment date filter to full dataset
-                    active_mask_full = (
-                        (pd.to_datetime(full_emp_df['Combined hire date']) <= date) &
-                        ((full_emp_df['Most recent day worked'].isna()) | 
-                         (pd.to_datetime(full_emp_df['Most recent day worked']) >= date))
-                    )
-                    
-                    # Apply London, Hybrid, Full-Time filter to full dataset
-                    london_hybrid_ft_mask_full = (
-                        (full_emp_df['Location'] == 'London UK') & 
-                        (full_emp_df['Working Status'] == 'Hybrid') &
-                        (full_emp_df['is_full_time'] == True)
-                    )
-                    
-                    # Count eligible employees from full employee pool
-                    eligible_count = full_emp_df[
-                        active_mask_full & london_hybrid_ft_mask_full
-                    ]['employee_id'].nunique()
-                else:
-                    # Count eligible from current data
-                    eligible_count = df[
-                        active_mask & london_hybrid_ft_mask
-                    ]['employee_id'].nunique()
-                
-                # Count attendance for this day
-                date_mask = (df['date_only'] == date)
-                attendance_count = df[
-                    date_mask &
-                    active_mask & 
-                    london_hybrid_ft_mask &
-                    (df['is_present'] == True)
-                ]['employee_id'].nunique()
-                
-                daily_eligible.append(eligible_count)
-                daily_attendance.append(attendance_count)
+    Args:
+        df: DataFrame with attendance and employee data
+        daily_aggregate: Optional table from build_daily_aggregate(df), to share between reports
         
-        if not daily_eligible:
-            continue
-            
-        # Calculate average eligible and average attendance
-        avg_eligible = sum(daily_eligible) / len(daily_eligible) if daily_eligible else 0
-        avg_attendance = sum(daily_attendance) / len(daily_attendance) if daily_attendance else 0
-        total_attendance = sum(daily_attendance)
-        total_possible = sum(daily_eligible)
-        
-        # Calculate attendance percentage
-        attendance_percentage = (avg_attendance / avg_eligible * 100) if avg_eligible > 0 else 0
-        
-        result.append({
-            'week_commencing': week,
-            'avg_attendance': round(avg_attendance, 1),
-            'avg_eligible': round(avg_eligible, 1),
-            'total_attendance': total_attendance,
-            'total_possible_days': total_possible,
-            'attendance_percentage': round(attendance_percentage, 1)
-        })
-    
-    return pd.DataFrame(result).sort_values('week_commencing')
+    Returns:
+        DataFrame with weekly attendance averages, totals and percentages
+    """
+    if daily_aggregate is None:
+        daily_aggregate = build_daily_aggregate(df)
+    
+    # Core days of every week that has core-day data
+    core_days = daily_aggregate[daily_aggregate['is_core_day']]
+    weeks_with_data = core_days.loc[core_days['has_data'], 'week_start'].unique()
+    core_days = core_days[core_days['week_start'].isin(weeks_with_data)]
+    
+    weekly = core_days.groupby('week_start', sort=True).agg(
+        avg_attendance=('london_hybrid_ft_present', 'mean'),
+        avg_eligible=('london_hybrid_ft_eligible', 'mean'),
+        total_attendance=('london_hybrid_ft_present', 'sum'),
+        total_possible_days=('london_hybrid_ft_eligible', 'sum')
+    )
+    avg_attendance = weekly['avg_attendance'].tolist()
+    avg_eligible = weekly['avg_eligible'].tolist()
+    
+    return pd.DataFrame({
+        'week_commencing': weekly.index.to_numpy(),
+        'avg_attendance': [round(value, 1) for value in avg_attendance],
+        'avg_eligible': [round(value, 1) for value in avg_eligible],
+        'total_attendance': weekly['total_attendance'].to_numpy(),
+        'total_possible_days': weekly['total_possible_days'].to_numpy(),
+        'attendance_percentage': [
+            round((attendance / eligible * 100) if eligible > 0 else 0, 1)
+            for attendance, eligible in zip(avg_attendance, avg_eligible)
+        ]
+    })
 
-def calculate_tue_thu_attendance_percentage(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate daily attendance percentage, excluding Mon/Fri."""
-    df = df.copy()
-    
-    # Filter for Tue-Thu
-    tue_thu_mask = df['day_of_week'].isin(['Tuesday', 'Wednesday', 'Thursday'])
-    df = df[tue_thu_mask]
-    
-    # Get all unique dates and sort them
-    all_dates = sorted(df['date_only'].unique())
-    
-    # Check if we have full employee info available for consistent calculations
-    has_full_employee_info = hasattr(df, 'attrs') and 'full_employee_info' in df.attrs
+def calculate_tue_thu_attendance_percentage(df: pd.DataFrame, daily_aggregate: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Calculate daily attendance percentage, excluding Mon/Fri.
     
-    daily_attendance = []
-    for date in all_dates:
-        # Step 1: Calculate present employees (only counts who actually were present)
-        active_mask = (
-            (pd.to_datetime(df['Combined hire date']) <= date) &
-            (
-                (df['Most recent day worked'].isna()) |
-                (pd.to_datetime(df['Most recent day worked']) >= date)
-            )
-        )
-        
-        # Filter for London, Hybrid, Full-Time employees
-        location_mask = (df['Location'] == 'London UK')
-        working_mask = (df['Working Status'] == 'Hybrid')
-        full_time_mask = (df['is_full_time'] == True)
+    Args:
+        df: DataFrame with attendance and employee data
+        daily_aggregate: Optional table from build_daily_aggregate(df), to share between reports
         
-        # Combined mask for London, Hybrid, Full-Time
-        london_hybrid_ft_mask = location_mask & working_mask & full_time_mask
-        
-        # Count employees present on this date
-        present_employees = df[
-            (df['date_only'] == date) &
-            active_mask & 
-            london_hybrid_ft_mask &
-            (df['is_present'] == True)
-        ]['employee_id'].nunique()
-        
-        # Step 2: Get eligible employee count from full employee pool if available
-        if has_full_employee_info:
-            # Get full employee info DataFrame
-            full_emp_df = df.attrs['full_employee_info']
-            
-            # Apply employment date filter
-            active_mask_full = (
-                (pd.to_datetime(full_emp_df['Combined hire date']) <= date) &
-                ((full_emp_df['Most recent day worked'].isna()) | 
-                 (pd.to_datetime(full_emp_df['Most recent day worked']) >= date))
-            )
-            
-            # Apply London, Hybrid, Full-Time filter
-            london_hybrid_ft_mask_full = (
-                (full_emp_df['Location'] == 'London UK') & 
-                (full_emp_df['Working Status'] == 'Hybrid') &
-                (full_emp_df['is_full_time'] == True)
-            )
-            
-            # Count eligible employees from full employee pool
-            eligible_employees = full_emp_df[
-                active_mask_full & london_hybrid_ft_mask_full
-            ]['employee_id'].nunique()
-        else:
-            # Calculate from current data if full employee info not available
-            eligible_employees = df[active_mask & london_hybrid_ft_mask]['employee_id'].nunique()
-        
-        # Calculate percentage
-        percentage = (present_employees / eligible_employees * 100) if eligible_employees > 0 else 0
-        
-        daily_attendance.append({
-            'date': date,
-            'total_eligible': eligible_employees,
-            'total_present': present_employees,
-            'percentage': round(percentage, 1)
-        })
+    Returns:
+        DataFrame with one row per core day with data
+    """
+    if daily_aggregate is None:
+        # Without full employee info, eligibility comes from the core-day rows only
+        daily_aggregate = build_daily_aggregate(df[get_core_days_mask(df)])
+    core_days = daily_aggregate[daily_aggregate['is_core_day'] & daily_aggregate['has_data']]
+    if core_days.empty:
+        return pd.DataFrame()
     
-    return pd.DataFrame(daily_attendance)
\ No newline at end of file
+    present = core_days['london_hybrid_ft_present'].tolist()
+    eligible = core_days['london_hybrid_ft_eligible'].tolist()
+    return pd.DataFrame({
+        'date': core_days['date'].to_numpy(),
+        'total_eligible': core_days['london_hybrid_ft_eligible'].to_numpy(),
+        'total_present': core_days['london_hybrid_ft_present'].to_numpy(),
+        'percentage': [
+            round((day_present / day_eligible * 100) if day_eligible > 0 else 0, 1)
+            for day_present, day_eligible in zip(present, eligible)
+        ]
+    })
@@ -6,7 +6,8 @@ import os
 
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from src.utils import validate_columns, handle_empty_dataframe
+from src.utils import validate_columns, handle_empty_dataframe, parse_key_card_datetime
+from src.data_analysis.presence_matrix import build_presence_matrix
 
 logger = logging.getLogger("attendance_dashboard.attendance_table")
 
@@ -16,8 +17,8 @@ def build_attendance_table(df: pd.DataFrame) -> pd.DataFrame:
     
     This function creates a comprehensive attendance table by:
     1. Ensuring required time columns exist
-    2. Creating a cross-product of all employees and dates
-    3. Marking employee presence for each date
+    2. Building an employee x date presence matrix of visit counts
+    3. Expanding it to one row per employee per date
     4. Calculating attendance metrics
     
     Args:
@@ -43,7 +44,7 @@ def build_attendance_table(df: pd.DataFrame) -> pd.DataFrame:
     try:
         if 'parsed_time' not in df.columns:
             if 'Date/time' in df.columns:
-                df['parsed_time'] = pd.to_datetime(df['Date/time'], dayfirst=True, errors='coerce')
+                df['parsed_time'] = parse_key_card_datetime(df['Date/time'])
                 logger.info("Added missing parsed_time column from Date/time")
             elif 'Date_Parsed' in df.columns:
                 df['parsed_time'] = pd.to_datetime(df['Date_Parsed'], errors='coerce')
@@ -78,95 +79,27 @@ def build_attendance_table(df: pd.DataFrame) -> pd.DataFrame:
         logger.error(f"Error applying filters: {str(e)}")
         # Continue without filtering if there's an error
     
-    # OPTIMIZATION: Vectorized approach for building employee-date combinations
     try:
-        # Extract unique employees and dates
-        unique_employees = df[["employee_id", "Last name, First name"]].drop_duplicates()
-        unique_dates = pd.DataFrame({'date_only': df["date_only"].unique()})
-        
-        # Create cross-product using merge
-        logger.info(f"Creating cross-product of {len(unique_employees):,} employees and {len(unique_dates):,} dates")
-        employee_index = np.arange(len(unique_employees))
-        date_index = np.arange(len(unique_dates))
-        
-        # Create meshgrid of indices
-        employee_idx, date_idx = np.meshgrid(employee_index, date_index)
-        
-        # Create cross-product DataFrame
-        cross_df = pd.DataFrame({
-            'employee_idx': employee_idx.flatten(),
-            'date_idx': date_idx.flatten()
-        })
-        
-        # Map indices to actual values
-        cross_df = cross_df.merge(
-            unique_employees.reset_index(drop=True),
-            left_on='employee_idx',
-            right_index=True
-        )
-        
-        cross_df = cross_df.merge(
-            unique_dates.reset_index(drop=True),
-            left_on='date_idx',
-            right_index=True
-        )
-        
-        # Drop temporary index columns
-        cross_df = cross_df.drop(['employee_idx', 'date_idx'], axis=1)
-        
-        # Rename for compatibility
-        cross_df = cross_df.rename(columns={"Last name, First name": "employee_name"})
-        
-        logger.info(f"Created cross-product with {len(cross_df):,} rows")
-    except Exception as e:
-        logger.error(f"Error creating employee-date cross product: {str(e)}")
-        
-        # Fallback to previous implementation if vectorized approach fails
-        logger.warning("Falling back to iterative cross-product construction")
-        employee_dates = []
-        for _, employee in unique_employees.iterrows():
-            for date in df["date_only"].unique():
-                employee_dates.append({
-                    "employee_id": employee["employee_id"],
-                    "employee_name": employee["Last name, First name"],
-                    "date_only": date
-                })
-        
-        cross_df = pd.DataFrame(employee_dates)
-    
-    try:
-        # Mark presence by checking if there's data for each employee-date
-        attendance = (
-            df.groupby(["employee_id", "date_only"])
-            .size()
-            .reset_index(name="visits")
-        )
-        
-        # Merge attendance data with cross-product
-        merged = cross_df.merge(
-            attendance,
-            on=["employee_id", "date_only"],
-            how="left"
-        )
+        # Presence is computed on an employee x date matrix and only expanded
+        # to one row per employee per date here, for the legacy long format
+        matrix = build_presence_matrix(df)
+        merged = matrix.to_long(date_order=df["date_only"].unique())
+        logger.info(f"Expanded presence matrix to {len(merged):,} employee-date rows")
         
         # Fill missing values and create required columns
-        merged["visits"] = merged["visits"].fillna(0)
         merged["is_present"] = merged["visits"] > 0
-        merged["present"] = merged["visits"].map({0: "No"}).fillna("Yes")  # For backward compatibility
+        merged["present"] = np.where(merged["is_present"], "Yes", "No")  # For backward compatibility
         
-        # Calculate days attended per employee
+        # Days attended per employee (row popcount of the matrix, summed over rows sharing an ID)
         days_attended = (
-            merged[merged["is_present"] == True]
-            .groupby("employee_id")
-            .size()
-            .reset_index(name="days_attended")
+            pd.Series(matrix.days_present(), index=matrix.employee_ids)
+            .groupby(level=0).sum()
         )
-        
-        # Merge attendance metrics back to the main table
-        final_df = merged.merge(days_attended, on="employee_id", how="left")
+        days_attended = days_attended[days_attended > 0]
+        merged["days_attended"] = merged["employee_id"].map(days_attended)
         
         # Sort by employee name and date
-        final_df = final_df.sort_values(["employee_name", "date_only"])
+        final_df = merged.sort_values(["employee_name", "date_only"])
         
         logger.info(f"Completed attendance table with {len(final_df):,} rows")
         logger.debug(f"Present days: {merged['is_present'].sum():,} of {len(merged):,} total employee-days")
@@ -174,4 +107,4 @@ def build_attendance_table(df: pd.DataFrame) -> pd.DataFrame:
         return final_df
     except Exception as e:
         logger.error(f"Error creating final attendance table: {str(e)}")
-        return pd.DataFrame()
\ No newline at end of file
+        return pd.DataFrame()
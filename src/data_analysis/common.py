@@ -11,6 +11,7 @@ import os
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 from src.config import LONDON_LOCATION, HYBRID_WORKING_STATUS, CORE_WEEKDAYS, CORE_WEEKDAY_INDICES
+from src.utils import WEEKDAY_NAMES, day_numbers_to_dates
 
 logger = logging.getLogger("attendance_dashboard.data_analysis.common")
 
@@ -63,25 +64,198 @@ def get_core_days_mask(df: pd.DataFrame) -> pd.Series:
     """
     Create a mask for core days (Tuesday-Thursday).
     
+    Uses the is_core_day column added by clean_key_card_data when present,
+    falling back to the weekday number, day name or date.
+    
     Args:
         df: DataFrame with date information
         
     Returns:
         Boolean mask for core days
     """
-    if 'day_of_week' in df.columns:
+    if 'is_core_day' in df.columns:
+        return df['is_core_day'].astype(bool)
+    elif 'weekday' in df.columns:
+        return df['weekday'].isin(CORE_WEEKDAY_INDICES)
+    elif 'day_of_week' in df.columns:
         return df['day_of_week'].isin(CORE_WEEKDAYS)
     elif 'date_only' in df.columns:
-        return df['date_only'].dt.dayofweek.isin(CORE_WEEKDAY_INDICES)
+        return pd.to_datetime(df['date_only']).dt.dayofweek.isin(CORE_WEEKDAY_INDICES)
     else:
         logger.warning("No date column found for core days filtering")
         return pd.Series(False, index=df.index)
 
+def get_weekday(df: pd.DataFrame) -> pd.Series:
+    """
+    Get the weekday number (0=Monday) of each row.
+    
+    Args:
+        df: DataFrame with a 'weekday', 'day_of_week' or 'date_only' column
+        
+    Returns:
+        Series of weekday numbers
+    """
+    if 'weekday' in df.columns:
+        return df['weekday']
+    elif 'day_of_week' in df.columns:
+        return df['day_of_week'].map({name: i for i, name in enumerate(WEEKDAY_NAMES)})
+    return pd.to_datetime(df['date_only']).dt.dayofweek
+
+def get_week_start(df: pd.DataFrame) -> pd.Series:
+    """
+    Get the Monday of the week containing each row's date.
+    
+    Computed from the integer day_number and weekday columns when present,
+    otherwise from date_only.
+    
+    Args:
+        df: DataFrame with 'day_number' and 'weekday' columns, or 'date_only'
+        
+    Returns:
+        Series of week start dates (datetime64[ns])
+    """
+    if 'day_number' in df.columns and 'weekday' in df.columns:
+        weekdays = df['weekday'].to_numpy(np.int64)
+        days = np.where(weekdays >= 0, df['day_number'].to_numpy(np.int64) - weekdays, 0)
+        return pd.Series(day_numbers_to_dates(days), index=df.index).where(weekdays >= 0)
+    dates = pd.to_datetime(df['date_only'])
+    return dates - pd.to_timedelta(dates.dt.dayofweek, unit='d')
+
+class HeadcountTimeline:
+    """
+    Number of employed employees per cohort over time.
+    
+    Built once from hire (+1) and leave (-1) events: the events are summed per
+    distinct event time into a difference array and accumulated, so the
+    headcount at any time is a single searchsorted lookup.
+    
+    Attributes:
+        times: Sorted int64 nanosecond timestamps at which a headcount changes
+        counts: (len(times) x len(cohorts)) headcount from each time onwards
+        cohorts: Index of cohort labels
+    """
+
+    def __init__(self, times: np.ndarray, counts: np.ndarray, cohorts: pd.Index):
+        self.times = times
+        self.counts = counts
+        self.cohorts = cohorts
+
+    def count(self, dates, cohort=None):
+        """
+        Look up the headcount on one date or an array of dates.
+        
+        Args:
+            dates: A date, or array-like of dates
+            cohort: Cohort to count (default: all cohorts summed)
+            
+        Returns:
+            The headcount as an int for a single date, otherwise an int64 array
+        """
+        scalar = np.ndim(dates) == 0
+        query = pd.to_datetime(pd.Series([dates] if scalar else list(dates), dtype=object))
+        if cohort is None:
+            counts = self.counts.sum(axis=1)
+        elif cohort in self.cohorts:
+            counts = self.counts[:, self.cohorts.get_loc(cohort)]
+        else:
+            counts = np.zeros(len(self.times), dtype=np.int64)
+
+        # Headcount after every event at or before each date; nothing is employed on a missing date
+        positions = np.searchsorted(self.times, query.to_numpy().astype(np.int64), side='right') - 1
+        valid = (positions >= 0) & query.notna().to_numpy()
+        result = np.where(valid, np.append(counts, 0)[np.where(valid, positions, -1)], 0)
+        return int(result[0]) if scalar else result
+
+    def counts_by_cohort(self, dates) -> pd.DataFrame:
+        """Return the headcount of every cohort (columns) on each date (rows)."""
+        return pd.DataFrame({cohort: self.count(dates, cohort) for cohort in self.cohorts},
+                            index=pd.Index(dates), columns=self.cohorts)
+
+def build_headcount_timeline(df: pd.DataFrame, mask: pd.Series = None,
+                             cohort_column: str = None) -> HeadcountTimeline:
+    """
+    Build a headcount timeline from rows with hire and leave dates.
+    
+    An employee counts from their 'Combined hire date' through their 'Most
+    recent day worked' (open-ended when missing), as in
+    get_employment_date_mask. Each employee_id counts once per cohort on a
+    date, however many of its rows qualify, matching nunique over the masked
+    rows. Rows without an employee_id, hire date or cohort are not counted.
+    
+    Args:
+        df: DataFrame with employee_id, 'Combined hire date' and 'Most recent day worked'
+        mask: Boolean mask of rows to count (default: London, Hybrid, Full-Time)
+        cohort_column: Optional column to count separately per value (e.g. 'Division')
+        
+    Returns:
+        HeadcountTimeline
+    """
+    if mask is None:
+        mask = get_london_hybrid_ft_mask(df)
+    rows = df[mask.to_numpy(dtype=bool)]
+    cohort_values = rows[cohort_column] if cohort_column is not None else pd.Series(0, index=rows.index)
+    start = pd.to_datetime(rows['Combined hire date'])
+    end = pd.to_datetime(rows['Most recent day worked'])
+    keep = (rows['employee_id'].notna() & start.notna() & cohort_values.notna()
+            & (end.isna() | (end >= start))).to_numpy()
+
+    cohort_codes, cohorts = pd.factorize(cohort_values[keep], sort=True)
+    employee_codes = pd.factorize(rows['employee_id'][keep])[0]
+    start = start[keep].to_numpy().astype(np.int64)
+    end = end[keep].to_numpy()
+    open_ended = np.isnat(end)
+
+    # +1 at the hire time, -1 just after the leave time (none for current employees)
+    groups = cohort_codes.astype(np.int64) * (employee_codes.max(initial=0) + 1) + employee_codes
+    events = pd.DataFrame({
+        'group': np.concatenate([groups, groups[~open_ended]]),
+        'time': np.concatenate([start, end[~open_ended].astype(np.int64) + 1]),
+        'delta': np.concatenate([np.ones(len(start), dtype=np.int64),
+                                 -np.ones(int((~open_ended).sum()), dtype=np.int64)])
+    })
+    events = events.groupby(['group', 'time'], sort=True)['delta'].sum().reset_index()
+
+    # Overlapping rows of one employee: only count entering/leaving the union of their intervals
+    running = events.groupby('group')['delta'].cumsum().to_numpy()
+    previous = np.where(events['group'].duplicated().to_numpy(), np.roll(running, 1), 0)
+    changes = (running > 0).astype(np.int64) - (previous > 0)
+    events['cohort'] = events['group'].to_numpy() // (employee_codes.max(initial=0) + 1)
+    events = events[changes != 0].assign(delta=changes[changes != 0])
+
+    # Difference array over the distinct event times, accumulated per cohort
+    times, time_codes = np.unique(events['time'].to_numpy(), return_inverse=True)
+    deltas = np.zeros((len(times), len(cohorts)), dtype=np.int64)
+    np.add.at(deltas, (time_codes, events['cohort'].to_numpy()), events['delta'].to_numpy())
+    return HeadcountTimeline(times, np.cumsum(deltas, axis=0), pd.Index(cohorts))
+
+def get_headcount_timeline(df: pd.DataFrame, full_employee_df: pd.DataFrame = None,
+                           cohort_column: str = None) -> HeadcountTimeline:
+    """
+    Build the eligible (London, Hybrid, Full-Time) headcount timeline.
+    
+    Uses the full employee DataFrame when provided, otherwise the given data,
+    as calculate_eligible_employees does.
+    
+    Args:
+        df: DataFrame with attendance and employee data
+        full_employee_df: Optional full employee DataFrame for more accurate counts
+        cohort_column: Optional column to count separately per value (e.g. 'Division')
+        
+    Returns:
+        HeadcountTimeline
+    """
+    if full_employee_df is not None and not full_employee_df.empty:
+        df = full_employee_df
+    return build_headcount_timeline(df, get_london_hybrid_ft_mask(df), cohort_column)
+
 def calculate_eligible_employees(df: pd.DataFrame, date: pd.Timestamp, 
                                full_employee_df: pd.DataFrame = None) -> int:
     """
     Calculate the number of eligible employees (London, Hybrid, Full-Time) for the given date.
     
+    To count many dates, build the timeline once with get_headcount_timeline
+    and look the dates up in it.
+    
     Args:
         df: DataFrame with attendance and employee data
         date: The date to check eligibility for
@@ -90,19 +264,7 @@ def calculate_eligible_employees(df: pd.DataFrame, date: pd.Timestamp,
     Returns:
         Number of eligible employees
     """
-    # If full employee data is provided, use it for more accurate counts
-    if full_employee_df is not None and not full_employee_df.empty:
-        # Create employment mask for the full employee dataset
-        active_mask = get_employment_date_mask(full_employee_df, date)
-        # Create London/Hybrid/FT mask for the full employee dataset
-        lhft_mask = get_london_hybrid_ft_mask(full_employee_df)
-        # Count eligible employees
-        return full_employee_df[active_mask & lhft_mask]['employee_id'].nunique()
-    
-    # Otherwise, calculate from the filtered dataset
-    active_mask = get_employment_date_mask(df, date)
-    lhft_mask = get_london_hybrid_ft_mask(df)
-    return df[active_mask & lhft_mask]['employee_id'].nunique()
+    return get_headcount_timeline(df, full_employee_df).count(date)
 
 def calculate_present_employees(df: pd.DataFrame, date: pd.Timestamp, 
                               lhft_only: bool = True) -> int:
@@ -0,0 +1,88 @@
+"""
+Daily attendance aggregate shared by the reports.
+
+One row per calendar date with the number of distinct employees present per
+cohort (London, Hybrid, Full-Time and everyone else) and the eligible London,
+Hybrid, Full-Time headcount. The row-level data is scanned once to build it;
+the daily, weekly, core-day and period reports are then rollups over at most
+a few hundred rows instead of passes over the whole frame for every date.
+"""
+import pandas as pd
+import numpy as np
+import logging
+import sys
+import os
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.config import CORE_WEEKDAY_INDICES
+from src.data_analysis.common import (
+    get_employment_date_mask,
+    get_london_hybrid_ft_mask,
+    get_headcount_timeline
+)
+
+logger = logging.getLogger("attendance_dashboard.data_analysis.daily_aggregate")
+
+DAILY_AGGREGATE_COLUMNS = [
+    'date', 'weekday', 'week_start', 'is_core_day', 'has_data',
+    'london_hybrid_ft_present', 'other_present', 'london_hybrid_ft_eligible'
+]
+
+def build_daily_aggregate(df: pd.DataFrame, full_employee_df: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Build the daily aggregate table from attendance data.
+
+    The table covers every calendar date from the Monday of the first date's
+    week to the Sunday of the last date's week, so weekly rollups see all
+    core days of each week. Employees are counted as present on a date when
+    they have a present row for it and were employed on it; has_data marks
+    the dates that have any rows in df.
+
+    Args:
+        df: DataFrame with date_only, employee_id, is_present, employment date
+            and London/Hybrid/Full-Time columns
+        full_employee_df: Optional full employee DataFrame for the eligible
+            headcount (default: df.attrs['full_employee_info'] if present)
+
+    Returns:
+        DataFrame with one row per date and the DAILY_AGGREGATE_COLUMNS
+    """
+    dates = pd.to_datetime(df['date_only'])
+    if dates.isna().all():
+        return pd.DataFrame(columns=DAILY_AGGREGATE_COLUMNS)
+    if full_employee_df is None:
+        full_employee_df = df.attrs.get('full_employee_info')
+
+    first, last = dates.min(), dates.max()
+    calendar = pd.date_range(first - pd.Timedelta(days=first.dayofweek),
+                             last + pd.Timedelta(days=6 - last.dayofweek))
+
+    # Distinct present employees per (date, cohort), employment checked on each row's own date
+    counted = (get_employment_date_mask(df, dates) & (df['is_present'] == True)).to_numpy()
+    lhft_mask = get_london_hybrid_ft_mask(df).to_numpy()
+    present_counts = (
+        pd.DataFrame({
+            'date': dates[counted],
+            'is_lhft': lhft_mask[counted],
+            'employee_id': df['employee_id'][counted]
+        })
+        .groupby(['date', 'is_lhft'])['employee_id'].nunique()
+        .unstack(fill_value=0)
+        .reindex(index=calendar, columns=[True, False], fill_value=0)
+        .astype(np.int64)
+    )
+
+    weekdays = calendar.dayofweek
+    aggregate = pd.DataFrame({
+        'date': calendar,
+        'weekday': weekdays,
+        'week_start': calendar - pd.to_timedelta(weekdays, unit='d'),
+        'is_core_day': weekdays.isin(CORE_WEEKDAY_INDICES),
+        'has_data': calendar.isin(dates.dropna().unique()),
+        'london_hybrid_ft_present': present_counts[True].to_numpy(),
+        'other_present': present_counts[False].to_numpy(),
+        'london_hybrid_ft_eligible': get_headcount_timeline(df, full_employee_df).count(calendar)
+    })
+    logger.debug(f"Built daily aggregate for {len(aggregate)} dates ({int(aggregate['has_data'].sum())} with data)")
+    return aggregate
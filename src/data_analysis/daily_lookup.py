@@ -0,0 +1,173 @@
+"""
+Per-date index for the daily attendance lookup.
+
+Looking up one day used to copy the whole frame, filter it by date and then
+filter the day's rows once per eligible employee. The index is built once per
+dataset instead: the swipes sorted by (day, employee, time) with the row
+range of every day, each day's first swipe per employee, and a small roster
+of the London, Hybrid, Full-Time employee records. A lookup is a slice of the
+first swipes and a left join against the employees eligible on that day.
+"""
+import pandas as pd
+import numpy as np
+import logging
+
+logger = logging.getLogger("attendance_dashboard.data_analysis.daily_lookup")
+
+ROSTER_COLUMNS = ['employee_id', 'Last name, First name', 'Working Status', 'Location', 'Division', 'Department']
+
+_NANOSECONDS_PER_DAY = 86_400 * 1_000_000_000
+
+def _to_day_numbers(dates) -> np.ndarray:
+    """Convert datetime64[ns] values to day numbers (days since 1970-01-01)."""
+    return np.floor_divide(np.asarray(dates, dtype='datetime64[ns]').astype(np.int64), _NANOSECONDS_PER_DAY)
+
+class DailyAttendanceIndex:
+    """
+    Date-partitioned swipes and eligible-employee roster.
+
+    Attributes:
+        swipes: Swipes with a date, sorted by day, employee_id and parsed_time,
+            with employee_id, date_only and parsed_time columns
+        days: Sorted day numbers that have swipes
+        offsets: Rows offsets[i]:offsets[i + 1] of swipes are on days[i]
+        first_swipe_ids: employee_id of each employee's first swipe per day, day by day
+        first_swipe_times: parsed_time of those swipes (NaT if unknown)
+        first_swipe_offsets: first_swipe_* entries first_swipe_offsets[i]:first_swipe_offsets[i + 1]
+            are on days[i]
+        roster: Distinct London, Hybrid, Full-Time employee records in first-seen
+            order, with the ROSTER_COLUMNS and the employment dates
+    """
+
+    def __init__(self, swipes: pd.DataFrame, roster: pd.DataFrame):
+        self.swipes = swipes
+        self.roster = roster
+
+        day_numbers = _to_day_numbers(swipes['date_only'])
+        self.days, starts = np.unique(day_numbers, return_index=True)
+        self.offsets = np.append(starts, len(swipes))
+
+        # Rows are time-sorted within each (day, employee), so the first row of each pair is the first swipe
+        first = swipes[['employee_id']].assign(day=day_numbers).drop_duplicates(['day', 'employee_id'])
+        self.first_swipe_ids = first['employee_id'].to_numpy()
+        self.first_swipe_times = swipes['parsed_time'].to_numpy()[first.index.to_numpy()]
+        self.first_swipe_offsets = np.append(np.searchsorted(first['day'].to_numpy(), self.days), len(first))
+
+    def _day_position(self, date) -> int:
+        """Return the position of a date in days, or -1 if it has no swipes."""
+        day = _to_day_numbers([pd.Timestamp(date)])[0]
+        position = np.searchsorted(self.days, day)
+        return int(position) if position < len(self.days) and self.days[position] == day else -1
+
+    def day_swipes(self, date) -> pd.DataFrame:
+        """Return the (time-sorted) swipes on a date, as a slice of the index."""
+        position = self._day_position(date)
+        if position < 0:
+            return self.swipes.iloc[0:0]
+        return self.swipes.iloc[self.offsets[position]:self.offsets[position + 1]]
+
+    def eligible_roster(self, date) -> pd.DataFrame:
+        """Return the first roster record of each employee who was employed on a date."""
+        date = pd.Timestamp(date)
+        employed = (
+            (self.roster['Combined hire date'] <= date) &
+            (self.roster['Most recent day worked'].isna() | (self.roster['Most recent day worked'] >= date))
+        )
+        return self.roster[employed].drop_duplicates('employee_id')
+
+    def lookup(self, date) -> pd.DataFrame:
+        """
+        Get attendance and arrival times of the eligible employees on a date.
+
+        Args:
+            date: The date to look up
+
+        Returns:
+            DataFrame with one row per eligible employee, present employees first
+        """
+        eligible = self.eligible_roster(date)
+        if eligible.empty:
+            return pd.DataFrame()
+
+        position = self._day_position(date)
+        if position < 0:
+            start = stop = 0
+        else:
+            start, stop = self.first_swipe_offsets[position], self.first_swipe_offsets[position + 1]
+        arrivals = pd.Series(self.first_swipe_times[start:stop], index=self.first_swipe_ids[start:stop])
+
+        # Left join of the roster against the day's first swipes
+        rows = arrivals.index.get_indexer(eligible['employee_id'].to_numpy())
+        attended = rows >= 0
+        first_times = np.full(len(rows), np.datetime64('NaT'), dtype='datetime64[ns]')
+        first_times[attended] = arrivals.to_numpy()[rows[attended]]
+        arrival_times = pd.Series(first_times).dt.strftime('%H:%M').fillna('Unknown').to_numpy()
+
+        result_df = pd.DataFrame({
+            'employee_id': eligible['employee_id'].to_numpy(),
+            'Employee Name': eligible['Last name, First name'].to_numpy(),
+            'Working Status': eligible['Working Status'].to_numpy(),
+            'Location': eligible['Location'].to_numpy(),
+            'Division': eligible['Division'].to_numpy(),
+            'Department': eligible['Department'].to_numpy(),
+            'Attended': np.where(attended, 'Yes', 'No'),
+            'Arrival Time': np.where(attended, arrival_times, 'N/A')
+        })
+
+        # Sort by attendance status (Yes first), then by Employee Name
+        return result_df.sort_values(['Attended', 'Employee Name'], ascending=[False, True])
+
+    def memory_usage(self) -> int:
+        """Return the memory used by the index, in bytes."""
+        return int(self.swipes.memory_usage(deep=True).sum() + self.roster.memory_usage(deep=True).sum() +
+                   self.first_swipe_ids.nbytes + self.first_swipe_times.nbytes)
+
+def build_daily_attendance_index(df: pd.DataFrame) -> DailyAttendanceIndex:
+    """
+    Build the daily attendance index from swipe-level data.
+
+    Employee IDs are compared as numbers (IDs that are not numeric never
+    match). An employee is attended on a date when they have any swipe on it,
+    and their arrival time is their earliest known swipe time that day. The
+    roster keeps every distinct London, Hybrid, Full-Time record, so the
+    eligible employees of a date are those of the frame's rows.
+
+    Args:
+        df: DataFrame with employee_id, date_only, parsed_time, employment date,
+            London/Hybrid/Full-Time and ROSTER_COLUMNS columns
+
+    Returns:
+        DailyAttendanceIndex
+    """
+    employee_ids = pd.to_numeric(df['employee_id'], errors='coerce').astype('float64')
+    dates = pd.to_datetime(df['date_only'])
+
+    swipes = pd.DataFrame({
+        'employee_id': employee_ids.to_numpy(),
+        'date_only': dates.to_numpy(),
+        'parsed_time': pd.to_datetime(df['parsed_time']).to_numpy()
+    })
+    swipes = (swipes[swipes['employee_id'].notna() & swipes['date_only'].notna()]
+              .sort_values(['date_only', 'employee_id', 'parsed_time'], kind='mergesort', na_position='last')
+              .reset_index(drop=True))
+
+    # London, Hybrid, Full-Time records (the employment dates decide eligibility per date)
+    lhft_mask = (
+        (df['Location'].astype(str) == 'London UK') &
+        (df['Working Status'].astype(str) == 'Hybrid')
+    )
+    if 'is_full_time' in df.columns:
+        lhft_mask = lhft_mask & (df['is_full_time'] == True)
+    else:
+        # If is_full_time column doesn't exist, assume all employees are full-time
+        print("Warning: is_full_time column not found. Assuming all employees are full-time.")
+    roster = df.loc[lhft_mask, ROSTER_COLUMNS[1:]].copy()
+    roster.insert(0, 'employee_id', employee_ids[lhft_mask].to_numpy())
+    roster['Combined hire date'] = pd.to_datetime(df.loc[lhft_mask, 'Combined hire date'], errors='coerce').to_numpy()
+    roster['Most recent day worked'] = pd.to_datetime(df.loc[lhft_mask, 'Most recent day worked'], errors='coerce').to_numpy()
+    roster = roster.drop_duplicates().reset_index(drop=True)
+
+    index = DailyAttendanceIndex(swipes, roster)
+    logger.info(f"Built daily attendance index for {len(index.days):,} days and {len(roster):,} roster records "
+                f"({index.memory_usage() / 1024**2:.1f} MB)")
+    return index
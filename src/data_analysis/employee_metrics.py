@@ -1,16 +1,73 @@
 import pandas as pd
+import numpy as np
 import logging
-from .attendance_counts import calculate_mean_arrival_time
+import sys
+import os
+from .attendance_counts import (
+    calculate_first_arrival_minutes,
+    calculate_arrival_time_statistics,
+    format_minutes_as_time
+)
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.utils import parse_key_card_datetime
+from src.config import CORE_WEEKDAY_INDICES
+from src.data_analysis.common import get_core_days_mask
+from src.data_analysis.daily_lookup import build_daily_attendance_index
 
 # Set up logging
 logger = logging.getLogger("attendance_dashboard.employee_metrics")
 
+def _core_day_prefix_counts(calendar: pd.DatetimeIndex) -> np.ndarray:
+    """Return the number of core days among the first i dates of the calendar, for i = 0..len(calendar)."""
+    is_core = calendar.dayofweek.isin(CORE_WEEKDAY_INDICES)
+    return np.concatenate([[0], np.cumsum(is_core, dtype=np.int64)])
+
+def _count_core_days(calendar: pd.DatetimeIndex, first_dates: pd.Series, last_dates: pd.Series) -> np.ndarray:
+    """
+    Count the core days of the calendar between two dates (both inclusive) per employee.
+    
+    Uses prefix sums over the calendar, so each count is two binary searches.
+    Employees with a missing first or last date get zero.
+    
+    Args:
+        calendar: Sorted DatetimeIndex of dates
+        first_dates: First date of each employee's period
+        last_dates: Last date of each employee's period
+        
+    Returns:
+        int64 array of core day counts
+    """
+    prefix = _core_day_prefix_counts(calendar)
+    first_dates = pd.to_datetime(first_dates).to_numpy()
+    last_dates = pd.to_datetime(last_dates).to_numpy()
+    start = calendar.searchsorted(first_dates, side='left')
+    stop = calendar.searchsorted(last_dates, side='right')
+    counts = np.maximum(prefix[stop] - prefix[np.minimum(start, stop)], 0)
+    return np.where(np.isnat(first_dates) | np.isnat(last_dates), 0, counts)
+
+def _count_per_employee(df: pd.DataFrame, mask: pd.Series, employee_ids: pd.Series) -> np.ndarray:
+    """Count the distinct dates of the masked rows per employee, aligned with employee_ids."""
+    counts = df[mask.to_numpy(dtype=bool)].groupby('employee_id')['date_only'].nunique()
+    return counts.reindex(employee_ids.to_numpy(), fill_value=0).to_numpy()
+
 def calculate_individual_attendance(df: pd.DataFrame) -> pd.DataFrame:
-    """Calculate individual employee attendance metrics."""
-    result = []
+    """
+    Calculate individual employee attendance metrics.
+    
+    All employees are processed at once: attendance counts with groupby on
+    (employee, day), possible core days with calendar prefix sums and average
+    entry times from the first swipe of each core day.
     
+    Args:
+        df: Combined dataframe with employee, Status and attendance data
+        
+    Returns:
+        DataFrame with days attended, core days percentage and average entry time per employee
+    """
     # Ensure Date/time is properly parsed
-    df['Date/time'] = pd.to_datetime(df['Date/time'], dayfirst=True)
+    df['Date/time'] = parse_key_card_datetime(df['Date/time'])
     df['date_only'] = pd.to_datetime(df['date_only'])
     
     # Only print essential dataset summary
@@ -22,99 +79,66 @@ def calculate_individual_attendance(df: pd.DataFrame) -> pd.DataFrame:
     data_start_date = df['date_only'].min()
     data_end_date = df['date_only'].max()
     
-    # Get unique employees
-    unique_employees = df['employee_id'].unique()
-    
-    for emp_id in unique_employees:
-        emp_data = df[df['employee_id'] == emp_id].copy()
-        
-        # Get employee info
-        first_record = emp_data.iloc[0]
-        emp_name = first_record['Last name, First name']
-        hire_date = pd.to_datetime(first_record['Combined hire date'])
-        last_day = pd.to_datetime(first_record['Most recent day worked'])
-        location = first_record['Location']
-        working_status = first_record['Working Status']
-        status = first_record['Status']
-        is_full_time = first_record['is_full_time'] if 'is_full_time' in first_record else False
-        
-        # If last_day is NaT (for active employees), use the end of our data range
-        if pd.isna(last_day) and status == 'Active':
-            last_day = data_end_date
-        
-        # Total days attended (any day)
-        days_attended = emp_data[emp_data['is_present'] == True]['date_only'].nunique()
-        
-        # Initialize core days metrics
-        core_days_percentage = None
-        avg_entry_time = None
-        
-        # Only calculate core metrics for London, Hybrid, Full-Time employees
-        if location == 'London UK' and working_status == 'Hybrid' and is_full_time:
-            # Get all core days (Tue-Thu) during employment AND within our data range
-            start_date = max(hire_date, data_start_date)
-            end_date = min(last_day, data_end_date)
-            
-            all_dates = pd.date_range(start=start_date, end=end_date)
-            core_weekdays = all_dates[all_dates.dayofweek.isin([1, 2, 3])]  # Tue=1, Wed=2, Thu=3
-            total_possible_core_days = len(core_weekdays)
-            
-            # Filter for attended core days
-            core_attendance = emp_data[
-                (emp_data['is_present'] == True) & 
-                (emp_data['date_only'].dt.dayofweek.isin([1, 2, 3]))
-            ]
-            
-            # Skip printing core attendance sample to reduce terminal output
-            
-            # Count unique core days attended
-            core_days_attended = core_attendance['date_only'].nunique()
-            
-            # Calculate percentage
-            if total_possible_core_days > 0:
-                core_days_percentage = round((core_days_attended / total_possible_core_days) * 100, 1)
-            
-            # Calculate average first entry time for core days
-            if not core_attendance.empty:
-                # Sort by date/time and get actual first entry of each day
-                daily_first_entries = (
-                    core_attendance
-                    .sort_values('Date/time', ascending=True)
-                    .groupby('date_only')['Date/time']
-                    .first()
-                )
-                
-                # Flag late entries (after 11:00) but don't print them
-                late_entries = daily_first_entries[daily_first_entries.dt.hour >= 11]
-                
-                # Extract just the time component
-                daily_times = daily_first_entries.dt.time
-                
-                # Convert times to minutes since midnight
-                minutes = pd.Series([
-                    t.hour * 60 + t.minute 
-                    for t in daily_times
-                ])
-                
-                # Calculate average and convert back to time string
-                avg_minutes = round(minutes.mean())
-                hours = avg_minutes // 60
-                mins = avg_minutes % 60
-                avg_entry_time = f"{int(hours):02d}:{int(mins):02d}"
-        
-        result.append({
-            'employee_name': emp_name,
-            'days_attended': days_attended,
-            'core_days_percentage': core_days_percentage,
-            'avg_entry_time': avg_entry_time
-        })
-    
-    return pd.DataFrame(result)
+    # Employee info comes from each employee's first record
+    employees = df.drop_duplicates('employee_id')
+    employees = employees[employees['employee_id'].notna()]
+    if employees.empty:
+        return pd.DataFrame()
+    employee_ids = employees['employee_id']
+    
+    hire_dates = pd.to_datetime(employees['Combined hire date'])
+    last_days = pd.to_datetime(employees['Most recent day worked'])
+    
+    # If last_day is NaT (for active employees), use the end of our data range
+    last_days = last_days.mask(last_days.isna() & (employees['Status'] == 'Active'), data_end_date)
+    
+    # Core metrics are only calculated for London, Hybrid, Full-Time employees
+    is_full_time = employees['is_full_time'].map(bool) if 'is_full_time' in employees.columns else False
+    is_london_hybrid_ft = (
+        (employees['Location'] == 'London UK') &
+        (employees['Working Status'] == 'Hybrid') &
+        is_full_time
+    ).to_numpy()
+    
+    # Total days attended (any day) and core days attended
+    present_mask = (df['is_present'] == True)
+    core_mask = present_mask & df['date_only'].dt.dayofweek.isin(CORE_WEEKDAY_INDICES)
+    days_attended = _count_per_employee(df, present_mask, employee_ids)
+    core_days_attended = _count_per_employee(df, core_mask, employee_ids)
+    
+    # All core days during employment AND within our data range
+    calendar = pd.date_range(start=data_start_date, end=data_end_date)
+    total_possible_core_days = _count_core_days(calendar, hire_dates, last_days)
+    
+    # Average first entry time over core days attended
+    entry_minutes = calculate_first_arrival_minutes(df, 'Date/time', core_mask)
+    avg_entry_minutes = entry_minutes.groupby(level=0).mean().reindex(employee_ids.to_numpy())
+    
+    core_days_percentage = [
+        round((attended / possible) * 100, 1) if is_lhft and possible > 0 else None
+        for is_lhft, attended, possible in zip(is_london_hybrid_ft, core_days_attended.tolist(),
+                                               total_possible_core_days.tolist())
+    ]
+    avg_entry_time = [
+        format_minutes_as_time(minutes) if is_lhft else None
+        for is_lhft, minutes in zip(is_london_hybrid_ft, avg_entry_minutes.tolist())
+    ]
+    
+    return pd.DataFrame({
+        'employee_name': employees['Last name, First name'].to_numpy(),
+        'days_attended': days_attended,
+        'core_days_percentage': core_days_percentage,
+        'avg_entry_time': avg_entry_time
+    })
 
 def create_employee_summary(df: pd.DataFrame) -> pd.DataFrame:
     """
     Create employee summary table with attendance metrics.
     
+    Metrics for all employees are computed at once: attendance counts with
+    groupby on (employee, day), potential office days with calendar prefix
+    sums and arrival statistics from each day's first swipe minute.
+    
     Args:
         df: Combined dataframe with employee and attendance data
         
@@ -132,141 +156,74 @@ def create_employee_summary(df: pd.DataFrame) -> pd.DataFrame:
         end=df['date_only'].max()
     )
     
-    # Initialize results list
-    results = []
+    # One row per employee with the employee's latest record (is_full_time can change between
+    # swipes), in newest-first order, as the first records of a newest-first export
+    if 'parsed_time' in df.columns:
+        employees = df.sort_values('parsed_time', ascending=False, kind='mergesort').drop_duplicates('employee_id')
+    else:
+        employees = df.drop_duplicates('employee_id')
+    employees = employees[employees['employee_id'].notna()]
+    if employees.empty:
+        return pd.DataFrame()
+    employee_ids = employees['employee_id']
+    
+    # Check if employee is London, Hybrid, Full-Time
+    is_london_hybrid_ft = (
+        (employees['Location'] == 'London UK') &
+        (employees['Working Status'] == 'Hybrid') &
+        (employees['is_full_time'] == True)
+    ).to_numpy()
+    
+    # Get attended days, in total and on Tue-Thu
+    present_mask = (df['is_present'] == True)
+    attended_days = _count_per_employee(df, present_mask, employee_ids)
+    attended_tue_thu = _count_per_employee(df, present_mask & get_core_days_mask(df), employee_ids)
+    
+    # Count potential Tue-Thu during employment (last_day NaT means still employed)
+    last_days = employees['Most recent day worked'].fillna(date_range[-1])
+    employed_tue_thu = _count_core_days(date_range, employees['Combined hire date'], last_days)
+    
+    # Calculate attendance rate only for London, Hybrid, Full-Time employees
+    attendance_rate = [
+        round(attended / employed * 100, 1) if is_lhft and employed > 0 else None
+        for is_lhft, attended, employed in zip(is_london_hybrid_ft, attended_tue_thu.tolist(),
+                                               employed_tue_thu.tolist())
+    ]
+    
+    # Arrival time metrics for ALL employees with at least one entry, from the first entry of each day
+    arrival_minutes = calculate_first_arrival_minutes(df, 'parsed_time', present_mask)
+    arrival_statistics = calculate_arrival_time_statistics(arrival_minutes).reindex(employee_ids.to_numpy())
+    
+    summary = {
+        'employee_id': employee_ids.to_numpy(),
+        'name': employees['Last name, First name'].to_numpy(),
+        'is_london_hybrid_ft': is_london_hybrid_ft,
+        'total_days_attended': attended_days,
+        'tue_thu_days_attended': attended_tue_thu,
+        'potential_tue_thu_days': employed_tue_thu,
+        'mean_arrival_time': [format_minutes_as_time(m) for m in arrival_statistics['mean'].tolist()],
+        'mean_arrival_no_outliers': [format_minutes_as_time(m) for m in arrival_statistics['mean_no_outliers'].tolist()],
+        'median_arrival_time': [format_minutes_as_time(m) for m in arrival_statistics['median'].tolist()],
+        'attendance_rate': attendance_rate
+    }
     
-    # Get unique employees with relevant columns
-    employee_columns = ['employee_id', 'Last name, First name']
-    # Add extra columns if they exist in the dataframe
+    # Working Status, Location and Division columns are only added if some employee has a value,
+    # ordered as if the summary were built one employee at a time
+    info_columns = {}
+    first_known = {}
     for col in ['Working Status', 'Location', 'Division']:
-        if col in df.columns:
-            employee_columns.append(col)
-    
-    unique_employees = df.drop_duplicates('employee_id')[employee_columns]
-    
-    for _, emp in unique_employees.iterrows():
-        emp_id = emp['employee_id']
-        emp_name = emp['Last name, First name']
-        
-        # Get employee's data
-        emp_data = df[df['employee_id'] == emp_id].copy()
-        if emp_data.empty:
-            continue
-            
-        # Get first record for this employee
-        first_record = emp_data.iloc[0]
-        
-        # Get employment dates
-        hire_date = pd.to_datetime(first_record['Combined hire date'])
-        last_day = pd.to_datetime(first_record['Most recent day worked'])
-        
-        # Check if employee is London, Hybrid, Full-Time
-        is_london_hybrid_ft = (
-            first_record['Location'] == 'London UK' and
-            first_record['Working Status'] == 'Hybrid' and
-            first_record['is_full_time'] == True
-        )
-        
-        # If last_day is NaT (active employee), use the end of our data range
-        if pd.isna(last_day):
-            last_day = date_range[-1]
-            
-        # Filter for days when employee was employed
-        employed_dates = date_range[
-            (date_range >= hire_date) & 
-            (date_range <= last_day)
-        ]
-        
-        # Get attended days
-        attended_days = emp_data[
-            (emp_data['is_present'] == True)
-        ]['date_only'].nunique()
-        
-        # Initialize Tue-Thu metrics
-        attended_tue_thu = 0
-        employed_tue_thu = 0
-        mean_entry_str = None
-        median_entry_str = None
-        
-        # Calculate Tue-Thu metrics for all employees
-        tue_thu_mask = emp_data['day_of_week'].isin(['Tuesday', 'Wednesday', 'Thursday'])
-        attended_tue_thu = emp_data[
-            (emp_data['is_present'] == True) & 
-            tue_thu_mask
-        ]['date_only'].nunique()
-        
-        # Count potential Tue-Thu during employment
-        employed_tue_thu = len(employed_dates[employed_dates.dayofweek.isin([1, 2, 3])])
-        
-        # Calculate attendance rate only for London, Hybrid, Full-Time employees
-        attendance_rate = None
-        if is_london_hybrid_ft and employed_tue_thu > 0:
-            attendance_rate = round(attended_tue_thu / employed_tue_thu * 100, 1)
-        
-        # Calculate arrival time metrics for ALL employees who have at least one entry
-        # First, get all entries for this employee
-        all_entries = emp_data[emp_data['is_present'] == True]
-        
-        # Calculate metrics if we have any entries
-        mean_entry_str = None
-        mean_no_outliers_str = None
-        median_entry_str = None
-        
-        if not all_entries.empty:
-            # Get first entry of each day
-            daily_entries = all_entries.groupby('date_only')['parsed_time'].min()
-            
-            if not daily_entries.empty and not daily_entries.isna().all():
-                # Calculate median time (using all times)
-                minutes = pd.Series([
-                    t.hour * 60 + t.minute 
-                    for t in daily_entries if pd.notna(t)
-                ], index=[idx for idx, t in zip(daily_entries.index, daily_entries) if pd.notna(t)])
-                
-                if not minutes.empty:
-                    # Calculate true mean (including all values)
-                    mean_minutes = round(minutes.mean())
-                    mean_hours = mean_minutes // 60
-                    mean_mins = mean_minutes % 60
-                    mean_entry_str = f"{int(mean_hours):02d}:{int(mean_mins):02d}"
-                    
-                    # Calculate median
-                    median_minutes = round(minutes.median())
-                    median_hours = median_minutes // 60
-                    median_mins = median_minutes % 60
-                    median_entry_str = f"{int(median_hours):02d}:{int(median_mins):02d}"
-                    
-                    # Calculate mean excluding outliers and get list of excluded times
-                    mean_no_outliers_str, excluded_times = calculate_mean_arrival_time(daily_entries)
-                    
-                    # We'll skip printing the excluded arrival times to keep terminal output shorter
-        
-        # Create result dictionary with basic fields
-        result_dict = {
-            'employee_id': emp_id,
-            'name': emp_name,
-            'is_london_hybrid_ft': is_london_hybrid_ft,
-            'total_days_attended': attended_days,
-            'tue_thu_days_attended': attended_tue_thu,
-            'potential_tue_thu_days': employed_tue_thu,
-            'mean_arrival_time': mean_entry_str,  # All values included
-            'mean_arrival_no_outliers': mean_no_outliers_str,  # Outliers excluded
-            'median_arrival_time': median_entry_str,
-            'attendance_rate': attendance_rate
-        }
-        
-        # Add Working Status, Location, Division, and Full Time status if they exist
-        for col in ['Working Status', 'Location', 'Division']:
-            if col in emp and pd.notna(emp[col]):
-                result_dict[col.lower().replace(' ', '_')] = emp[col]
-                
-        # Add is_full_time status from the first record (already set in is_london_hybrid_ft check)
-        result_dict['is_full_time'] = first_record['is_full_time'] if 'is_full_time' in first_record else False
-        
-        results.append(result_dict)
+        if col in employees.columns and employees[col].notna().any():
+            key = col.lower().replace(' ', '_')
+            info_columns[key] = employees[col].where(employees[col].notna()).tolist()
+            first_known[key] = int(employees[col].notna().to_numpy().argmax())
+    for key in [key for key in info_columns if first_known[key] == 0]:
+        summary[key] = info_columns[key]
+    summary['is_full_time'] = employees['is_full_time'].tolist() if 'is_full_time' in employees.columns else False
+    for key in sorted([key for key in info_columns if first_known[key] > 0], key=first_known.get):
+        summary[key] = info_columns[key]
     
     # Convert to DataFrame and sort by London, Hybrid, Full-Time first, then attendance rate
-    result_df = pd.DataFrame(results)
+    result_df = pd.DataFrame(summary)
     
     # Sort by London, Hybrid, Full-Time and then by attendance rate
     result_df = result_df.sort_values(
@@ -311,6 +268,10 @@ def get_daily_employee_attendance(df: pd.DataFrame, selected_date: pd.Timestamp)
     """
     Get attendance data for all active London Hybrid Full-Time employees on a specific date.
     
+    Builds a DailyAttendanceIndex for the frame; to look up several dates,
+    build the index once with build_daily_attendance_index and call its
+    lookup method instead.
+    
     Args:
         df: Combined dataframe with employee and attendance data
         selected_date: The specific date to check attendance
@@ -318,132 +279,8 @@ def get_daily_employee_attendance(df: pd.DataFrame, selected_date: pd.Timestamp)
     Returns:
         DataFrame with London Hybrid Full-Time employee attendance and arrival times for the selected date
     """
-    # Ensure df is a copy to avoid modifying the original
-    df = df.copy()
-    
-    # Ensure employee_id is numeric for consistent comparisons
-    if 'employee_id' in df.columns:
-        df['employee_id'] = pd.to_numeric(df['employee_id'], errors='coerce')
     # Ensure selected_date is a pandas Timestamp
     if not isinstance(selected_date, pd.Timestamp):
         selected_date = pd.to_datetime(selected_date)
     
-    # Get all LONDON HYBRID FULL-TIME employees who were active on the selected date
-    # Active = hired before or on selected date, and either still active or left after selected date
-    # Ensure ALL datetime and ID comparisons are safe by explicit conversion
-    
-    # Make sure selected_date is properly formatted
-    if not isinstance(selected_date, pd.Timestamp):
-        selected_date = pd.to_datetime(selected_date)
-    
-    # Convert date columns to datetime to ensure safe comparisons
-    # Use .copy() to prevent SettingWithCopyWarning
-    hire_dates = pd.to_datetime(df['Combined hire date'], errors='coerce')
-    last_days = df['Most recent day worked'].copy()
-    # Convert non-NaT values to datetime
-    mask = ~last_days.isna()
-    last_days.loc[mask] = pd.to_datetime(last_days.loc[mask], errors='coerce')
-    
-    # Start with date comparisons - ensure all types match for comparison
-    active_london_hybrid_ft_mask = (
-        (hire_dates <= selected_date) &
-        (
-            last_days.isna() |
-            (last_days >= selected_date)
-        ) &
-        (df['Location'].astype(str) == 'London UK') &  # London employees
-        (df['Working Status'].astype(str) == 'Hybrid')  # Hybrid working status
-    )
-    
-    # Add is_full_time check only if the column exists
-    if 'is_full_time' in df.columns:
-        active_london_hybrid_ft_mask = active_london_hybrid_ft_mask & (df['is_full_time'] == True)
-    else:
-        # If is_full_time column doesn't exist, assume all employees are full-time
-        print("Warning: is_full_time column not found. Assuming all employees are full-time.")
-    
-    # Get unique active London Hybrid Full-Time employees
-    # Get a copy of the filtered data to avoid SettingWithCopyWarning
-    active_employees = df[active_london_hybrid_ft_mask].drop_duplicates('employee_id')[
-        ['employee_id', 'Last name, First name', 'Working Status', 'Location', 'Division', 'Department']
-    ].copy()
-    
-    # Ensure employee_id is numeric in active_employees using .loc accessor - explicitly convert to float64
-    active_employees.loc[:, 'employee_id'] = pd.to_numeric(active_employees['employee_id'], errors='coerce').astype('float64')
-    
-    # Filter data for the selected date - ensure date formats match exactly
-    # Convert date_only to the same datetime format as selected_date for safe comparison
-    date_only_dt = pd.to_datetime(df['date_only'])
-    date_mask = date_only_dt == selected_date
-    
-    # Create an explicit copy to avoid SettingWithCopyWarning
-    date_data = df[date_mask].copy()
-    
-    # Ensure employee_id is numeric in date_data too - use proper .loc accessor and explicitly convert to float64
-    date_data.loc[:, 'employee_id'] = pd.to_numeric(date_data['employee_id'], errors='coerce').astype('float64')
-    
-    # For each active London employee, check if they attended on the selected date
-    attendance_data = []
-    
-    # Handle case where no employees match the criteria
-    if active_employees.empty:
-        return pd.DataFrame()  # Return empty DataFrame
-        
-    for _, employee in active_employees.iterrows():
-        emp_id = employee['employee_id']
-        
-        # Double-check that we're comparing the same types
-        # Both should be float64 at this point, but let's be extra careful
-        try:
-            # Use an equality mask instead of direct DataFrame filtering
-            # This avoids any potential issues with index types
-            emp_id_mask = date_data['employee_id'].astype('float64') == float(emp_id)
-            emp_date_data = date_data[emp_id_mask]
-            attended = not emp_date_data.empty
-        except (ValueError, TypeError):
-            # Fallback if there's any issue with type conversion
-            logger.warning(f"Type conversion issue with employee_id: {emp_id}, type: {type(emp_id)}")
-            # Try string comparison as absolute last resort
-            emp_id_str = str(emp_id).strip()
-            date_id_str = date_data['employee_id'].astype(str).str.strip()
-            emp_date_data = date_data[date_id_str == emp_id_str]
-            attended = not emp_date_data.empty
-        
-        # Get arrival time if attended
-        arrival_time = None
-        if attended:
-            try:
-                # Get the earliest scan for this employee on this date
-                earliest_scan = emp_date_data.sort_values('parsed_time').iloc[0]
-                
-                # Check if parsed_time is valid before formatting
-                if pd.notna(earliest_scan['parsed_time']):
-                    arrival_time = earliest_scan['parsed_time'].strftime('%H:%M')
-                else:
-                    arrival_time = "Unknown"
-            except Exception as e:
-                # Fallback if there's any error getting the arrival time
-                arrival_time = "Error"
-        
-        # Create attendance record
-        attendance_record = {
-            'employee_id': emp_id,
-            'Employee Name': employee['Last name, First name'],
-            'Working Status': employee['Working Status'],
-            'Location': employee['Location'],
-            'Division': employee['Division'],
-            'Department': employee['Department'],
-            'Attended': 'Yes' if attended else 'No',
-            'Arrival Time': arrival_time if attended else 'N/A'
-        }
-        
-        attendance_data.append(attendance_record)
-    
-    # Convert to DataFrame
-    result_df = pd.DataFrame(attendance_data)
-    
-    # Sort by attendance status (Yes first), then by Employee Name
-    if not result_df.empty:
-        result_df = result_df.sort_values(['Attended', 'Employee Name'], ascending=[False, True])
-    
-    return result_df
\ No newline at end of file
+    return build_daily_attendance_index(df).lookup(selected_date)
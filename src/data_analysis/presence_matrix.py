@@ -0,0 +1,150 @@
+"""
+Employee x day presence matrix.
+
+Attendance is stored as a dense matrix with one row per employee and one
+column per date: the number of swipes (visits) as the smallest unsigned
+integer type that fits, and presence as packed bits (eight days per byte).
+Row, column and date-window counts of days present are popcounts over the
+packed bits; the one-row-per-employee-per-day long format is only built
+when asked for.
+"""
+import pandas as pd
+import numpy as np
+import logging
+
+logger = logging.getLogger("attendance_dashboard.presence_matrix")
+
+# Number of set bits in each byte value
+_POPCOUNT = np.array([bin(value).count('1') for value in range(256)], dtype=np.uint8)
+
+class PresenceMatrix:
+    """
+    Visit counts and presence bits for employees (rows) by dates (columns).
+
+    Attributes:
+        employee_ids: employee_id of each row
+        employee_names: Employee name of each row
+        dates: Sorted DatetimeIndex of the columns
+        visits: (employees x dates) matrix of swipe counts
+        bits: Presence packed along the date axis (bit j % 8 of byte j // 8 is date j)
+    """
+
+    def __init__(self, employee_ids: np.ndarray, employee_names: np.ndarray,
+                 dates: pd.DatetimeIndex, visits: np.ndarray):
+        self.employee_ids = employee_ids
+        self.employee_names = employee_names
+        self.dates = dates
+        self.visits = visits
+        self.bits = np.packbits(visits > 0, axis=1, bitorder='little')
+
+    @property
+    def shape(self) -> tuple:
+        return self.visits.shape
+
+    def _window_bytes(self, start: int, stop: int) -> np.ndarray:
+        """Return the packed bytes covering date columns [start, stop) with bits outside the window cleared."""
+        if stop <= start:
+            return np.zeros((len(self.employee_ids), 0), dtype=np.uint8)
+        window = self.bits[:, start >> 3:((stop - 1) >> 3) + 1].copy()
+        window[:, 0] &= np.uint8((0xFF << (start & 7)) & 0xFF)
+        window[:, -1] &= np.uint8(0xFF >> (7 - ((stop - 1) & 7)))
+        return window
+
+    def _column_range(self, start_date=None, end_date=None) -> tuple:
+        """Convert an inclusive date range to a half-open range of column positions."""
+        start = 0 if start_date is None else self.dates.searchsorted(pd.Timestamp(start_date), side='left')
+        stop = len(self.dates) if end_date is None else self.dates.searchsorted(pd.Timestamp(end_date), side='right')
+        return start, stop
+
+    def days_present(self, start_date=None, end_date=None) -> np.ndarray:
+        """
+        Count the days each employee was present (row popcount).
+
+        Args:
+            start_date: First date of the window (default: first date)
+            end_date: Last date of the window, inclusive (default: last date)
+
+        Returns:
+            Array with the number of days present per row
+        """
+        start, stop = self._column_range(start_date, end_date)
+        return _POPCOUNT[self._window_bytes(start, stop)].sum(axis=1, dtype=np.int64)
+
+    def employees_present(self) -> pd.Series:
+        """Count the employees present on each date (column popcount)."""
+        present = np.unpackbits(self.bits, axis=1, count=len(self.dates), bitorder='little')
+        return pd.Series(present.sum(axis=0, dtype=np.int64), index=self.dates)
+
+    def is_present(self, row: int, date) -> bool:
+        """Return whether the employee in a row was present on a date."""
+        column = self.dates.get_loc(pd.Timestamp(date))
+        return bool((self.bits[row, column >> 3] >> (column & 7)) & 1)
+
+    def to_long(self, date_order=None) -> pd.DataFrame:
+        """
+        Expand to one row per employee per date.
+
+        Rows are ordered date by date, each date listing every employee. Dates
+        in date_order keep their original values; those that are not columns of
+        the matrix (e.g. NaT) get zero visits.
+
+        Args:
+            date_order: Dates to expand, in order (default: the matrix dates)
+
+        Returns:
+            DataFrame with employee_id, employee_name, date_only and visits columns
+        """
+        dates = self.dates.to_numpy() if date_order is None else np.asarray(date_order)
+        columns = self.dates.get_indexer(pd.DatetimeIndex(dates))
+
+        # Date-major layout: the visits of every employee for the first date, then the next, ...
+        visits = np.zeros((len(dates), len(self.employee_ids)), dtype=np.float64)
+        known = columns >= 0
+        visits[known] = self.visits[:, columns[known]].T
+
+        return pd.DataFrame({
+            'employee_id': np.tile(self.employee_ids, len(dates)),
+            'employee_name': np.tile(self.employee_names, len(dates)),
+            'date_only': np.repeat(dates, len(self.employee_ids)),
+            'visits': visits.ravel()
+        })
+
+    def memory_usage(self) -> int:
+        """Return the memory used by the visit counts and presence bits, in bytes."""
+        return int(self.visits.nbytes + self.bits.nbytes)
+
+def build_presence_matrix(df: pd.DataFrame) -> PresenceMatrix:
+    """
+    Build the presence matrix from swipe-level data.
+
+    Rows are the distinct (employee_id, 'Last name, First name') pairs in
+    first-seen order; columns are the distinct dates. Swipes without an
+    employee ID or date are not counted.
+
+    Args:
+        df: DataFrame with employee_id, 'Last name, First name' and date_only columns
+
+    Returns:
+        PresenceMatrix
+    """
+    employees = df[['employee_id', 'Last name, First name']].drop_duplicates()
+    employee_ids = employees['employee_id'].to_numpy()
+    dates = pd.DatetimeIndex(df['date_only'].dropna().unique()).sort_values()
+
+    # Visits per (employee_id, date); every row sharing an employee_id gets the same counts
+    id_codes, unique_ids = pd.factorize(df['employee_id'])
+    date_columns = dates.get_indexer(df['date_only'])
+    counted = (id_codes >= 0) & (date_columns >= 0)
+    flat = id_codes[counted].astype(np.int64) * len(dates) + date_columns[counted]
+    id_visits = np.bincount(flat, minlength=len(unique_ids) * len(dates)).reshape(len(unique_ids), len(dates))
+
+    # Smallest unsigned type that holds the largest count
+    dtype = np.min_scalar_type(int(id_visits.max(initial=0)))
+    rows = pd.Index(unique_ids).get_indexer(employee_ids)
+    visits = np.zeros((len(employee_ids), len(dates)), dtype=dtype)
+    visits[rows >= 0] = id_visits[rows[rows >= 0]]
+
+    matrix = PresenceMatrix(employee_ids, employees['Last name, First name'].to_numpy(), dates, visits)
+    logger.info(f"Built {matrix.shape[0]:,} x {matrix.shape[1]:,} presence matrix "
+                f"({matrix.memory_usage() / 1024:.1f} KB)")
+    return matrix
@@ -5,20 +5,13 @@ import os
 
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-from src.data_analysis.common import (
-    get_employment_date_mask,
-    get_london_hybrid_ft_mask,
-    get_core_days_mask,
-    calculate_eligible_employees,
-    calculate_present_employees,
-    calculate_attendance_percentage,
-    get_week_start_date
-)
+from src.data_analysis.common import calculate_attendance_percentage
+from src.data_analysis.daily_aggregate import build_daily_aggregate
 from src.utils import handle_empty_dataframe, validate_columns
 
 logger = logging.getLogger("attendance_dashboard.data_analysis.reports")
 
-def calculate_daily_attendance_counts(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_daily_attendance_counts(df: pd.DataFrame, daily_aggregate: pd.DataFrame = None) -> pd.DataFrame:
     """
     Calculate daily attendance counts split by employee type.
     
@@ -26,8 +19,11 @@ def calculate_daily_attendance_counts(df: pd.DataFrame) -> pd.DataFrame:
     1. London, Hybrid, Full-Time employees
     2. All other employees
     
+    The counts are read from the daily aggregate table, one row per date with data.
+    
     Args:
         df: DataFrame with attendance and employee data
+        daily_aggregate: Optional table from build_daily_aggregate(df), to share between reports
         
     Returns:
         DataFrame with daily attendance counts and percentages
@@ -40,168 +36,74 @@ def calculate_daily_attendance_counts(df: pd.DataFrame) -> pd.DataFrame:
     if not validate_columns(df, required_columns, "calculate_daily_attendance_counts", logger):
         return pd.DataFrame()
     
-    # Get full employee DataFrame if available
-    full_employee_df = df.attrs['full_employee_info'] if hasattr(df, 'attrs') and 'full_employee_info' in df.attrs else None
+    if daily_aggregate is None:
+        daily_aggregate = build_daily_aggregate(df)
+    daily = daily_aggregate[daily_aggregate['has_data']]
+    if daily.empty:
+        return pd.DataFrame()
     
-    # Initialize results list
-    daily_counts = []
-    logger.debug(f"Calculating daily attendance counts for {df['date_only'].nunique()} unique dates")
+    lhft_present = daily['london_hybrid_ft_present'].to_numpy()
+    others_present = daily['other_present'].to_numpy()
+    eligible_lhft = daily['london_hybrid_ft_eligible'].to_numpy()
     
-    # Process each date
-    for date in sorted(df['date_only'].unique()):
-        try:
-            # Calculate London, Hybrid, Full-Time employees who were present
-            lhft_present = calculate_present_employees(df, date, lhft_only=True)
-            
-            # Calculate other employees who were present
-            # We need a specialized approach since common function only handles LHFT
-            active_mask = get_employment_date_mask(df, date)
-            lhft_mask = get_london_hybrid_ft_mask(df)
-            date_mask = (df['date_only'] == date)
-            others_present = df[
-                date_mask & active_mask & ~lhft_mask & (df['is_present'] == True)
-            ]['employee_id'].nunique()
-            
-            # Calculate total eligible London, Hybrid, Full-Time employees
-            eligible_lhft = calculate_eligible_employees(df, date, full_employee_df)
-            
-            # Calculate attendance percentage
-            attendance_percentage = calculate_attendance_percentage(lhft_present, eligible_lhft)
-            
-            # Special debugging for Dec 11, 2024 (if present in the data)
-            if pd.Timestamp(date).strftime('%Y-%m-%d') == '2024-12-11' and full_employee_df is not None:
-                filtered_eligible = df[active_mask & lhft_mask]['employee_id'].nunique()
-                logger.debug(f"Dec 11, 2024: Full dataset eligible: {eligible_lhft}, Filtered: {filtered_eligible}")
-            
-            # Add results to daily counts
-            daily_counts.append({
-                'date': date,
-                'day_of_week': pd.Timestamp(date).strftime('%A'),
-                'london_hybrid_ft_count': lhft_present,
-                'other_count': others_present,
-                'eligible_london_hybrid_ft': eligible_lhft,
-                'london_hybrid_ft_percentage': round(attendance_percentage, 1),
-                'total_attendance': lhft_present + others_present
-            })
-            
-        except Exception as e:
-            logger.error(f"Error calculating attendance counts for date {date}: {e}")
-            # Skip this date but continue processing others
+    daily_counts = pd.DataFrame({
+        'date': daily['date'].to_numpy(),
+        'day_of_week': daily['date'].dt.strftime('%A').to_numpy(),
+        'london_hybrid_ft_count': lhft_present,
+        'other_count': others_present,
+        'eligible_london_hybrid_ft': eligible_lhft,
+        'london_hybrid_ft_percentage': [
+            round(calculate_attendance_percentage(present, eligible), 1)
+            for present, eligible in zip(lhft_present.tolist(), eligible_lhft.tolist())
+        ],
+        'total_attendance': lhft_present + others_present
+    })
     
     logger.info(f"Completed daily attendance count calculation for {len(daily_counts)} dates")
-    return pd.DataFrame(daily_counts)
+    return daily_counts
 
-def calculate_weekly_attendance_counts(df: pd.DataFrame) -> pd.DataFrame:
+def calculate_weekly_attendance_counts(df: pd.DataFrame, daily_aggregate: pd.DataFrame = None) -> pd.DataFrame:
     """
     Calculate weekly attendance counts split by employee type.
     Only considers Tuesday, Wednesday, and Thursday.
-    FIXED: Now uses the same calculation logic as daily attendance for consistent results.
-    """
-    df = df.copy()
-    
-    # Add week start date (Monday)
-    df['week_start'] = df['date_only'] - pd.to_timedelta(df['date_only'].dt.dayofweek, unit='d')
     
-    # Check if we have full employee info available for consistent calculations
-    has_full_employee_info = hasattr(df, 'attrs') and 'full_employee_info' in df.attrs
+    Every week with data is averaged over all of its core days, as a rollup
+    of the daily aggregate table.
     
-    weekly_counts = []
-    for week_start in sorted(df['week_start'].unique()):
-        week_end = week_start + pd.Timedelta(days=6)
-        
-        # Get daily eligible counts and attendance counts for Tue-Thu
-        daily_eligible_lhft = []  # London Hybrid Full-Time eligible
-        daily_lhft_present = []   # London Hybrid Full-Time present
-        daily_others_present = [] # Others present
-        
-        for date in pd.date_range(week_start, week_end):
-            if date.strftime('%A') in ['Tuesday', 'Wednesday', 'Thursday']:
-                # Consider employment dates - exactly like daily calculation
-                active_mask = (
-                    (pd.to_datetime(df['Combined hire date']) <= date) &
-                    (
-                        (df['Most recent day worked'].isna()) |
-                        (pd.to_datetime(df['Most recent day worked']) >= date)
-                    )
-                )
-                
-                # London, Hybrid, Full-Time mask
-                london_hybrid_ft_mask = (
-                    (df['Location'] == 'London UK') & 
-                    (df['Working Status'] == 'Hybrid') &
-                    (df['is_full_time'] == True)
-                )
-                
-                # Get eligible employee count - using full employee info if available
-                if has_full_employee_info:
-                    # Get full employee info DataFrame
-                    full_emp_df = df.attrs['full_employee_info']
-                    
-                    # Apply employment date filter to full dataset
-                    active_mask_full = (
-                        (pd.to_datetime(full_emp_df['Combined hire date']) <= date) &
-                        ((full_emp_df['Most recent day worked'].isna()) | 
-                         (pd.to_datetime(full_emp_df['Most recent day worked']) >= date))
-                    )
-                    
-                    # Apply London, Hybrid, Full-Time filter
-                    london_hybrid_ft_mask_full = (
-                        (full_emp_df['Location'] == 'London UK') & 
-                        (full_emp_df['Working Status'] == 'Hybrid') &
-                        (full_emp_df['is_full_time'] == True)
-                    )
-                    
-                    # Count eligible employees from full employee pool
-                    eligible_count = full_emp_df[
-                        active_mask_full & london_hybrid_ft_mask_full
-                    ]['employee_id'].nunique()
-                else:
-                    # Use current filtered dataset if full employee info not available
-                    eligible_count = df[
-                        active_mask & london_hybrid_ft_mask
-                    ]['employee_id'].nunique()
-                
-                # Count LHFT present on this specific date
-                date_mask = (df['date_only'] == date)
-                lhft_present = df[
-                    date_mask & 
-                    active_mask &
-                    london_hybrid_ft_mask & 
-                    (df['is_present'] == True)
-                ]['employee_id'].nunique()
-                
-                # Count others present on this specific date
-                others_present = df[
-                    date_mask & 
-                    active_mask &
-                    ~london_hybrid_ft_mask & 
-                    (df['is_present'] == True)
-                ]['employee_id'].nunique()
-                
-                # Add to daily counts
-                daily_eligible_lhft.append(eligible_count)
-                daily_lhft_present.append(lhft_present)
-                daily_others_present.append(others_present)
-        
-        # Skip if no data for this week
-        if not daily_eligible_lhft:
-            continue
-        
-        # Calculate averages
-        avg_eligible_lhft = sum(daily_eligible_lhft) / len(daily_eligible_lhft) if daily_eligible_lhft else 0
-        avg_lhft_present = sum(daily_lhft_present) / len(daily_lhft_present) if daily_lhft_present else 0  
-        avg_others_present = sum(daily_others_present) / len(daily_others_present) if daily_others_present else 0
-        
-        # Calculate percentage
-        attendance_percentage = (avg_lhft_present / avg_eligible_lhft * 100) if avg_eligible_lhft > 0 else 0
+    Args:
+        df: DataFrame with attendance and employee data
+        daily_aggregate: Optional table from build_daily_aggregate(df), to share between reports
         
-        weekly_counts.append({
-            'week_start': week_start,
-            'london_hybrid_ft_avg': round(avg_lhft_present, 1),
-            'other_avg': round(avg_others_present, 1),
-            'avg_eligible_london_hybrid_ft': round(avg_eligible_lhft, 1),
-            'london_hybrid_ft_percentage': round(attendance_percentage, 1),
-            'total_avg_attendance': round(avg_lhft_present + avg_others_present, 1)
-        })
+    Returns:
+        DataFrame with weekly average attendance counts and percentages
+    """
+    if daily_aggregate is None:
+        daily_aggregate = build_daily_aggregate(df)
+    
+    # Core days of every week that has data
+    weeks_with_data = daily_aggregate.loc[daily_aggregate['has_data'], 'week_start'].unique()
+    core_days = daily_aggregate[daily_aggregate['is_core_day'] & daily_aggregate['week_start'].isin(weeks_with_data)]
+    if core_days.empty:
+        return pd.DataFrame()
+    
+    # Average counts over each week's core days
+    weekly = core_days.groupby('week_start', sort=True)[
+        ['london_hybrid_ft_present', 'other_present', 'london_hybrid_ft_eligible']
+    ].mean()
+    avg_lhft_present = weekly['london_hybrid_ft_present'].tolist()
+    avg_others_present = weekly['other_present'].tolist()
+    avg_eligible_lhft = weekly['london_hybrid_ft_eligible'].tolist()
     
-    return pd.DataFrame(weekly_counts)
\ No newline at end of file
+    return pd.DataFrame({
+        'week_start': weekly.index.to_numpy(),
+        'london_hybrid_ft_avg': [round(value, 1) for value in avg_lhft_present],
+        'other_avg': [round(value, 1) for value in avg_others_present],
+        'avg_eligible_london_hybrid_ft': [round(value, 1) for value in avg_eligible_lhft],
+        'london_hybrid_ft_percentage': [
+            round((present / eligible * 100) if eligible > 0 else 0, 1)
+            for present, eligible in zip(avg_lhft_present, avg_eligible_lhft)
+        ],
+        'total_avg_attendance': [
+            round(lhft + others, 1) for lhft, others in zip(avg_lhft_present, avg_others_present)
+        ]
+    })
@@ -1,4 +1,19 @@
 import pandas as pd
+import numpy as np
+import sys
+import os
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from src.config import CORE_WEEKDAY_INDICES
+from src.utils import WEEKDAY_NAMES
+from src.data_analysis.common import (
+    get_core_days_mask,
+    get_weekday,
+    get_london_hybrid_ft_mask,
+    build_headcount_timeline
+)
+from src.data_analysis.daily_aggregate import build_daily_aggregate
 
 def calculate_attendance_by_weekday(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -10,8 +25,9 @@ def calculate_attendance_by_weekday(df: pd.DataFrame) -> pd.DataFrame:
     Returns:
         DataFrame with attendance by weekday
     """
-    weekday_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
-    weekday_counts = df.groupby('day_of_week').apply(
+    weekday_order = WEEKDAY_NAMES[:5]
+    # Group by a column rather than a derived Series, which carries df.attrs (e.g. full_employee_info)
+    weekday_counts = df.assign(day_of_week=get_weekday(df)).groupby('day_of_week').apply(
         lambda x: pd.Series({
             'london_hybrid_ft_count': sum((x['Location'] == 'London UK') & 
                                        (x['Working Status'] == 'Hybrid') &
@@ -24,72 +40,108 @@ def calculate_attendance_by_weekday(df: pd.DataFrame) -> pd.DataFrame:
         })
     ).reset_index()
     
+    # Label weekday numbers for display
     weekday_counts['day_of_week'] = pd.Categorical(
-        weekday_counts['day_of_week'], 
+        weekday_counts['day_of_week'].map(dict(enumerate(WEEKDAY_NAMES))), 
         categories=weekday_order, 
         ordered=True
     )
     return weekday_counts.sort_values('day_of_week')
 
+def _present_mask(df: pd.DataFrame) -> pd.Series:
+    """Return the is_present flag, falling back to the 'present' column."""
+    if 'is_present' in df.columns:
+        return df['is_present'] == True
+    print("WARNING: 'is_present' column not found - falling back to 'present' column")
+    if 'present' in df.columns:
+        return df['present'] == 'Yes'
+    print("WARNING: Neither 'is_present' nor 'present' column found - assuming all employees present")
+    return pd.Series(True, index=df.index)
+
+def _sorted_divisions(df: pd.DataFrame) -> list:
+    """Return the distinct non-missing divisions, sorted alphabetically."""
+    return sorted(d for d in df['Division'].unique() if pd.notna(d))
+
+def _division_daily_presence(df: pd.DataFrame, mask: pd.Series, cohorts=None,
+                             dropna: bool = True) -> pd.Series:
+    """
+    Count distinct employees per (division, [cohort,] date) in one groupby.
+    
+    Args:
+        df: DataFrame with Division, date_only and employee_id columns
+        mask: Boolean mask of the rows to count
+        cohorts: Optional array of cohort labels aligned with df
+        dropna: If False, rows without an employee_id count as one more employee
+        
+    Returns:
+        Series of distinct employee counts indexed by (Division, [cohort,] date_only)
+    """
+    mask = mask.to_numpy(dtype=bool)
+    rows = df.loc[mask, ['Division', 'date_only', 'employee_id']]
+    keys = ['Division', 'date_only']
+    if cohorts is not None:
+        rows = rows.assign(cohort=np.asarray(cohorts)[mask])
+        keys = ['Division', 'cohort', 'date_only']
+    return rows.groupby(keys)['employee_id'].nunique(dropna=dropna)
+
 def calculate_attendance_by_division(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate attendance numbers and percentages by division.
     Counts unique employee-days for accurate attendance tracking.
-    """
-    # Get unique divisions, filtering out NaN values
-    unique_divisions = [d for d in df['Division'].unique() if pd.notna(d)]
-    unique_divisions.sort()  # Sort alphabetically
     
-    result = []
-    for division in unique_divisions:
-        # Get division employees who are London, Hybrid, Full-Time
-        division_employees = df[
-            (df['Division'] == division) & 
-            (df['Location'] == 'London UK') & 
-            (df['Working Status'] == 'Hybrid') &
-            (df['is_full_time'] == True)
-        ].drop_duplicates('employee_id')
-        
-        if len(division_employees) == 0:
-            continue
-        
-        # Count unique employee-days of attendance
-        attendance_days = df[
-            (df['Division'] == division) & 
-            (df['Location'] == 'London UK') & 
-            (df['Working Status'] == 'Hybrid') &
-            (df['is_full_time'] == True) & 
-            (df['is_present'] == True)
-        ].groupby('employee_id')['date_only'].nunique().sum()
-        
-        # Calculate total possible days for each employee based on their employment period
-        total_possible_days = 0
-        for _, emp in division_employees.iterrows():
-            hire_date = pd.to_datetime(emp['Combined hire date'])
-            last_day = pd.to_datetime(emp['Most recent day worked'])
-            
-            # Get all dates in the dataset
-            all_dates = pd.to_datetime(df['date_only'].unique())
-            
-            # Filter dates to employment period
-            valid_dates = all_dates[
-                (all_dates >= hire_date) & 
-                ((all_dates <= last_day) | (emp['Status'] == 'Active'))
-            ]
-            
-            total_possible_days += len(valid_dates)
-        
-        # Calculate percentage
-        attendance_percentage = (attendance_days / total_possible_days * 100) if total_possible_days > 0 else 0
+    Possible days per employee are the dataset's dates within their employment
+    period, counted with binary searches on the sorted dates.
+    
+    Args:
+        df: Combined dataframe with employee, Status and attendance data
         
-        result.append({
-            'division': division,
-            'attendance_days': attendance_days,
-            'total_possible_days': total_possible_days,
-            'attendance_percentage': attendance_percentage
-        })
+    Returns:
+        DataFrame with attendance days, possible days and percentage per division
+    """
+    lhft_mask = (
+        (df['Location'] == 'London UK') & 
+        (df['Working Status'] == 'Hybrid') &
+        (df['is_full_time'] == True)
+    )
     
-    return pd.DataFrame(result)
+    # London, Hybrid, Full-Time employees of each division (first row per employee)
+    division_employees = df[lhft_mask & df['Division'].notna()].drop_duplicates(['Division', 'employee_id'])
+    if division_employees.empty:
+        return pd.DataFrame()
+    
+    # Unique employee-days of attendance per division
+    attendance_days = (
+        df[lhft_mask & (df['is_present'] == True)]
+        .groupby(['Division', 'employee_id'])['date_only'].nunique()
+        .groupby(level='Division').sum()
+    )
+    
+    # Dates in the dataset within each employee's employment period
+    all_dates = pd.to_datetime(pd.Series(df['date_only'].unique())).dropna().sort_values().to_numpy()
+    hire_dates = pd.to_datetime(division_employees['Combined hire date']).to_numpy()
+    last_days = pd.to_datetime(division_employees['Most recent day worked']).to_numpy()
+    is_active = (division_employees['Status'] == 'Active').to_numpy()
+    
+    first = np.searchsorted(all_dates, hire_dates, side='left')
+    last = np.where(is_active, len(all_dates), np.searchsorted(all_dates, last_days, side='right'))
+    last = np.where(~is_active & np.isnat(last_days), 0, last)
+    possible_days = np.where(np.isnat(hire_dates), 0, np.maximum(last - first, 0))
+    total_possible_days = pd.Series(possible_days, index=division_employees.index).groupby(
+        division_employees['Division']).sum()
+    
+    divisions = _sorted_divisions(division_employees)
+    attendance_days = attendance_days.reindex(divisions, fill_value=0)
+    total_possible_days = total_possible_days.reindex(divisions)
+    
+    return pd.DataFrame({
+        'division': divisions,
+        'attendance_days': attendance_days.to_numpy(),
+        'total_possible_days': total_possible_days.to_numpy(),
+        'attendance_percentage': [
+            (days / possible * 100) if possible > 0 else 0
+            for days, possible in zip(attendance_days.tolist(), total_possible_days.tolist())
+        ]
+    })
 
 def calculate_division_attendance_tue_thu(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -99,9 +151,12 @@ def calculate_division_attendance_tue_thu(df: pd.DataFrame) -> pd.DataFrame:
     2) For each division, calculate average daily attendance on those days
     3) For each division, calculate average eligible employees on those days (using full employee data)
     4) Calculate percentage = average attendance / average eligible
+    
+    Attendance is counted in one groupby over (division, date); eligible
+    employees come from a per-division headcount timeline.
     """
     # Filter for only Tuesday, Wednesday, Thursday
-    tue_thu_mask = df['day_of_week'].isin(['Tuesday', 'Wednesday', 'Thursday'])
+    tue_thu_mask = get_core_days_mask(df)
     tue_thu_df = df[tue_thu_mask]
     
     # 1. Calculate total number of unique Tue/Wed/Thu dates in the period
@@ -109,118 +164,45 @@ def calculate_division_attendance_tue_thu(df: pd.DataFrame) -> pd.DataFrame:
     total_days = len(tue_thu_dates)
     
     # Get unique divisions, filtering out NaN values
-    unique_divisions = [d for d in tue_thu_df['Division'].unique() if pd.notna(d)]
-    unique_divisions.sort()  # Sort alphabetically
-    
-    # Check if 'is_present' column exists
-    if 'is_present' not in tue_thu_df.columns:
-        print("WARNING: 'is_present' column not found - falling back to 'present' column")
-        if 'present' in tue_thu_df.columns:
-            tue_thu_df['is_present'] = tue_thu_df['present'] == 'Yes'
-        else:
-            print("WARNING: Neither 'is_present' nor 'present' column found - assuming all employees present")
-            tue_thu_df['is_present'] = True
+    unique_divisions = _sorted_divisions(tue_thu_df)
+    if not unique_divisions:
+        return pd.DataFrame()
+    
+    present_mask = _present_mask(tue_thu_df)
     
     # Check if 'is_full_time' exists in the dataset
-    has_full_time = 'is_full_time' in tue_thu_df.columns
-    if not has_full_time:
+    if 'is_full_time' not in tue_thu_df.columns:
         print("WARNING: 'is_full_time' column not found - assuming all employees are full-time")
+    lhft_mask = get_london_hybrid_ft_mask(tue_thu_df)
     
-    # Check if we have full employee info available for consistent calculations
-    has_full_employee_info = hasattr(df, 'attrs') and 'full_employee_info' in df.attrs
+    # Eligible headcount per division, from the full employee info if available
+    full_emp_df = df.attrs['full_employee_info'] if 'full_employee_info' in df.attrs else None
+    if full_emp_df is not None and 'Division' in full_emp_df.columns:
+        eligible_timeline = build_headcount_timeline(full_emp_df, get_london_hybrid_ft_mask(full_emp_df), 'Division')
+    else:
+        if full_emp_df is not None:
+            print(f"WARNING: 'Division' column not found in full employee info")
+        # Fall back to the filtered dataset when full employee info is not usable
+        eligible_timeline = build_headcount_timeline(tue_thu_df, lhft_mask, 'Division')
     
-    # Create a dataframe to store results
-    result = []
+    # 2. Distinct present employees per (division, date), summed over the dates
+    attendance_totals = (
+        _division_daily_presence(tue_thu_df, present_mask & lhft_mask, dropna=False)
+        .groupby(level='Division').sum()
+        .reindex(unique_divisions, fill_value=0)
+    )
     
-    # Process each division
-    for division in unique_divisions:
-        # Create arrays to store daily counts
-        eligible_counts = []
-        attendance_counts = []
-        
-        # For each date, calculate eligible and present employees
-        for date in tue_thu_dates:
-            date_filter = (tue_thu_df['date_only'] == date)
-            
-            # Define filters for attendance calculation
-            division_filter = (tue_thu_df['Division'] == division)
-            location_filter = (tue_thu_df['Location'] == 'London UK')
-            working_filter = (tue_thu_df['Working Status'] == 'Hybrid')
-            
-            # London, Hybrid, Full-Time filter for attendance
-            if has_full_time:
-                full_time_filter = (tue_thu_df['is_full_time'] == True)
-                lhft_filter = location_filter & working_filter & full_time_filter
-            else:
-                lhft_filter = location_filter & working_filter
-            
-            # Division-specific eligible employees filter for attendance
-            div_eligible_filter = division_filter & lhft_filter
-            
-            # Get DISTINCT employee IDs of those who were PRESENT
-            present_filter = date_filter & div_eligible_filter & (tue_thu_df['is_present'] == True)
-            present_emps = set(tue_thu_df[present_filter]['employee_id'].unique())
-            attendance_count = len(present_emps)
-            
-            # FIXED: Calculate eligible employee count using full employee info if available
-            if has_full_employee_info:
-                # Get full employee info DataFrame
-                full_emp_df = df.attrs['full_employee_info']
-                
-                # Apply employment date filter to full dataset
-                active_mask_full = (
-                    (pd.to_datetime(full_emp_df['Combined hire date']) <= date) &
-                    ((full_emp_df['Most recent day worked'].isna()) | 
-                     (pd.to_datetime(full_emp_df['Most recent day worked']) >= date))
-                )
-                
-                # Apply Division, London, Hybrid, Full-Time filter to full dataset
-                # Check if 'Division' column exists in full_emp_df
-                if 'Division' in full_emp_df.columns:
-                    division_mask_full = (full_emp_df['Division'] == division)
-                    
-                    london_hybrid_ft_mask_full = (
-                        (full_emp_df['Location'] == 'London UK') & 
-                        (full_emp_df['Working Status'] == 'Hybrid') &
-                        (full_emp_df['is_full_time'] == True)
-                    )
-                    
-                    # Count eligible employees from full employee pool for this division
-                    eligible_count = full_emp_df[
-                        active_mask_full & division_mask_full & london_hybrid_ft_mask_full
-                    ]['employee_id'].nunique()
-                else:
-                    # Fallback if Division is not in full_emp_df
-                    print(f"WARNING: 'Division' column not found in full employee info")
-                    # Use the filtered dataset for this case
-                    active_mask = (
-                        (pd.to_datetime(tue_thu_df['Combined hire date']) <= date) &
-                        ((tue_thu_df['Most recent day worked'].isna()) | 
-                         (pd.to_datetime(tue_thu_df['Most recent day worked']) >= date))
-                    )
-                    eligible_count = tue_thu_df[
-                        active_mask & div_eligible_filter
-                    ]['employee_id'].nunique()
-            else:
-                # Fallback to using the filtered dataset when full employee info is not available
-                active_mask = (
-                    (pd.to_datetime(tue_thu_df['Combined hire date']) <= date) &
-                    ((tue_thu_df['Most recent day worked'].isna()) | 
-                     (pd.to_datetime(tue_thu_df['Most recent day worked']) >= date))
-                )
-                eligible_count = tue_thu_df[
-                    active_mask & div_eligible_filter
-                ]['employee_id'].nunique()
-            
-            # Store counts for this date
-            eligible_counts.append(eligible_count)
-            attendance_counts.append(attendance_count)
-        
+    # 3. Eligible employees per division, summed over the same dates
+    eligible_totals = eligible_timeline.counts_by_cohort(tue_thu_dates).sum().reindex(unique_divisions, fill_value=0)
+    
+    result = []
+    for division, attendance_total, eligible_total in zip(unique_divisions, attendance_totals.tolist(),
+                                                          eligible_totals.tolist()):
         # Calculate averages across all dates
-        avg_eligible = sum(eligible_counts) / total_days if eligible_counts else 0
-        avg_attendance = sum(attendance_counts) / total_days if attendance_counts else 0
+        avg_eligible = eligible_total / total_days if total_days else 0
+        avg_attendance = attendance_total / total_days if total_days else 0
         
-        # Calculate percentage
+        # 4. Calculate percentage
         if avg_eligible > 0:
             attendance_percentage = (avg_attendance / avg_eligible) * 100
         else:
@@ -240,114 +222,65 @@ def calculate_division_attendance_by_location(df: pd.DataFrame) -> pd.DataFrame:
     """
     Calculate average daily attendance (#) by division, split into London, Hybrid, Full-Time and Other.
     
+    Each present row is assigned one category, and distinct employees are
+    counted per (division, category, date) in a single groupby.
+    
     Args:
         df: Combined dataframe with employee and attendance data
         
     Returns:
         DataFrame with division and attendance counts by category
     """
-    # Get unique divisions, filtering out NaN values
-    unique_divisions = [d for d in df['Division'].unique() if pd.notna(d)]
-    unique_divisions.sort()  # Sort alphabetically
-    
-    # Check if 'is_present' column exists
-    if 'is_present' not in df.columns:
-        print("WARNING: 'is_present' column not found - falling back to 'present' column")
-        if 'present' in df.columns:
-            df['is_present'] = df['present'] == 'Yes'
-        else:
-            print("WARNING: Neither 'is_present' nor 'present' column found - assuming all employees present")
-            df['is_present'] = True
+    present_mask = _present_mask(df)
     
-    # Check if 'is_full_time' exists in the dataset
-    has_full_time = 'is_full_time' in df.columns
+    # If no is_full_time column, the categories only use Location and Working Status
+    full_time = (df['is_full_time'] == True) if 'is_full_time' in df.columns else pd.Series(True, index=df.index)
+    london = (df['Location'] == 'London UK')
+    hybrid = (df['Working Status'] == 'Hybrid')
+    categories = np.select(
+        [london & hybrid & full_time, ~london & hybrid, ~hybrid & full_time],
+        ['london_hybrid_ft_count', 'hybrid_count', 'full_time_count'],
+        default='other_count'
+    )
+    
+    # Average over the dates on which each category had anyone present
+    category_columns = ['london_hybrid_ft_count', 'hybrid_count', 'full_time_count', 'other_count']
+    averages = (
+        _division_daily_presence(df, present_mask, categories)
+        .groupby(level=['Division', 'cohort']).mean()
+        .unstack('cohort')
+        .reindex(columns=category_columns)
+    )
+    
+    # Skip divisions with no employees
+    has_employees = df.groupby('Division')['employee_id'].nunique() > 0
+    divisions = [division for division in _sorted_divisions(df) if has_employees.get(division, False)]
+    averages = averages.reindex(divisions)
     
     result = []
-    for division in unique_divisions:
-        # Skip divisions with no employees
-        if df[df['Division'] == division]['employee_id'].nunique() == 0:
-            continue
-        
-        # Base division filter
-        division_filter = (df['Division'] == division) & (df['is_present'] == True)
-        
-        # London, Hybrid, Full-Time filter
-        if has_full_time:
-            london_hybrid_ft_filter = (
-                division_filter & 
-                (df['Location'] == 'London UK') & 
-                (df['Working Status'] == 'Hybrid') &
-                (df['is_full_time'] == True)
-            )
-        else:
-            # If no is_full_time column, just use Location and Working Status
-            london_hybrid_ft_filter = (
-                division_filter & 
-                (df['Location'] == 'London UK') & 
-                (df['Working Status'] == 'Hybrid')
-            )
-        
-        # Calculate average daily attendance for London, Hybrid, Full-Time
-        london_hybrid_ft_df = df[london_hybrid_ft_filter]
-        london_hybrid_ft_daily = london_hybrid_ft_df.groupby('date_only')['employee_id'].nunique()
-        london_hybrid_ft_count = london_hybrid_ft_daily.mean() if not london_hybrid_ft_daily.empty else 0
-        
-        # Hybrid (non-London) filter
-        hybrid_filter = (
-            division_filter & 
-            (df['Location'] != 'London UK') & 
-            (df['Working Status'] == 'Hybrid')
-        )
-        
-        # Calculate average daily attendance for Hybrid (non-London)
-        hybrid_df = df[hybrid_filter]
-        hybrid_daily = hybrid_df.groupby('date_only')['employee_id'].nunique()
-        hybrid_count = hybrid_daily.mean() if not hybrid_daily.empty else 0
-        
-        # Full-Time (non-Hybrid) filter
-        if has_full_time:
-            full_time_filter = (
-                division_filter & 
-                (df['Working Status'] != 'Hybrid') &
-                (df['is_full_time'] == True)
-            )
-        else:
-            # If no is_full_time column, just use Working Status
-            full_time_filter = (
-                division_filter & 
-                (df['Working Status'] != 'Hybrid')
-            )
-        
-        # Calculate average daily attendance for Full-Time (non-Hybrid)
-        full_time_df = df[full_time_filter]
-        full_time_daily = full_time_df.groupby('date_only')['employee_id'].nunique()
-        full_time_count = full_time_daily.mean() if not full_time_daily.empty else 0
-        
-        # Other filter (everyone else present)
-        other_filter = (
-            division_filter & 
-            ~london_hybrid_ft_filter &
-            ~hybrid_filter &
-            ~full_time_filter
-        )
-        
-        # Calculate average daily attendance for Other
-        other_df = df[other_filter]
-        other_daily = other_df.groupby('date_only')['employee_id'].nunique()
-        other_count = other_daily.mean() if not other_daily.empty else 0
-        
-        result.append({
-            'division': division,
-            'london_hybrid_ft_count': round(london_hybrid_ft_count, 1),
-            'hybrid_count': round(hybrid_count, 1),
-            'full_time_count': round(full_time_count, 1),
-            'other_count': round(other_count, 1)
-        })
+    for division in divisions:
+        row = {'division': division}
+        for column in category_columns:
+            average = averages.at[division, column]
+            row[column] = round(average, 1) if pd.notna(average) else 0
+        result.append(row)
     
     return pd.DataFrame(result)
 
-def calculate_period_summary(df: pd.DataFrame, start_date=None, end_date=None) -> pd.DataFrame:
-    """Calculate attendance summary by weekday for a given period."""
+def calculate_period_summary(df: pd.DataFrame, start_date=None, end_date=None,
+                             daily_aggregate: pd.DataFrame = None) -> pd.DataFrame:
+    """
+    Calculate attendance summary by weekday for a given period.
+    
+    Args:
+        df: DataFrame with attendance and employee data
+        start_date: Optional first date of the period
+        end_date: Optional last date of the period
+        daily_aggregate: Optional table from build_daily_aggregate(df), to share between reports
+        
+    Returns:
+        DataFrame with average attendance and percentage per weekday
+    """
     df = df.copy()
     
     # Filter for date range only if both dates are provided
@@ -357,11 +290,21 @@ def calculate_period_summary(df: pd.DataFrame, start_date=None, end_date=None) -
     
     # Check if we have full employee info available for consistent calculations
     has_full_employee_info = hasattr(df, 'attrs') and 'full_employee_info' in df.attrs
+    if has_full_employee_info:
+        # Average eligible headcount per weekday over the dates with data, from the daily aggregate
+        if daily_aggregate is None:
+            daily_aggregate = build_daily_aggregate(df)
+        days_with_data = daily_aggregate[daily_aggregate['has_data']]
+        if start_date is not None and end_date is not None:
+            days_with_data = days_with_data[days_with_data['date'].between(pd.Timestamp(start_date),
+                                                                           pd.Timestamp(end_date))]
+        eligible_by_weekday = days_with_data.groupby('weekday')['london_hybrid_ft_eligible'].mean()
     
     # Create weekday averages
     weekday_stats = []
-    for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
-        day_mask = (df['day_of_week'] == day)
+    weekdays = get_weekday(df)
+    for day_index, day in enumerate(WEEKDAY_NAMES[:5]):
+        day_mask = (weekdays == day_index)
         
         # London, Hybrid, Full-Time mask
         london_hybrid_ft_mask = (
@@ -390,37 +333,9 @@ def calculate_period_summary(df: pd.DataFrame, start_date=None, end_date=None) -
         ].groupby('date_only')['employee_id'].nunique().mean()
         
         # For Tue, Wed, Thu - use full employee info if available
-        if day in ['Tuesday', 'Wednesday', 'Thursday'] and has_full_employee_info:
-            # Get full employee info DataFrame
-            full_emp_df = df.attrs['full_employee_info']
-            
-            # Calculate average eligible employees across all dates of this weekday
-            total_eligible = 0
-            
-            for date in day_dates:
-                # Apply employment date filter for this date
-                active_mask_full = (
-                    (pd.to_datetime(full_emp_df['Combined hire date']) <= date) &
-                    ((full_emp_df['Most recent day worked'].isna()) | 
-                     (pd.to_datetime(full_emp_df['Most recent day worked']) >= date))
-                )
-                
-                # Apply London, Hybrid, Full-Time filter
-                london_hybrid_ft_mask_full = (
-                    (full_emp_df['Location'] == 'London UK') & 
-                    (full_emp_df['Working Status'] == 'Hybrid') &
-                    (full_emp_df['is_full_time'] == True)
-                )
-                
-                # Count eligible employees for this date
-                eligible_count = full_emp_df[
-                    active_mask_full & london_hybrid_ft_mask_full
-                ]['employee_id'].nunique()
-                
-                total_eligible += eligible_count
-            
-            # Calculate average if we found any dates
-            eligible_london_hybrid_ft = total_eligible / len(day_dates) if day_dates else 0
+        if day_index in CORE_WEEKDAY_INDICES and has_full_employee_info:
+            # Average eligible employees across all dates of this weekday
+            eligible_london_hybrid_ft = eligible_by_weekday.get(day_index, 0)
         else:
             # For other days or if no lookup available, calculate from current data
             eligible_london_hybrid_ft = df[
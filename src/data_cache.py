@@ -0,0 +1,411 @@
+"""
+Managed on-disk caches for the raw data files.
+
+The raw key card export is mirrored to a Parquet file that sits next to the CSV.
+The mirror is sorted by swipe time and written with one row group per calendar
+month, so a date-filtered load only reads the months that overlap the requested
+range. Each mirror records the fingerprint of the CSV it was built from and is
+rebuilt whenever that fingerprint changes.
+
+A small JSON manifest with the date range, row count and distinct employee
+count of the CSV is kept alongside it, so callers that only need those
+figures (e.g. the dashboard's most recent date) never parse the file.
+"""
+import pandas as pd
+import numpy as np
+import hashlib
+import json
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.config import PARQUET_MIRROR_SUFFIX, DATASET_MANIFEST_SUFFIX, FINGERPRINT_SAMPLE_BYTES, CACHE_VERSION
+from src.utils import parse_key_card_datetime
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional - callers fall back to reading the CSV
+    pa = None
+    pq = None
+
+logger = logging.getLogger("attendance_dashboard.data_cache")
+
+# Key used to store the source fingerprint in the Parquet schema metadata
+FINGERPRINT_METADATA_KEY = b'source_fingerprint'
+
+def parquet_available() -> bool:
+    """Return True if pyarrow is installed and Parquet mirrors can be used."""
+    return pq is not None
+
+def file_fingerprint(filepath: str) -> str:
+    """
+    Build a cheap fingerprint for a file.
+
+    The fingerprint combines the file size, the modification time and a hash of
+    the first and last FINGERPRINT_SAMPLE_BYTES of the file, so it changes when
+    the file is rewritten or appended to without having to read the whole file.
+
+    Args:
+        filepath: Path to the file
+
+    Returns:
+        Fingerprint string
+    """
+    stat = os.stat(filepath)
+    hasher = hashlib.sha1()
+    with open(filepath, 'rb') as f:
+        hasher.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+        if stat.st_size > FINGERPRINT_SAMPLE_BYTES:
+            f.seek(max(stat.st_size - FINGERPRINT_SAMPLE_BYTES, FINGERPRINT_SAMPLE_BYTES))
+            hasher.update(f.read(FINGERPRINT_SAMPLE_BYTES))
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{hasher.hexdigest()[:16]}"
+
+def data_version(filepaths: list) -> str:
+    """
+    Build an identifier for a set of raw files and the processing code version.
+
+    Combines the fingerprint of each file (missing files are recorded as such)
+    with CACHE_VERSION, so it changes whenever any input file or the cached
+    processing logic changes. Cheap enough to compute on every dashboard rerun.
+
+    Args:
+        filepaths: Paths of the raw input files (None entries are skipped)
+
+    Returns:
+        Version string
+    """
+    hasher = hashlib.sha1(f"cache-v{CACHE_VERSION}".encode())
+    for filepath in filepaths:
+        if filepath is None:
+            continue
+        fingerprint = file_fingerprint(filepath) if Path(filepath).exists() else 'missing'
+        hasher.update(f"{filepath}={fingerprint};".encode())
+    return hasher.hexdigest()[:16]
+
+def parquet_mirror_path(filepath: str) -> Path:
+    """Return the path of the Parquet mirror for a CSV file."""
+    return Path(filepath).with_suffix(PARQUET_MIRROR_SUFFIX)
+
+def read_mirror_fingerprint(mirror_path: Path):
+    """
+    Read the source fingerprint stored in a Parquet mirror.
+
+    Returns:
+        Fingerprint string, or None if the mirror is missing or unreadable
+    """
+    if pq is None or not Path(mirror_path).exists():
+        return None
+    try:
+        metadata = pq.read_schema(mirror_path).metadata or {}
+        fingerprint = metadata.get(FINGERPRINT_METADATA_KEY)
+        return fingerprint.decode() if fingerprint else None
+    except Exception as e:
+        logger.warning(f"Could not read Parquet mirror metadata from {mirror_path}: {str(e)}")
+        return None
+
+def refresh_parquet_mirror(filepath: str, time_column: str = 'Date/time', dtype: dict = None,
+                           force: bool = False):
+    """
+    Make sure the Parquet mirror of a CSV file is up to date.
+
+    The CSV is only re-read when its fingerprint differs from the one recorded
+    in the mirror. Rows are sorted by time_column and written with one row group
+    per calendar month; rows whose timestamp cannot be parsed go into a final
+    row group without statistics.
+
+    Args:
+        filepath: Path to the source CSV file
+        time_column: Name of the timestamp column used for ordering and grouping
+        dtype: Optional dtypes passed to pd.read_csv
+        force: Rebuild the mirror even if the fingerprint matches
+
+    Returns:
+        Path to the mirror, or None if it could not be built
+    """
+    if pq is None:
+        logger.debug("pyarrow not installed - Parquet mirror disabled")
+        return None
+
+    mirror_path = parquet_mirror_path(filepath)
+    fingerprint = file_fingerprint(filepath)
+
+    if not force and read_mirror_fingerprint(mirror_path) == fingerprint:
+        logger.debug(f"Parquet mirror {mirror_path} is up to date")
+        return mirror_path
+
+    logger.info(f"Refreshing Parquet mirror of {filepath}")
+    try:
+        df = pd.read_csv(filepath, dtype=dtype, low_memory=False)
+        if time_column not in df.columns:
+            logger.error(f"Cannot build Parquet mirror: missing '{time_column}' column")
+            return None
+
+        df[time_column] = parse_key_card_datetime(df[time_column])
+        df = df.sort_values(time_column, kind='stable', na_position='last').reset_index(drop=True)
+
+        # Month key for every row; NaT rows get their own trailing group
+        times = df[time_column]
+        month_keys = (times.dt.year * 12 + times.dt.month - 1).fillna(-1).astype(np.int64).to_numpy()
+        boundaries = np.flatnonzero(np.diff(month_keys)) + 1
+        starts = np.concatenate(([0], boundaries)) if len(df) else np.array([], dtype=np.int64)
+        ends = np.concatenate((boundaries, [len(df)])) if len(df) else np.array([], dtype=np.int64)
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[FINGERPRINT_METADATA_KEY] = fingerprint.encode()
+        table = table.replace_schema_metadata(metadata)
+
+        # Write to a temporary file first so readers never see a half-written mirror
+        tmp_path = mirror_path.with_name(mirror_path.name + '.tmp')
+        with pq.ParquetWriter(tmp_path, table.schema) as writer:
+            for start, end in zip(starts, ends):
+                writer.write_table(table.slice(start, end - start), row_group_size=int(end - start))
+        os.replace(tmp_path, mirror_path)
+        write_dataset_manifest(filepath, df, time_column=time_column, fingerprint=fingerprint)
+
+        logger.info(f"Wrote Parquet mirror with {len(df):,} rows in {len(starts)} monthly row groups to {mirror_path}")
+        return mirror_path
+
+    except Exception as e:
+        logger.error(f"Error building Parquet mirror for {filepath}: {str(e)}")
+        return None
+
+def select_row_groups(parquet_file, time_column: str, start_dt=None, end_dt=None) -> list:
+    """
+    Select the row groups whose time range overlaps [start_dt, end_dt].
+
+    Row groups without min/max statistics (the unparseable-timestamp group) are
+    only selected when no date bounds are given.
+
+    Args:
+        parquet_file: pyarrow ParquetFile
+        time_column: Name of the timestamp column
+        start_dt: Optional inclusive lower bound
+        end_dt: Optional inclusive upper bound
+
+    Returns:
+        List of row group indices
+    """
+    column_index = parquet_file.schema_arrow.get_field_index(time_column)
+    metadata = parquet_file.metadata
+
+    if start_dt is None and end_dt is None:
+        return list(range(metadata.num_row_groups))
+
+    selected = []
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column_index).statistics
+        if stats is None or not stats.has_min_max:
+            continue
+        if start_dt is not None and pd.Timestamp(stats.max) < start_dt:
+            continue
+        if end_dt is not None and pd.Timestamp(stats.min) > end_dt:
+            continue
+        selected.append(i)
+    return selected
+
+def read_parquet_mirror(filepath: str, start_date=None, end_date=None, time_column: str = 'Date/time',
+                        dtype: dict = None, columns: list = None, refresh: bool = True):
+    """
+    Read rows of a CSV file through its Parquet mirror, refreshing it if needed.
+
+    Only the row groups overlapping the requested range are read; the exact
+    date filter is then applied to the rows of those groups.
+
+    Args:
+        filepath: Path to the source CSV file
+        start_date: Optional inclusive start date (anything pd.to_datetime accepts)
+        end_date: Optional inclusive end date
+        time_column: Name of the timestamp column
+        dtype: Optional dtypes used when the mirror has to be rebuilt
+        columns: Optional columns to read (missing ones are skipped); others are never loaded
+        refresh: Rebuild a stale mirror; if False a stale mirror is ignored instead
+
+    Returns:
+        DataFrame with time_column parsed, or None if the mirror is unavailable
+    """
+    if refresh:
+        mirror_path = refresh_parquet_mirror(filepath, time_column=time_column, dtype=dtype)
+    elif read_mirror_fingerprint(parquet_mirror_path(filepath)) == file_fingerprint(filepath):
+        mirror_path = parquet_mirror_path(filepath)
+    else:
+        mirror_path = None
+    if mirror_path is None:
+        return None
+
+    try:
+        start_dt = pd.to_datetime(start_date) if start_date else None
+        end_dt = pd.to_datetime(end_date) if end_date else None
+
+        parquet_file = pq.ParquetFile(mirror_path)
+        row_groups = select_row_groups(parquet_file, time_column, start_dt, end_dt)
+        logger.info(f"Reading {len(row_groups)} of {parquet_file.metadata.num_row_groups} row groups from {mirror_path}")
+
+        if columns is not None:
+            columns = [col for col in parquet_file.schema_arrow.names if col in columns or col == time_column]
+        df = parquet_file.read_row_groups(row_groups, columns=columns).to_pandas()
+
+        # Restore NaN (rather than None) for missing strings so results match pd.read_csv
+        object_columns = df.select_dtypes(include=['object']).columns
+        for col in object_columns:
+            df[col] = df[col].where(df[col].notna(), np.nan)
+
+        if start_dt is not None:
+            df = df[df[time_column] >= start_dt]
+        if end_dt is not None:
+            df = df[df[time_column] <= end_dt]
+
+        return df.reset_index(drop=True)
+
+    except Exception as e:
+        logger.error(f"Error reading Parquet mirror {mirror_path}: {str(e)}")
+        return None
+
+def dataset_manifest_path(filepath: str) -> Path:
+    """Return the path of the metadata manifest for a CSV file."""
+    return Path(filepath).with_suffix(DATASET_MANIFEST_SUFFIX)
+
+def employee_keys(users: pd.Series) -> np.ndarray:
+    """
+    Return the distinct card holders in a User column.
+
+    Users are identified by their leading employee number; entries without a
+    number are identified by their full name instead.
+    """
+    users = users.dropna().astype(str)
+    ids = users.str.extract(r'^(\d+)', expand=False)
+    return ids.fillna(users).unique()
+
+def count_distinct_employees(users: pd.Series) -> int:
+    """Count distinct card holders in a User column (see employee_keys)."""
+    return int(len(employee_keys(users)))
+
+def write_dataset_manifest(filepath: str, df: pd.DataFrame = None, time_column: str = 'Date/time',
+                           fingerprint: str = None):
+    """
+    Write the metadata manifest for a key card CSV.
+
+    Args:
+        filepath: Path to the CSV file the manifest describes
+        df: Optional DataFrame holding the full contents of the file; if omitted
+            the timestamp and User columns are read from disk
+        time_column: Name of the timestamp column
+        fingerprint: Fingerprint of the file when df was read (defaults to the current one)
+
+    Returns:
+        The manifest dictionary, or None if it could not be written
+    """
+    try:
+        fingerprint = fingerprint or file_fingerprint(filepath)
+        if df is None:
+            header = pd.read_csv(filepath, nrows=0).columns
+            df = pd.read_csv(filepath, usecols=[c for c in [time_column, 'User'] if c in header],
+                             dtype=str, low_memory=False)
+
+        times = parse_key_card_datetime(df[time_column])
+        min_time, max_time = times.min(), times.max()
+        manifest = {
+            'source': str(filepath),
+            'fingerprint': fingerprint,
+            'rows': int(len(df)),
+            'min_timestamp': None if pd.isna(min_time) else min_time.isoformat(),
+            'max_timestamp': None if pd.isna(max_time) else max_time.isoformat(),
+            'distinct_employees': count_distinct_employees(df['User']) if 'User' in df.columns else None,
+            'created': pd.Timestamp.now().isoformat()
+        }
+
+        _save_dataset_manifest(filepath, manifest)
+        return manifest
+
+    except Exception as e:
+        logger.error(f"Error writing dataset manifest for {filepath}: {str(e)}")
+        return None
+
+def _save_dataset_manifest(filepath: str, manifest: dict) -> None:
+    """Write a manifest dictionary atomically next to the CSV."""
+    manifest_path = dataset_manifest_path(filepath)
+    tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+    logger.info(f"Wrote dataset manifest {manifest_path} ({manifest['rows']:,} rows, "
+                f"{manifest['min_timestamp']} to {manifest['max_timestamp']})")
+
+def update_dataset_manifest(filepath: str, previous: dict, appended: pd.DataFrame,
+                            distinct_employees: int = None, time_column: str = 'Date/time'):
+    """
+    Update a manifest after rows were appended to the file, without re-reading it.
+
+    Args:
+        filepath: Path to the CSV file (already containing the appended rows)
+        previous: Manifest from load_dataset_manifest taken before the append
+        appended: The rows that were appended
+        distinct_employees: Distinct employee count of the whole file after the append
+        time_column: Name of the timestamp column
+
+    Returns:
+        The new manifest dictionary, or None if it could not be written
+    """
+    try:
+        times = parse_key_card_datetime(appended[time_column]) if len(appended) else pd.Series(dtype='datetime64[ns]')
+        bounds = [t for t in [previous['min_timestamp'], previous['max_timestamp'], times.min(), times.max()]
+                  if t is not None and not pd.isna(t)]
+        manifest = {
+            'source': str(filepath),
+            'fingerprint': file_fingerprint(filepath),
+            'rows': int(previous['rows'] + len(appended)),
+            'min_timestamp': min(bounds).isoformat() if bounds else None,
+            'max_timestamp': max(bounds).isoformat() if bounds else None,
+            'distinct_employees': distinct_employees,
+            'created': pd.Timestamp.now().isoformat()
+        }
+        _save_dataset_manifest(filepath, manifest)
+        return manifest
+
+    except Exception as e:
+        logger.error(f"Error updating dataset manifest for {filepath}: {str(e)}")
+        return None
+
+def load_dataset_manifest(filepath: str, build: bool = True):
+    """
+    Load the metadata manifest for a key card CSV.
+
+    The manifest is only trusted if its fingerprint matches the current file.
+
+    Args:
+        filepath: Path to the CSV file
+        build: Rebuild a missing or stale manifest instead of returning None
+
+    Returns:
+        Manifest dictionary with min_timestamp/max_timestamp as pd.Timestamp
+        (or None), or None if there is no usable manifest
+    """
+    if not Path(filepath).exists():
+        return None
+
+    manifest = None
+    manifest_path = dataset_manifest_path(filepath)
+    if manifest_path.exists():
+        try:
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not read dataset manifest {manifest_path}: {str(e)}")
+        if manifest is not None and manifest.get('fingerprint') != file_fingerprint(filepath):
+            logger.info(f"Dataset manifest for {filepath} is stale")
+            manifest = None
+
+    if manifest is None and build:
+        manifest = write_dataset_manifest(filepath)
+    if manifest is None:
+        return None
+
+    manifest = dict(manifest)
+    for key in ['min_timestamp', 'max_timestamp']:
+        manifest[key] = pd.Timestamp(manifest[key]) if manifest.get(key) else None
+    return manifest
@@ -7,8 +7,9 @@ import sys
 
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.config import SPECIAL_EMPLOYEE_IDS
-from src.utils import optimize_dataframe_memory
+from src.config import EMPLOYEE_ID_OVERRIDES
+from src.utils import optimize_dataframe_memory, parse_key_card_datetime, add_calendar_columns
+from src.employment_status import StatusChangeTable, build_status_change_table, employee_name_index
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("attendance_dashboard.data_cleaning")
@@ -94,6 +95,36 @@ def compute_most_recent_day_worked(df: pd.DataFrame, max_data_date=None) -> pd.D
     
     return df
 
+def extract_employee_ids(users: pd.Series, overrides: dict = None) -> pd.Series:
+    """
+    Extract employee IDs from key card 'User' values.
+    
+    A 'User' has only a few hundred distinct values across millions of swipes,
+    so the column is factorized and the numeric-prefix rule and name overrides
+    are applied once per distinct value, then mapped back through the codes.
+    
+    Args:
+        users: 'User' column of the key card data
+        overrides: Dictionary of name -> ID for users without a numeric prefix
+            (default: EMPLOYEE_ID_OVERRIDES)
+        
+    Returns:
+        Series of employee IDs aligned with users (NaN where no ID is found)
+    """
+    overrides = EMPLOYEE_ID_OVERRIDES if overrides is None else overrides
+    codes, uniques = pd.factorize(users)
+    uniques = pd.Series(uniques, dtype=object).astype(str)
+    
+    # Leading digits are the ID; names in the override table replace it
+    unique_ids = pd.to_numeric(uniques.str.extract(r'^(\d+)', expand=False), errors='coerce')
+    for name, employee_id in overrides.items():
+        unique_ids[uniques.str.contains(name, regex=False)] = employee_id
+    
+    # Missing users (code -1) map to NaN
+    if (codes < 0).any():
+        unique_ids = pd.concat([unique_ids.astype(float), pd.Series([np.nan])], ignore_index=True)
+    return pd.Series(unique_ids.to_numpy()[codes], index=users.index, name='employee_id')
+
 def clean_key_card_data(df: pd.DataFrame) -> pd.DataFrame:
     """Clean and preprocess the key card access data."""
     # Create a copy only of the columns we need to modify
@@ -102,22 +133,7 @@ def clean_key_card_data(df: pd.DataFrame) -> pd.DataFrame:
     
     # Extract employee_id from 'User' column with improved regex
     if 'User' in df.columns:
-        # Extract numeric ID and convert to numeric type - use vectorized operations
-        result['employee_id'] = pd.to_numeric(df['User'].str.extract(r'^(\d+)', expand=False), 
-                                           errors='coerce')
-        
-        # Handle special cases - use IDs from configuration
-        special_cases = {
-            "Arorra, Aakash": 378, 
-            "Payne, James": 735,
-            "Mueller, Benjamin": SPECIAL_EMPLOYEE_IDS.get('BENJAMIN_MUELLER', 867),
-            "Hindhaugh, Robert": SPECIAL_EMPLOYEE_IDS.get('ROBERT_HINDHAUGH', 849)
-        }
-
-        # After the regular extraction, check for special cases
-        for special_name, special_id in special_cases.items():
-            special_mask = df['User'].str.contains(special_name, regex=False)
-            result.loc[special_mask, 'employee_id'] = special_id
+        result['employee_id'] = extract_employee_ids(df['User'])
         
         print(f"\nEmployee ID extraction stats:")
         print(f"Total rows: {len(df)}")
@@ -129,19 +145,15 @@ def clean_key_card_data(df: pd.DataFrame) -> pd.DataFrame:
         if pd.api.types.is_datetime64_any_dtype(df['Date/time']):
             result['parsed_time'] = df['Date/time']
         else:
-            # Use efficient vectorized parsing
-            result['parsed_time'] = pd.to_datetime(
-                df['Date/time'],
-                format="%d/%m/%Y %H:%M:%S",
-                dayfirst=True,
-                errors='coerce'
-            )
+            # Use the shared fixed-format parser
+            result['parsed_time'] = parse_key_card_datetime(df['Date/time'])
     
     # Create date_only from parsed_time using efficient vectorized operations
     result['date_only'] = result['parsed_time'].dt.floor('d')
     
-    # Add day of week
-    result['day_of_week'] = result['parsed_time'].dt.strftime('%A')
+    # Add integer calendar columns (day number, weekday, ISO week, core day flag);
+    # weekday names are only produced for display
+    add_calendar_columns(result)
     
     # Copy only needed columns from original DataFrame to save memory
     needed_columns = ['User', 'Where', 'Event', 'Details']
@@ -288,14 +300,11 @@ def merge_key_card_with_employee_info(
     
     # If history data is provided, add full-time indicators
     if history_df is not None:
-        # Create name to ID mapping
-        employee_name_to_id = create_employee_name_to_id_mapping(employee_df)
-        
-        # Create status lookup
-        status_lookup = create_employment_status_lookup(history_df, employee_name_to_id)
+        # One join and sort gives the columnar status history
+        status_table = build_status_change_table(history_df, employee_df)
         
         # Add full-time indicators
-        merged_df = add_full_time_indicators(merged_df, status_lookup)
+        merged_df = add_full_time_indicators(merged_df, status_table)
     
     return merged_df
 
@@ -309,10 +318,8 @@ def create_employee_name_to_id_mapping(employee_df: pd.DataFrame) -> dict:
     Returns:
         Dictionary mapping employee names to IDs
     """
-    mapping = {}
-    for _, row in employee_df.iterrows():
-        if pd.notna(row['Last name, First name']) and pd.notna(row['employee_id']):
-            mapping[row['Last name, First name']] = row['employee_id']
+    names = employee_name_index(employee_df)
+    mapping = dict(zip(names['Last name, First name'], names['employee_id']))
     
     print(f"Created name-to-ID mapping for {len(mapping)} employees")
     return mapping
@@ -321,6 +328,9 @@ def create_employment_status_lookup(history_df: pd.DataFrame, employee_name_to_i
     """
     Create a lookup that allows determining an employee's status on any date.
     
+    Compatibility wrapper around StatusChangeTable; new code should use
+    build_status_change_table and its batched lookups instead.
+    
     Args:
         history_df: DataFrame with employment history
         employee_name_to_id: Dictionary mapping employee names to IDs
@@ -328,46 +338,31 @@ def create_employment_status_lookup(history_df: pd.DataFrame, employee_name_to_i
     Returns:
         Dictionary mapping employee_id to sorted list of (date, status) tuples
     """
-    # Create the lookup dictionary
-    status_lookup = {}
-    
-    # Process each status change
-    for _, row in history_df.iterrows():
-        emp_name = row['Employee']
-        date = row['Date']
-        status = row['Employment Status']
-        
-        # Skip if we can't map the name to an ID
-        if emp_name not in employee_name_to_id:
-            continue
-            
-        emp_id = employee_name_to_id[emp_name]
-        
-        # Store the status change
-        if emp_id not in status_lookup:
-            status_lookup[emp_id] = []
-            
-        status_lookup[emp_id].append((date, status))
-    
-    # Sort status changes by date for each employee
-    for emp_id in status_lookup:
-        status_lookup[emp_id].sort(key=lambda x: x[0])
+    changes = pd.DataFrame({
+        'employee_id': history_df['Employee'].map(employee_name_to_id),
+        'change_date': history_df['Date'],
+        'status': history_df['Employment Status']
+    })
+    status_lookup = StatusChangeTable.from_frame(changes).to_lookup()
     
     print(f"Created status lookup for {len(status_lookup)} employees")
     return status_lookup
 
-def is_full_time_on_date(emp_id: float, date: pd.Timestamp, status_lookup: dict) -> bool:
+def is_full_time_on_date(emp_id: float, date: pd.Timestamp, status_lookup) -> bool:
     """
     Determine if an employee was Full-Time on a specific date.
     
     Args:
         emp_id: Employee ID
         date: Date to check
-        status_lookup: Dictionary from create_employment_status_lookup
+        status_lookup: StatusChangeTable, or dictionary from create_employment_status_lookup
         
     Returns:
         True if employee was Full-Time on date, False otherwise
     """
+    if isinstance(status_lookup, StatusChangeTable):
+        return bool(status_lookup.has_status_on([emp_id], [date], 'Full-Time')[0])
+    
     if emp_id not in status_lookup:
         return False
         
@@ -381,30 +376,22 @@ def is_full_time_on_date(emp_id: float, date: pd.Timestamp, status_lookup: dict)
             
     return most_recent_status == 'Full-Time'
 
-def add_full_time_indicators(df: pd.DataFrame, status_lookup: dict = None) -> pd.DataFrame:
+def add_full_time_indicators(df: pd.DataFrame, status_lookup=None) -> pd.DataFrame:
     """
     Add a column indicating if each employee was Full-Time on each date.
     
-    This function efficiently adds a full-time indicator to each row by:
-    1. Using vectorized operations where possible
-    2. Only applying row-by-row processing when necessary
-    3. Handling special cases with appropriate logging
+    The status on each row's date is found with one batched as-of lookup
+    against the columnar status history: each row takes the most recent
+    change on or before its date. Special cases are always marked as full-time.
     
     Args:
         df: DataFrame with key card and employee data
-        status_lookup: Dictionary from create_employment_status_lookup (optional)
+        status_lookup: StatusChangeTable, or dictionary from
+            create_employment_status_lookup (optional)
         
     Returns:
         DataFrame with 'is_full_time' column added
     """
-    import logging
-    try:
-        logger = logging.getLogger("attendance_dashboard.data_cleaning")
-    except:
-        # Fallback if logger isn't initialized
-        logging.basicConfig(level=logging.INFO)
-        logger = logging.getLogger("attendance_dashboard.data_cleaning")
-    
     # Create a copy to avoid modifying the original
     result = df.copy()
     
@@ -417,57 +404,27 @@ def add_full_time_indicators(df: pd.DataFrame, status_lookup: dict = None) -> pd
         logger.error("Cannot add full-time indicators using status lookup: missing date_only column")
         return df
     
-    # Add the is_full_time column, defaulting to False
-    result['is_full_time'] = False
-    
-    # OPTIMIZATION: Apply special cases using vectorized operations
     # Always mark Rob Hindhaugh (ID: 849) as full-time
     special_case_ids = [849]  # Add other special cases as needed
-    for special_id in special_case_ids:
-        mask = result['employee_id'] == special_id
-        if mask.any():
-            result.loc[mask, 'is_full_time'] = True
-            logger.info(f"Marked {mask.sum()} rows for employee ID {special_id} as full-time")
+    special_mask = result['employee_id'].isin(special_case_ids).to_numpy()
+    is_full_time = special_mask.copy()
+    if special_mask.any():
+        logger.info(f"Marked {special_mask.sum()} rows for special case IDs {special_case_ids} as full-time")
     
     # If no status lookup provided, we're done (only special cases apply)
-    if status_lookup is None or not status_lookup:
+    if status_lookup is None or not len(status_lookup):
+        result['is_full_time'] = is_full_time
         logger.info(f"Added is_full_time indicator using only special cases")
         logger.info(f"Employees marked as Full-Time: {result['is_full_time'].sum()} rows")
         return result
     
-    # OPTIMIZATION: Process each employee separately to minimize row-by-row operations
-    for emp_id in result['employee_id'].dropna().unique():
-        # Skip special cases that have already been handled
-        if emp_id in special_case_ids:
-            continue
-            
-        # Skip if this employee isn't in the status lookup
-        if emp_id not in status_lookup:
-            continue
-            
-        # Get status history for this employee
-        status_history = status_lookup[emp_id]
-        if not status_history:
-            continue
-            
-        # Get all rows for this employee
-        emp_mask = result['employee_id'] == emp_id
-        emp_rows = result[emp_mask]
-        
-        # For each date, find the applicable status
-        for date, status_rows in emp_rows.groupby('date_only'):
-            # Find the most recent status as of this date
-            most_recent_status = None
-            for change_date, status in status_history:
-                if change_date <= date:
-                    most_recent_status = status
-                else:
-                    break
-                    
-            # Mark as full-time if the status is 'Full-Time'
-            if most_recent_status == 'Full-Time':
-                date_mask = (result['employee_id'] == emp_id) & (result['date_only'] == date)
-                result.loc[date_mask, 'is_full_time'] = True
+    if not isinstance(status_lookup, StatusChangeTable):
+        status_lookup = StatusChangeTable.from_lookup(status_lookup)
+    
+    # Most recent status change on or before each row's date; for several
+    # changes on the same date the last one recorded wins
+    is_full_time |= status_lookup.has_status_on(result['employee_id'], result['date_only'], 'Full-Time')
+    result['is_full_time'] = is_full_time
     
     logger.info(f"Added is_full_time indicator to {len(result)} rows")
     logger.info(f"Employees marked as Full-Time: {result['is_full_time'].sum()} rows")
@@ -488,7 +445,7 @@ def add_time_analysis_columns(df: pd.DataFrame) -> pd.DataFrame:
             if pd.api.types.is_datetime64_any_dtype(df['Date/time']):
                 result['hour'] = df['Date/time'].dt.hour
             else:
-                parsed_time = pd.to_datetime(df['Date/time'], dayfirst=True)
+                parsed_time = parse_key_card_datetime(df['Date/time'])
                 result['hour'] = parsed_time.dt.hour
         else:
             raise KeyError("Neither 'parsed_time' nor 'Date/time' column found in DataFrame")
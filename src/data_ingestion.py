@@ -6,26 +6,76 @@ import logging
 import os
 import sys
 import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.config import DEFAULT_ANALYSIS_DAYS
-from src.utils import optimize_dataframe_memory, handle_empty_dataframe
+from src.config import (
+    DEFAULT_ANALYSIS_DAYS,
+    KEY_CARD_DATETIME_FORMAT,
+    KEY_CARD_SCHEMA,
+    EMPLOYEE_INFO_SCHEMA,
+    EMPLOYMENT_HISTORY_SCHEMA,
+    KEY_CARD_CHUNK_SIZE
+)
+from src.utils import (
+    optimize_dataframe_memory,
+    handle_empty_dataframe,
+    parse_key_card_datetime,
+    concat_chunks,
+    schema_read_options,
+    apply_schema_types
+)
+from src.data_cache import (
+    read_parquet_mirror,
+    load_dataset_manifest,
+    write_dataset_manifest,
+    update_dataset_manifest,
+    employee_keys
+)
+from src.key_card_index import open_key_card_range, build_key_card_index, load_key_card_index
+from src.row_hash_index import (
+    load_row_hash_index,
+    save_row_hash_index,
+    normalize_key_card_rows,
+    hash_key_card_rows,
+    find_new_rows,
+    insert_hashes
+)
 
 # Set up logger
 logger = logging.getLogger("attendance_dashboard.data_ingestion")
 
 def load_key_card_data(filepath: str, start_date: str = None, end_date: str = None, 
-                       last_n_days: int = None, optimize_memory: bool = False) -> pd.DataFrame:
+                       last_n_days: int = None, optimize_memory: bool = False,
+                       use_cache: bool = True, stream: bool = False,
+                       chunksize: int = KEY_CARD_CHUNK_SIZE) -> pd.DataFrame:
     """
     Load key card CSV data with optional date filtering.
     
+    Only the columns listed in KEY_CARD_SCHEMA are loaded, with the dtypes
+    defined there.
+    
+    When use_cache is True (and pyarrow is installed) the data is read through a
+    Parquet mirror of the CSV that is row-grouped by month, so only the months
+    overlapping the requested date range are read from disk. The mirror is
+    rebuilt automatically whenever the CSV changes.
+    
+    When stream is True the CSV is read in chunks of chunksize rows. Each chunk
+    is parsed, filtered to the date range and downcast before being kept, so peak memory scales with the filtered
+    output rather than the raw file. A stale Parquet mirror is not rebuilt in
+    this mode because rebuilding it needs the whole file in memory.
+    
     Args:
         filepath: Path to CSV file
         start_date: Optional start date string in format 'YYYY-MM-DD'
         end_date: Optional end date string in format 'YYYY-MM-DD'
         last_n_days: If provided, load only the last N days of data
         optimize_memory: Whether to optimize memory usage (slower but uses less RAM)
+        use_cache: Whether to read through the Parquet mirror of the CSV
+        stream: Whether to read the CSV in bounded-memory chunks
+        chunksize: Number of rows per chunk when streaming
         
     Returns:
         Filtered DataFrame with key card data
@@ -36,30 +86,8 @@ def load_key_card_data(filepath: str, start_date: str = None, end_date: str = No
             logger.error(f"File not found: {filepath}")
             return pd.DataFrame()
             
-        # Define dtypes for columns to prevent mixed types
-        dtype_dict = {
-            'User': str,
-            'Event': str,
-            'Where': str,
-            'Date/time': str,
-            'Card Number': str,  # Column 5
-            'Door': str,         # Column 6
-            'Employee #': str
-        }
-        
-        # Log the loading operation
-        logger.info(f"Loading key card data from {filepath}")
-        
-        # Load the data with specified dtypes and low_memory=False to avoid mixed type warnings
-        df = pd.read_csv(filepath, dtype=dtype_dict, low_memory=False)
-        
-        # Check if data was loaded successfully
-        if handle_empty_dataframe(df, "load_key_card_data", logger):
-            return pd.DataFrame()
-            
-        # Log the initial data size
-        initial_size = len(df)
-        logger.info(f"Loaded {initial_size:,} records from key card data")
+        # Columns to load and their dtypes come from the schema registry
+        read_options = schema_read_options(KEY_CARD_SCHEMA)
         
         # Calculate date range for filtering
         if last_n_days:
@@ -70,44 +98,35 @@ def load_key_card_data(filepath: str, start_date: str = None, end_date: str = No
             end_date = end_date or datetime.now().strftime("%Y-%m-%d")
             logger.info(f"Calculated date range: {start_date} to {end_date}")
         
-        # Only filter if dates are specified
-        if start_date or end_date:
-            logger.info(f"Applying date filter: {start_date or 'beginning'} to {end_date or 'end'}")
+        df = None
+        if use_cache:
+            df = read_parquet_mirror(filepath, start_date=start_date, end_date=end_date,
+                                     dtype=read_options['dtype'], columns=list(KEY_CARD_SCHEMA),
+                                     refresh=not stream)
+            if df is not None:
+                logger.info(f"Loaded {len(df):,} records from Parquet mirror of {filepath}")
+                if stream:
+                    df = _downcast_key_card_chunk(df)
+        
+        if df is None and stream:
+            df = _stream_key_card_csv(filepath, start_date, end_date, read_options, chunksize)
+        elif df is None:
+            df = _read_key_card_csv(filepath, start_date, end_date, read_options)
             
-            # Use try-except to catch parsing errors
-            try:
-                # If Date/time is already a datetime, skip conversion
-                if not pd.api.types.is_datetime64_any_dtype(df['Date/time']):
-                    df['Date/time'] = pd.to_datetime(df['Date/time'], dayfirst=True, errors='coerce')
-                    
-                    # Log rows with parsing errors
-                    nan_dates = df['Date/time'].isna().sum()
-                    if nan_dates > 0:
-                        logger.warning(f"Found {nan_dates} rows with invalid dates (NaT)")
-                        
-                # Apply date filters
-                if start_date:
-                    start_dt = pd.to_datetime(start_date)
-                    df = df[df['Date/time'] >= start_dt]
-                
-                if end_date:
-                    end_dt = pd.to_datetime(end_date)
-                    df = df[df['Date/time'] <= end_dt]
-                    
-                # Log the filtering results
-                filtered_size = len(df)
-                reduction_pct = (1 - filtered_size / initial_size) * 100 if initial_size > 0 else 0
-                logger.info(f"After date filtering: {filtered_size:,} records ({reduction_pct:.1f}% reduction)")
-                
-            except Exception as e:
-                logger.error(f"Error during date filtering: {str(e)}")
-                # Continue with unfiltered data if there's an error
+            # Record the dataset metadata if this load was the first to see the file
+            # (streaming loads skip this - it would need the whole file in memory)
+            if load_dataset_manifest(filepath, build=False) is None:
+                full_read = not (start_date or end_date) and not df.empty
+                write_dataset_manifest(filepath, df if full_read else None)
+        
+        # Check if data was loaded successfully
+        if handle_empty_dataframe(df, "load_key_card_data", logger):
+            return pd.DataFrame()
         
         # Add date_only column for faster date comparisons
         try:
+            df = apply_schema_types(df, KEY_CARD_SCHEMA)
             if 'Date/time' in df.columns:
-                if not pd.api.types.is_datetime64_any_dtype(df['Date/time']):
-                    df['Date/time'] = pd.to_datetime(df['Date/time'], dayfirst=True, errors='coerce')
                 df['date_only'] = df['Date/time'].dt.date
                 logger.debug("Added date_only column")
         except Exception as e:
@@ -123,9 +142,128 @@ def load_key_card_data(filepath: str, start_date: str = None, end_date: str = No
     except Exception as e:
         logger.error(f"Critical error loading key card data: {str(e)}")
         return pd.DataFrame()
+
+def _read_key_card_csv(filepath: str, start_date: str, end_date: str, read_options: dict) -> pd.DataFrame:
+    """
+    Read the raw key card CSV in full and apply the date filter in memory.
+    
+    Args:
+        filepath: Path to CSV file
+        start_date: Optional start date string in format 'YYYY-MM-DD'
+        end_date: Optional end date string in format 'YYYY-MM-DD'
+        read_options: usecols/dtype arguments for pd.read_csv from schema_read_options
+        
+    Returns:
+        DataFrame with key card data
+    """
+    # Log the loading operation
+    logger.info(f"Loading key card data from {filepath}")
+    
+    # Seek straight to the requested days if the file has an up-to-date index
+    source = open_key_card_range(filepath, start_date, end_date)
+    try:
+        # Load only the schema columns, with low_memory=False to avoid mixed type warnings
+        df = pd.read_csv(source or filepath, low_memory=False, **read_options)
+    finally:
+        if source is not None:
+            source.close()
+    
+    if df.empty:
+        return df
+        
+    # Log the initial data size
+    initial_size = len(df)
+    logger.info(f"Loaded {initial_size:,} records from key card data")
+    
+    # Only filter if dates are specified
+    if start_date or end_date:
+        logger.info(f"Applying date filter: {start_date or 'beginning'} to {end_date or 'end'}")
+        
+        # Use try-except to catch parsing errors
+        try:
+            # If Date/time is already a datetime, skip conversion
+            if not pd.api.types.is_datetime64_any_dtype(df['Date/time']):
+                df['Date/time'] = parse_key_card_datetime(df['Date/time'])
+                
+                # Log rows with parsing errors
+                nan_dates = df['Date/time'].isna().sum()
+                if nan_dates > 0:
+                    logger.warning(f"Found {nan_dates} rows with invalid dates (NaT)")
+                    
+            # Apply date filters
+            if start_date:
+                start_dt = pd.to_datetime(start_date)
+                df = df[df['Date/time'] >= start_dt]
+            
+            if end_date:
+                end_dt = pd.to_datetime(end_date)
+                df = df[df['Date/time'] <= end_dt]
+                
+            # Log the filtering results
+            filtered_size = len(df)
+            reduction_pct = (1 - filtered_size / initial_size) * 100 if initial_size > 0 else 0
+            logger.info(f"After date filtering: {filtered_size:,} records ({reduction_pct:.1f}% reduction)")
+            
+        except Exception as e:
+            logger.error(f"Error during date filtering: {str(e)}")
+            # Continue with unfiltered data if there's an error
     
     return df
 
+def _downcast_key_card_chunk(chunk: pd.DataFrame) -> pd.DataFrame:
+    """Convert the string columns of a key card chunk to categoricals."""
+    chunk = chunk.copy()
+    for col in chunk.columns:
+        if col != 'Date/time' and chunk[col].dtype == object:
+            chunk[col] = chunk[col].astype('category')
+    return chunk
+
+def _stream_key_card_csv(filepath: str, start_date: str, end_date: str, read_options: dict,
+                         chunksize: int) -> pd.DataFrame:
+    """
+    Read the raw key card CSV in chunks, keeping only rows inside the date range.
+    
+    Args:
+        filepath: Path to CSV file
+        start_date: Optional start date string in format 'YYYY-MM-DD'
+        end_date: Optional end date string in format 'YYYY-MM-DD'
+        read_options: usecols/dtype arguments for pd.read_csv from schema_read_options
+        chunksize: Number of rows per chunk
+        
+    Returns:
+        DataFrame with the schema columns, strings stored as categoricals
+    """
+    logger.info(f"Streaming key card data from {filepath} in chunks of {chunksize:,} rows")
+    
+    start_dt = pd.to_datetime(start_date) if start_date else None
+    end_dt = pd.to_datetime(end_date) if end_date else None
+    
+    # Seek straight to the requested days if the file has an up-to-date index
+    source = open_key_card_range(filepath, start_date, end_date)
+    
+    chunks = []
+    total_rows = 0
+    try:
+        for chunk in pd.read_csv(source or filepath, chunksize=chunksize, **read_options):
+            total_rows += len(chunk)
+            chunk['Date/time'] = parse_key_card_datetime(chunk['Date/time'])
+            
+            if start_dt is not None:
+                chunk = chunk[chunk['Date/time'] >= start_dt]
+            if end_dt is not None:
+                chunk = chunk[chunk['Date/time'] <= end_dt]
+            
+            if not chunk.empty:
+                chunks.append(_downcast_key_card_chunk(chunk))
+    finally:
+        if source is not None:
+            source.close()
+    
+    df = concat_chunks(chunks)
+    
+    logger.info(f"Streamed {total_rows:,} records, kept {len(df):,} within the date range")
+    return df
+
 def load_employee_info(filepath: str, optimize_memory: bool = False) -> pd.DataFrame:
     """
     Load employee information data.
@@ -145,18 +283,8 @@ def load_employee_info(filepath: str, optimize_memory: bool = False) -> pd.DataF
             
         logger.info(f"Loading employee information from {filepath}")
         
-        # Define dtypes for columns to prevent mixed types
-        dtype_dict = {
-            'Employee ID': str,
-            'Last name, First name': str,
-            'Location': str,
-            'Working Status': str,
-            'Status': str,
-            'Division': str
-        }
-        
-        # Load the data with specified dtypes
-        df = pd.read_csv(filepath, dtype=dtype_dict, low_memory=False)
+        # Load only the columns in the schema registry
+        df = pd.read_csv(filepath, low_memory=False, **schema_read_options(EMPLOYEE_INFO_SCHEMA))
         
         # Check if data was loaded successfully
         if handle_empty_dataframe(df, "load_employee_info", logger):
@@ -164,22 +292,11 @@ def load_employee_info(filepath: str, optimize_memory: bool = False) -> pd.DataF
         
         logger.info(f"Loaded {len(df):,} employee records")
         
-        # Auto-detect date columns and convert them
-        date_columns = ['Hire Date', 'Original Hire Date', 
-                       'Employment Status: Date', 'Resignation Date']
-        
-        for col in date_columns:
-            if col in df.columns:
-                try:
-                    # First try with dayfirst=True since our data is likely in DD/MM/YYYY format
-                    df[col] = pd.to_datetime(df[col], dayfirst=True, errors='coerce')
-                    
-                    # Log NaT values
-                    nan_dates = df[col].isna().sum()
-                    if nan_dates > 0:
-                        logger.warning(f"Found {nan_dates} invalid dates in column '{col}'")
-                except Exception as e:
-                    logger.error(f"Error converting column '{col}' to datetime: {str(e)}")
+        # Convert IDs and dates (DD/MM/YYYY) to their schema types
+        try:
+            df = apply_schema_types(df, EMPLOYEE_INFO_SCHEMA, logger)
+        except Exception as e:
+            logger.error(f"Error converting employee columns: {str(e)}")
         
         # Optimize memory usage if requested
         if optimize_memory:
@@ -211,14 +328,8 @@ def load_employment_history(filepath: str, optimize_memory: bool = False) -> pd.
             
         logger.info(f"Loading employment history from {filepath}")
         
-        # Define column types
-        dtype_dict = {
-            'Employee': str,
-            'Employment Status': 'category',  # Use category for low cardinality columns
-        }
-        
-        # Load the CSV file
-        df = pd.read_csv(filepath, dtype=dtype_dict, low_memory=False)
+        # Load only the columns in the schema registry
+        df = pd.read_csv(filepath, low_memory=False, **schema_read_options(EMPLOYMENT_HISTORY_SCHEMA))
         
         # Check if data was loaded successfully
         if handle_empty_dataframe(df, "load_employment_history", logger):
@@ -226,13 +337,7 @@ def load_employment_history(filepath: str, optimize_memory: bool = False) -> pd.
         
         # Ensure Date is parsed as datetime
         try:
-            df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
-            
-            # Log NaT values
-            nan_dates = df['Date'].isna().sum()
-            if nan_dates > 0:
-                logger.warning(f"Found {nan_dates} invalid dates in employment history")
-                
+            df = apply_schema_types(df, EMPLOYMENT_HISTORY_SCHEMA, logger)
         except Exception as e:
             logger.error(f"Error converting 'Date' to datetime: {str(e)}")
             # Continue with potentially invalid dates
@@ -256,17 +361,84 @@ def load_employment_history(filepath: str, optimize_memory: bool = False) -> pd.
         logger.error(f"Critical error loading employment history: {str(e)}")
         return pd.DataFrame()
 
-def calculate_default_date_range(days=DEFAULT_ANALYSIS_DAYS):
+def load_sources_concurrently(key_card_filepath: str, employee_filepath: str, history_filepath: str = None,
+                              timings: dict = None, errors: dict = None, **key_card_kwargs) -> tuple:
+    """
+    Load the key card, employee and employment history files concurrently.
+    
+    Each source is read on its own thread, so the two small files are parsed
+    while the large key card file is still being read (pd.read_csv releases
+    the GIL while tokenizing). Per-source timings are logged together with the
+    wall-clock time, showing how much of the work overlapped.
+    
+    Args:
+        key_card_filepath: Path to the key card CSV
+        employee_filepath: Path to the employee info CSV
+        history_filepath: Optional path to the employment history CSV; skipped if None
+        timings: Optional dictionary filled with the seconds each source took,
+                 keyed by source name, plus 'total' for the wall-clock time
+        errors: Optional dictionary filled with the error message of each source
+                that raised, keyed by source name
+        **key_card_kwargs: Extra arguments for load_key_card_data (dates, stream, ...)
+        
+    Returns:
+        Tuple of (key_card_df, employee_df, history_df); a source that raised,
+        or was skipped, is returned as None
+    """
+    loaders = {
+        'key_card': lambda: load_key_card_data(key_card_filepath, **key_card_kwargs),
+        'employee_info': lambda: load_employee_info(employee_filepath)
+    }
+    if history_filepath is not None:
+        loaders['employment_history'] = lambda: load_employment_history(history_filepath)
+    
+    timings = timings if timings is not None else {}
+    errors = errors if errors is not None else {}
+    start_time = time.perf_counter()
+    
+    def timed(name):
+        source_start = time.perf_counter()
+        try:
+            return loaders[name]()
+        except Exception as e:
+            logger.error(f"Failed to load {name} data: {str(e)}")
+            errors[name] = str(e)
+            return None
+        finally:
+            timings[name] = time.perf_counter() - source_start
+    
+    with ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix='loader') as executor:
+        futures = {name: executor.submit(timed, name) for name in loaders}
+        results = {name: future.result() for name, future in futures.items()}
+    
+    timings['total'] = time.perf_counter() - start_time
+    source_total = sum(seconds for name, seconds in timings.items() if name in loaders)
+    for name in loaders:
+        logger.info(f"Loaded {name} in {timings[name]:.2f} seconds")
+    logger.info(f"Loaded {len(loaders)} sources in {timings['total']:.2f} seconds wall-clock "
+                f"({source_total:.2f} seconds of loading, {max(source_total - timings['total'], 0):.2f} overlapped)")
+    
+    return results['key_card'], results['employee_info'], results.get('employment_history')
+
+def calculate_default_date_range(days=DEFAULT_ANALYSIS_DAYS, filepath: str = None):
     """
-    Calculate default date range based on today's date.
+    Calculate default date range ending today, or at the most recent swipe in a data file.
     
     Args:
         days: Number of days to look back (default: from config)
+        filepath: Optional key card CSV; the range then ends at the latest timestamp
+                  recorded in its metadata manifest
     
     Returns:
         tuple: (start_date, end_date) as YYYY-MM-DD strings
     """
     end_date = datetime.now()
+    if filepath is not None:
+        manifest = load_dataset_manifest(filepath)
+        if manifest and manifest['max_timestamp'] is not None:
+            end_date = manifest['max_timestamp'].to_pydatetime()
+        else:
+            logger.warning(f"No dataset manifest for {filepath} - using today's date")
     start_date = end_date - timedelta(days=days)
     
     # Format dates as YYYY-MM-DD strings
@@ -277,18 +449,23 @@ def calculate_default_date_range(days=DEFAULT_ANALYSIS_DAYS):
     return start_str, end_str
 
 def merge_key_card_data(existing_filepath: str, new_filepath: str, output_filepath: str = None, 
-                    create_backup: bool = True) -> pd.DataFrame:
+                    create_backup: bool = True, incremental: bool = False) -> pd.DataFrame:
     """
     Merge existing key card data with new data, removing duplicates.
     
+    In incremental mode the existing file is never reloaded: new rows are
+    hashed, checked against the persisted row-hash index and only rows not
+    already present are appended to the file (see append_key_card_data).
+    
     Args:
         existing_filepath: Path to existing key card data CSV
         new_filepath: Path to new key card data CSV
         output_filepath: Path to save the merged data (defaults to existing_filepath)
         create_backup: Whether to create a backup of the existing file
+        incremental: Whether to append only the new rows instead of rewriting the file
         
     Returns:
-        DataFrame containing the merged data
+        DataFrame containing the merged data, or only the appended rows in incremental mode
     """
     try:
         # Set default output filepath if not provided
@@ -307,6 +484,9 @@ def merge_key_card_data(existing_filepath: str, new_filepath: str, output_filepa
             logger.error(f"New file not found: {new_filepath}")
             return pd.DataFrame()
         
+        if incremental:
+            return append_key_card_data(existing_filepath, new_filepath, output_filepath)
+        
         # Create backup if requested
         if create_backup and existing_path.exists():
             backup_path = existing_path.with_suffix('.backup.csv')
@@ -338,8 +518,8 @@ def merge_key_card_data(existing_filepath: str, new_filepath: str, output_filepa
         # Ensure Date/time is parsed consistently for de-duplication
         try:
             if 'Date/time' in existing_df.columns:
-                existing_df['Date/time'] = pd.to_datetime(existing_df['Date/time'], dayfirst=True, errors='coerce')
-                new_df['Date/time'] = pd.to_datetime(new_df['Date/time'], dayfirst=True, errors='coerce')
+                existing_df['Date/time'] = parse_key_card_datetime(existing_df['Date/time'])
+                new_df['Date/time'] = parse_key_card_datetime(new_df['Date/time'])
         except Exception as e:
             logger.error(f"Error converting Date/time: {str(e)}")
         
@@ -359,19 +539,122 @@ def merge_key_card_data(existing_filepath: str, new_filepath: str, output_filepa
         
         # Convert Date/time back to string for consistent storage
         if 'Date/time' in combined_df.columns and pd.api.types.is_datetime64_any_dtype(combined_df['Date/time']):
-            combined_df['Date/time'] = combined_df['Date/time'].dt.strftime('%d/%m/%Y %H:%M:%S')
+            combined_df['Date/time'] = combined_df['Date/time'].dt.strftime(KEY_CARD_DATETIME_FORMAT)
         
         # Save the merged dataset
         logger.info(f"Saving merged dataset to {output_filepath}")
         combined_df.to_csv(output_filepath, index=False)
         logger.info(f"Merged data saved successfully")
         
+        # Keep the byte-offset index and metadata manifest in step with the file
+        build_key_card_index(output_filepath)
+        write_dataset_manifest(output_filepath, combined_df)
+        
         return combined_df
     
     except Exception as e:
         logger.error(f"Error merging key card data: {str(e)}")
         return pd.DataFrame()
 
+def append_key_card_data(existing_filepath: str, new_filepath: str, output_filepath: str = None) -> pd.DataFrame:
+    """
+    Append the rows of new_filepath that are not already in existing_filepath.
+    
+    Rows are compared on all columns after normalising timestamps to
+    KEY_CARD_DATETIME_FORMAT, matching the de-duplication of a full merge.
+    The work done is proportional to the size of the new file: the history is
+    only touched through its row-hash index, which is built once (in chunks)
+    if it is missing or out of date. No backup copy is made; the file is only
+    ever extended, so an append can be undone by truncating it to its
+    previous size, which is logged.
+    
+    New rows are appended oldest first, so an oldest-first file stays sorted
+    (if they are all newer than its last row). A newest-first file, as written
+    by the combiner and the raw exports, cannot stay sorted when rows are
+    added at its end: the day index then no longer supports seeks and
+    date-filtered loads scan the whole file until it is rebuilt with the
+    combiner (combine_key_card_data.py). This is logged as a warning.
+    
+    Args:
+        existing_filepath: Path to existing key card data CSV
+        new_filepath: Path to new key card data CSV
+        output_filepath: Path to append to (defaults to existing_filepath; a
+                         different path starts as a copy of the existing file)
+        
+    Returns:
+        DataFrame with the rows that were appended (empty if there were none),
+        or an empty DataFrame without columns on error
+    """
+    try:
+        if output_filepath is None:
+            output_filepath = existing_filepath
+        if Path(output_filepath).resolve() != Path(existing_filepath).resolve():
+            logger.info(f"Copying {existing_filepath} to {output_filepath} before appending")
+            shutil.copy2(existing_filepath, output_filepath)
+        
+        columns = pd.read_csv(output_filepath, nrows=0).columns.tolist()
+        new_df = pd.read_csv(new_filepath, dtype=str, low_memory=False)
+        logger.info(f"Loaded {len(new_df):,} rows from new file")
+        
+        if set(new_df.columns) != set(columns):
+            logger.error("Column mismatch between existing and new data - use a full merge instead")
+            logger.error(f"Existing columns: {columns}")
+            logger.error(f"New columns: {new_df.columns.tolist()}")
+            return pd.DataFrame()
+        
+        # Capture the manifest and indexes describing the file before it changes
+        previous_manifest = load_dataset_manifest(output_filepath)
+        previous_day_index = load_key_card_index(output_filepath)
+        index = load_row_hash_index(output_filepath)
+        if index is None:
+            return pd.DataFrame()
+        index_hashes, employees = index
+        
+        new_df = normalize_key_card_rows(new_df, columns)
+        row_hashes = hash_key_card_rows(new_df)
+        new_positions = find_new_rows(index_hashes, row_hashes)
+        # Append in time order, so an oldest-first file stays seekable by the day index
+        # (appending to a newest-first file always leaves it unsorted)
+        new_times = parse_key_card_datetime(new_df['Date/time'].iloc[new_positions])
+        new_positions = new_positions[np.argsort(new_times.to_numpy(), kind='stable')]
+        appended = new_df.iloc[new_positions].reset_index(drop=True)
+        logger.info(f"{len(appended):,} of {len(new_df):,} rows are new")
+        
+        if appended.empty:
+            return appended
+        
+        # Make sure the appended rows start on their own line
+        previous_size = os.path.getsize(output_filepath)
+        with open(output_filepath, 'rb+') as f:
+            f.seek(max(previous_size - 1, 0))
+            if previous_size and f.read(1) != b'\n':
+                f.write(b'\n')
+        logger.info(f"Appending to {output_filepath} (previous size {previous_size:,} bytes)")
+        appended.to_csv(output_filepath, mode='a', header=False, index=False)
+        
+        # Extend the sidecars instead of rebuilding them from the whole file
+        if 'User' in appended.columns:
+            employees = np.union1d(employees, employee_keys(appended['User']).astype(str))
+        save_row_hash_index(output_filepath, insert_hashes(index_hashes, row_hashes[new_positions]), employees)
+        day_index = build_key_card_index(output_filepath)
+        if (previous_day_index is not None and previous_day_index['order'] != 'unsorted'
+                and day_index is not None and day_index['order'] == 'unsorted'):
+            logger.warning(f"Appending left {output_filepath} unsorted by time (it was "
+                           f"{'newest' if previous_day_index['order'] == 'desc' else 'oldest'}-first), so "
+                           f"date-filtered loads will scan the whole file. Rebuild it with "
+                           f"combine_key_card_data.py to restore seeks")
+        if previous_manifest is not None:
+            update_dataset_manifest(output_filepath, previous_manifest, appended, int(len(employees)))
+        else:
+            write_dataset_manifest(output_filepath)
+        
+        logger.info(f"Appended {len(appended):,} rows to {output_filepath}")
+        return appended
+    
+    except Exception as e:
+        logger.error(f"Error appending key card data: {str(e)}")
+        return pd.DataFrame()
+
 
 if __name__ == "__main__":
     # Example usage
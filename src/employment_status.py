@@ -0,0 +1,180 @@
+"""
+Columnar employment status history with batched as-of lookups.
+
+The status history is stored as parallel NumPy arrays sorted by employee and
+change time: employee IDs, change times as int64 nanoseconds and status codes
+as int8 (indices into a small array of status labels). "What was employee e's
+status on date d?" is then answered for whole arrays of (e, d) pairs with a
+single np.searchsorted over a composite integer key.
+"""
+import pandas as pd
+import numpy as np
+import logging
+
+logger = logging.getLogger("attendance_dashboard.employment_status")
+
+# Status code returned when an employee has no status change on or before a date
+UNKNOWN_STATUS = -1
+
+class StatusChangeTable:
+    """
+    Employment status changes sorted by (employee_id, change time).
+
+    Attributes:
+        employee_ids: float64 employee ID of each change
+        change_times: int64 nanoseconds since epoch of each change
+        status_codes: int8 index into statuses of each change
+        statuses: Array of status labels
+    """
+
+    def __init__(self, employee_ids: np.ndarray, change_times: np.ndarray,
+                 status_codes: np.ndarray, statuses: np.ndarray):
+        self.employee_ids = employee_ids
+        self.change_times = change_times
+        self.status_codes = status_codes
+        self.statuses = statuses
+
+        # Composite search key: employee position, then the rank of the change time
+        # among all distinct change times (ranks keep the key small enough for int64)
+        self._unique_employees = np.unique(employee_ids)
+        self._unique_times = np.unique(change_times)
+        employee_codes = np.searchsorted(self._unique_employees, employee_ids)
+        time_ranks = np.searchsorted(self._unique_times, change_times, side='right')
+        self._stride = len(self._unique_times) + 1
+        self._keys = employee_codes.astype(np.int64) * self._stride + time_ranks
+
+    @classmethod
+    def from_frame(cls, changes: pd.DataFrame) -> 'StatusChangeTable':
+        """
+        Build the table from a DataFrame of changes in the order they were recorded.
+
+        Changes without an employee ID or date are dropped. The sort is stable,
+        so when an employee has several changes at the same time the last one
+        recorded wins.
+
+        Args:
+            changes: DataFrame with employee_id, change_date and status columns
+
+        Returns:
+            StatusChangeTable
+        """
+        employee_ids = pd.to_numeric(changes['employee_id'], errors='coerce').to_numpy(dtype=float)
+        change_times = pd.to_datetime(changes['change_date'], errors='coerce')
+        valid = ~np.isnan(employee_ids) & change_times.notna().to_numpy()
+
+        employee_ids = employee_ids[valid]
+        change_times = change_times.to_numpy()[valid].astype(np.int64)
+        codes, statuses = pd.factorize(changes['status'].to_numpy()[valid])
+        if len(statuses) > np.iinfo(np.int8).max:
+            raise ValueError(f"Too many distinct statuses for int8 codes: {len(statuses)}")
+
+        order = np.lexsort((change_times, employee_ids))
+        return cls(employee_ids[order], change_times[order], codes[order].astype(np.int8),
+                   np.asarray(statuses, dtype=object))
+
+    @classmethod
+    def from_lookup(cls, status_lookup: dict) -> 'StatusChangeTable':
+        """Build the table from a dict of employee_id -> [(date, status), ...]."""
+        records = [(emp_id, change_date, status)
+                   for emp_id, history in status_lookup.items()
+                   for change_date, status in history]
+        return cls.from_frame(pd.DataFrame(records, columns=['employee_id', 'change_date', 'status']))
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+    def status_codes_on(self, employee_ids, dates) -> np.ndarray:
+        """
+        Look up the status code of each employee on each date.
+
+        Args:
+            employee_ids: Array-like of employee IDs
+            dates: Array-like of dates, aligned with employee_ids
+
+        Returns:
+            int8 array of status codes; UNKNOWN_STATUS where the employee has
+            no change on or before the date (or the ID/date is missing)
+        """
+        query_ids = pd.to_numeric(pd.Series(employee_ids), errors='coerce').to_numpy(dtype=float)
+        query_times = pd.to_datetime(pd.Series(dates), errors='coerce')
+        result = np.full(len(query_ids), UNKNOWN_STATUS, dtype=np.int8)
+        if len(self) == 0 or len(query_ids) == 0:
+            return result
+
+        # Position of each queried employee in the table (only exact matches count)
+        employee_codes = np.searchsorted(self._unique_employees, query_ids)
+        employee_codes = np.minimum(employee_codes, len(self._unique_employees) - 1)
+        known = (self._unique_employees[employee_codes] == query_ids) & query_times.notna().to_numpy()
+        if not known.any():
+            return result
+
+        # Number of distinct change times on or before each query date
+        time_ranks = np.searchsorted(self._unique_times, query_times.to_numpy()[known].astype(np.int64),
+                                     side='right')
+        query_keys = employee_codes[known].astype(np.int64) * self._stride + time_ranks
+
+        # Last change with a key <= the query key, if it belongs to the same employee
+        positions = np.searchsorted(self._keys, query_keys, side='right') - 1
+        same_employee = (positions >= 0) & (self._keys[np.maximum(positions, 0)] // self._stride
+                                            == employee_codes[known])
+        codes = np.where(same_employee, self.status_codes[np.maximum(positions, 0)], UNKNOWN_STATUS)
+        result[known] = codes
+        return result
+
+    def statuses_on(self, employee_ids, dates) -> np.ndarray:
+        """Look up status labels on each date (None where unknown)."""
+        codes = self.status_codes_on(employee_ids, dates)
+        labels = np.append(self.statuses, None)
+        return labels[np.where(codes == UNKNOWN_STATUS, len(self.statuses), codes)]
+
+    def has_status_on(self, employee_ids, dates, status: str) -> np.ndarray:
+        """Return a boolean array that is True where the employee had the given status on the date."""
+        matches = np.flatnonzero(self.statuses == status)
+        if len(matches) == 0:
+            return np.zeros(len(employee_ids), dtype=bool)
+        return self.status_codes_on(employee_ids, dates) == matches[0]
+
+    def to_lookup(self) -> dict:
+        """Convert to the dict of employee_id -> sorted [(date, status), ...] lists."""
+        lookup = {}
+        times = pd.to_datetime(self.change_times)
+        for emp_id, change_time, code in zip(self.employee_ids.tolist(), times, self.status_codes.tolist()):
+            lookup.setdefault(emp_id, []).append((change_time, self.statuses[code] if code >= 0 else np.nan))
+        return lookup
+
+def employee_name_index(employee_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map employee names to IDs.
+
+    Rows without a name or ID are ignored; for repeated names the last row wins.
+
+    Args:
+        employee_df: DataFrame with 'Last name, First name' and 'employee_id' columns
+
+    Returns:
+        DataFrame with one row per name and 'Last name, First name' and 'employee_id' columns
+    """
+    names = employee_df[['Last name, First name', 'employee_id']].dropna()
+    return names.drop_duplicates('Last name, First name', keep='last')
+
+def build_status_change_table(history_df: pd.DataFrame, employee_df: pd.DataFrame) -> StatusChangeTable:
+    """
+    Build the status change table from the employment history with one join and sort.
+
+    History rows whose employee name doesn't match an employee are skipped.
+
+    Args:
+        history_df: DataFrame with 'Employee', 'Date' and 'Employment Status' columns
+        employee_df: DataFrame with 'Last name, First name' and 'employee_id' columns
+
+    Returns:
+        StatusChangeTable
+    """
+    changes = history_df[['Employee', 'Date', 'Employment Status']].merge(
+        employee_name_index(employee_df), left_on='Employee', right_on='Last name, First name', how='inner'
+    )
+    table = StatusChangeTable.from_frame(changes.rename(columns={'Date': 'change_date',
+                                                                 'Employment Status': 'status'}))
+    logger.info(f"Built status change table with {len(table):,} changes "
+                f"for {len(np.unique(table.employee_ids)):,} employees")
+    return table
@@ -0,0 +1,353 @@
+"""
+Sparse byte-offset index over the raw key card CSV.
+
+For an export sorted by time (oldest or newest first) the index records the
+byte offset of the first row of every day. A date-range load can then seek
+straight to the first relevant row and stop reading after the last one
+instead of scanning the whole file. The index is stored as a small JSON
+sidecar next to the CSV and can be extended incrementally when rows are
+appended to the end of the file.
+"""
+import pandas as pd
+import numpy as np
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.config import KEY_CARD_INDEX_SUFFIX, KEY_CARD_INDEX_BLOCK_BYTES
+from src.utils import parse_key_card_datetime
+from src.data_cache import file_fingerprint
+
+logger = logging.getLogger("attendance_dashboard.key_card_index")
+
+INDEX_VERSION = 1
+_TAIL_HASH_BYTES = 4096
+_NANOSECONDS_PER_DAY = 86_400 * 1_000_000_000
+
+class IndexBuildError(Exception):
+    """Raised when a file cannot be indexed (e.g. quoted fields containing newlines)."""
+
+def key_card_index_path(filepath: str) -> Path:
+    """Return the path of the byte-offset index for a CSV file."""
+    return Path(filepath).with_suffix(KEY_CARD_INDEX_SUFFIX)
+
+def _tail_hash(filepath: str, end: int) -> str:
+    """Hash the bytes immediately before offset end."""
+    with open(filepath, 'rb') as f:
+        f.seek(max(end - _TAIL_HASH_BYTES, 0))
+        return hashlib.sha1(f.read(min(end, _TAIL_HASH_BYTES))).hexdigest()
+
+def _read_header(filepath: str, time_column: str):
+    """
+    Read the header line of the CSV.
+
+    Returns:
+        Tuple of (header length in bytes including the newline, index of time_column)
+    """
+    with open(filepath, 'rb') as f:
+        header = f.readline()
+    columns = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+    if time_column not in columns:
+        raise IndexBuildError(f"Column '{time_column}' not found in header")
+    return len(header), columns.index(time_column)
+
+def _scan_day_runs(filepath: str, start_offset: int, time_column_index: int):
+    """
+    Scan the file from start_offset and find where each run of same-day rows begins.
+
+    Returns:
+        Tuple of (run days, run start offsets, number of rows scanned); days are
+        integer days since 1970-01-01
+    """
+    run_days = []
+    run_offsets = []
+    rows = 0
+    previous_day = None
+
+    with open(filepath, 'rb') as f:
+        f.seek(start_offset)
+        block_start = start_offset
+        carry = b''
+        while True:
+            data = f.read(KEY_CARD_INDEX_BLOCK_BYTES)
+            buffer = carry + data
+            if not buffer:
+                break
+
+            if data:
+                # Only process complete lines; keep the partial last line for the next block
+                last_newline = buffer.rfind(b'\n')
+                if last_newline == -1:
+                    carry = buffer
+                    continue
+                block, carry = buffer[:last_newline + 1], buffer[last_newline + 1:]
+            else:
+                # End of file: the remaining bytes are a final line without a newline
+                block, carry = buffer, b''
+
+            line_ends = np.flatnonzero(np.frombuffer(block, dtype=np.uint8) == ord('\n'))
+            line_starts = np.concatenate(([0], line_ends + 1))
+            if len(line_starts) and line_starts[-1] >= len(block):
+                line_starts = line_starts[:-1]
+
+            values = pd.read_csv(
+                io.BytesIO(block), header=None, usecols=[time_column_index], dtype=str,
+                skip_blank_lines=False
+            ).iloc[:, 0]
+            if len(values) != len(line_starts):
+                raise IndexBuildError("Row count does not match line count (quoted newlines or blank lines)")
+
+            times = parse_key_card_datetime(values)
+            if times.isna().any():
+                raise IndexBuildError("File contains rows with unparseable timestamps")
+
+            days = times.to_numpy().astype(np.int64) // _NANOSECONDS_PER_DAY
+            changes = np.flatnonzero(np.diff(days)) + 1
+            run_positions = np.concatenate(([0], changes))
+            if previous_day is not None and days[0] == previous_day:
+                run_positions = run_positions[1:]
+
+            run_days.extend(days[run_positions].tolist())
+            run_offsets.extend((block_start + line_starts[run_positions]).tolist())
+            previous_day = int(days[-1])
+            rows += len(days)
+            block_start += len(block)
+
+            if not data:
+                break
+
+    return run_days, run_offsets, rows
+
+def _sort_order(days: list) -> str:
+    """Classify run days as 'asc', 'desc' or 'unsorted'."""
+    if len(days) <= 1:
+        return 'asc'
+    diffs = np.diff(np.asarray(days, dtype=np.int64))
+    if (diffs > 0).all():
+        return 'asc'
+    if (diffs < 0).all():
+        return 'desc'
+    return 'unsorted'
+
+def _write_index(filepath: str, index: dict) -> None:
+    """Write the index atomically next to the CSV."""
+    index_path = key_card_index_path(filepath)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path)
+
+def build_key_card_index(filepath: str, time_column: str = 'Date/time', incremental: bool = True):
+    """
+    Build or update the byte-offset index for a key card CSV.
+
+    When incremental is True and the file has only grown since the last build
+    (same header, same bytes before the previously indexed end, previous end on
+    a line boundary), only the appended bytes are scanned.
+
+    Args:
+        filepath: Path to the CSV file
+        time_column: Name of the timestamp column
+        incremental: Whether to extend an existing index instead of rebuilding it
+
+    Returns:
+        The index dictionary, or None if the file could not be indexed
+    """
+    try:
+        size = os.path.getsize(filepath)
+        header_length, time_column_index = _read_header(filepath, time_column)
+
+        existing = load_key_card_index(filepath, check_fresh=False) if incremental else None
+        can_extend = (
+            existing is not None
+            and existing.get('header_length') == header_length
+            and existing.get('time_column') == time_column
+            and header_length <= existing['size'] <= size
+            and _tail_hash(filepath, existing['size']) == existing['tail_hash']
+        )
+        if can_extend and existing['size'] > header_length:
+            with open(filepath, 'rb') as f:
+                f.seek(existing['size'] - 1)
+                can_extend = f.read(1) == b'\n'
+
+        if can_extend:
+            logger.info(f"Extending key card index from byte {existing['size']:,} of {filepath}")
+            days, offsets, rows = _scan_day_runs(filepath, existing['size'], time_column_index)
+            if days and existing['days'] and days[0] == existing['days'][-1]:
+                days, offsets = days[1:], offsets[1:]
+            days = existing['days'] + days
+            offsets = existing['offsets'] + offsets
+            rows += existing['rows']
+        else:
+            logger.info(f"Building key card index for {filepath}")
+            days, offsets, rows = _scan_day_runs(filepath, header_length, time_column_index)
+
+        index = {
+            'version': INDEX_VERSION,
+            'fingerprint': file_fingerprint(filepath),
+            'time_column': time_column,
+            'size': size,
+            'tail_hash': _tail_hash(filepath, size),
+            'header_length': header_length,
+            'rows': rows,
+            'order': _sort_order(days),
+            'days': days,
+            'offsets': offsets
+        }
+        _write_index(filepath, index)
+
+        if index['order'] == 'unsorted':
+            logger.warning(f"{filepath} is not sorted by time - the index will not be used for seeks")
+        logger.info(f"Indexed {rows:,} rows across {len(days):,} day runs ({index['order']})")
+        return index
+
+    except IndexBuildError as e:
+        logger.warning(f"Cannot index {filepath}: {str(e)}")
+    except Exception as e:
+        logger.error(f"Error building key card index for {filepath}: {str(e)}")
+
+    # Remove any previous index so it is never used against a file it doesn't describe
+    key_card_index_path(filepath).unlink(missing_ok=True)
+    return None
+
+def load_key_card_index(filepath: str, check_fresh: bool = True):
+    """
+    Load the byte-offset index for a CSV file.
+
+    Args:
+        filepath: Path to the CSV file
+        check_fresh: Only return the index if it matches the current file fingerprint
+
+    Returns:
+        The index dictionary, or None if missing, unreadable or stale
+    """
+    index_path = key_card_index_path(filepath)
+    if not index_path.exists():
+        return None
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except Exception as e:
+        logger.warning(f"Could not read key card index {index_path}: {str(e)}")
+        return None
+
+    if index.get('version') != INDEX_VERSION:
+        return None
+    if check_fresh and index.get('fingerprint') != file_fingerprint(filepath):
+        logger.info(f"Key card index for {filepath} is stale")
+        return None
+    return index
+
+def locate_byte_range(index: dict, start_dt=None, end_dt=None):
+    """
+    Find the byte range of the rows between start_dt and end_dt (whole days).
+
+    Args:
+        index: Index dictionary from load_key_card_index
+        start_dt: Optional inclusive start timestamp
+        end_dt: Optional inclusive end timestamp
+
+    Returns:
+        Tuple of (start offset, end offset), or None if the file is unsorted
+    """
+    order = index['order']
+    if order == 'unsorted':
+        return None
+
+    days = index['days']
+    offsets = index['offsets']
+    data_start = index['header_length']
+    data_end = index['size']
+
+    def offset_at(position):
+        return offsets[position] if position < len(offsets) else data_end
+
+    start_day = pd.Timestamp(start_dt).value // _NANOSECONDS_PER_DAY if start_dt is not None else None
+    end_day = pd.Timestamp(end_dt).value // _NANOSECONDS_PER_DAY if end_dt is not None else None
+
+    if order == 'asc':
+        begin = offset_at(bisect_left(days, start_day)) if start_day is not None else data_start
+        end = offset_at(bisect_right(days, end_day)) if end_day is not None else data_end
+    else:
+        # Newest first: negate the days so they are ascending for bisect
+        negated = [-day for day in days]
+        begin = offset_at(bisect_left(negated, -end_day)) if end_day is not None else data_start
+        end = offset_at(bisect_right(negated, -start_day)) if start_day is not None else data_end
+
+    return begin, max(begin, end)
+
+class ByteRangeReader:
+    """
+    Read-only file-like object exposing the CSV header followed by one byte range.
+
+    pandas can parse it directly (including in chunks), so only the selected
+    part of the file is ever read from disk.
+    """
+
+    def __init__(self, filepath: str, header_length: int, start: int, end: int):
+        self._file = open(filepath, 'rb')
+        self._header = self._file.read(header_length)
+        self._file.seek(start)
+        self._remaining = end - start
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            data = self._header + self._file.read(self._remaining)
+            self._header = b''
+            self._remaining = 0
+            return data
+        if self._header:
+            data, self._header = self._header[:size], self._header[size:]
+            return data
+        data = self._file.read(min(size, self._remaining))
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def open_key_card_range(filepath: str, start_date=None, end_date=None):
+    """
+    Open only the part of a key card CSV that can contain rows in a date range.
+
+    Args:
+        filepath: Path to the CSV file
+        start_date: Optional inclusive start date
+        end_date: Optional inclusive end date
+
+    Returns:
+        ByteRangeReader positioned on the range, or None if there is no fresh,
+        usable index (callers should then scan the whole file)
+    """
+    if start_date is None and end_date is None:
+        return None
+
+    index = load_key_card_index(filepath)
+    if index is None:
+        return None
+
+    byte_range = locate_byte_range(
+        index,
+        pd.to_datetime(start_date) if start_date else None,
+        pd.to_datetime(end_date) if end_date else None
+    )
+    if byte_range is None:
+        logger.info(f"{filepath} is not sorted by time - falling back to a full scan")
+        return None
+
+    start, end = byte_range
+    logger.info(f"Seeking to bytes {start:,}-{end:,} of {index['size']:,} using the key card index")
+    return ByteRangeReader(filepath, index['header_length'], start, end)
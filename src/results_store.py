@@ -0,0 +1,277 @@
+"""
+Versioned store of precomputed dashboard results.
+
+main.py writes the combined dataset (swipe facts, employee dimension and
+doors) and the analyses of the standard date ranges to Parquet files under
+RESULTS_STORE_DIR/<version>/, where version is the data_version of the raw
+files. manifest.json is written last, so a version directory without one is
+incomplete and ignored. The dashboard reads from the store when there is a
+manifest for the current raw files and calculates everything live otherwise.
+"""
+import pandas as pd
+import numpy as np
+import json
+import logging
+import os
+import shutil
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.config import (
+    KEY_CARD_DATA_PATH,
+    EMPLOYEE_INFO_PATH,
+    EMPLOYMENT_HISTORY_PATH,
+    CACHE_VERSION,
+    RESULTS_STORE_DIR,
+    RESULTS_STORE_KEEP_VERSIONS
+)
+from src.data_cache import parquet_available, file_fingerprint, data_version, load_dataset_manifest
+from src.data_ingestion import load_sources_concurrently
+from src.analysis_pipeline import (
+    build_base_dataset,
+    build_analysis_inputs,
+    compute_analysis,
+    standard_date_ranges
+)
+
+logger = logging.getLogger("attendance_dashboard.results_store")
+
+MANIFEST_NAME = 'manifest.json'
+
+# Analyses stored per date range (the attendance table is one row per employee
+# per day and is not displayed, so it is left out)
+STORED_ANALYSES = [
+    'daily_aggregate',
+    'tue_thu_attendance',
+    'daily_counts',
+    'weekly_counts',
+    'period_summary',
+    'employee_summary',
+    'division_tue_thu',
+    'division_by_location'
+]
+
+def source_paths() -> list:
+    """Return the raw files the dashboard's data version is built from."""
+    return [str(KEY_CARD_DATA_PATH), str(EMPLOYEE_INFO_PATH), str(EMPLOYMENT_HISTORY_PATH)]
+
+def range_key(start_date, end_date) -> str:
+    """Return the identifier of a date range in the store."""
+    return f"{start_date}_to_{end_date}"
+
+def _read_frame(path: Path) -> pd.DataFrame:
+    """Read a stored frame, restoring NaN (rather than None) for missing strings."""
+    df = pd.read_parquet(path)
+    for col in df.select_dtypes(include=['object']).columns:
+        df[col] = df[col].where(df[col].notna(), np.nan)
+    return df
+
+def write_results_store(dataset, version: str, date_ranges: dict, sources: list = None,
+                        store_dir: Path = None):
+    """
+    Write a dataset and the analyses of some date ranges to the store.
+
+    Each date range is analysed the way the dashboard does it, on the slice of
+    the dataset for that range, so stored and live results are the same.
+
+    Args:
+        dataset: CombinedDataset with all the data (time-sorted, so the
+            dashboard can slice it)
+        version: Data version of the raw files (from data_version)
+        date_ranges: Dictionary of range name to (start_date, end_date) strings
+        sources: Paths of the raw files, recorded with their fingerprints
+        store_dir: Root directory of the store (default: RESULTS_STORE_DIR)
+
+    Returns:
+        The manifest dictionary, or None if the store could not be written
+    """
+    if not parquet_available():
+        logger.warning("pyarrow is not installed - skipping the results store")
+        return None
+
+    store_dir = Path(store_dir or RESULTS_STORE_DIR)
+    version_dir = store_dir / version
+    try:
+        # Start from an empty directory so no files of an earlier write are left behind
+        if version_dir.exists():
+            shutil.rmtree(version_dir)
+        (version_dir / 'ranges').mkdir(parents=True)
+
+        dataset.facts.to_parquet(version_dir / 'facts.parquet')
+        dataset.employees.to_parquet(version_dir / 'employees.parquet')
+        pd.DataFrame({'door': dataset.doors.to_numpy()}).to_parquet(version_dir / 'doors.parquet', index=False)
+
+        ranges = {}
+        for name, (start_date, end_date) in date_ranges.items():
+            key = range_key(start_date, end_date)
+            if key in ranges:
+                ranges[key]['names'].append(name)
+                continue
+
+            # Ranges that are not stored are calculated live by the dashboard
+            selection = dataset.filter_dates(start_date, end_date)
+            if len(selection) == 0:
+                logger.warning(f"No data for {name} ({start_date} to {end_date}), not storing its analyses")
+                continue
+
+            range_dir = version_dir / 'ranges' / key
+            range_dir.mkdir()
+            try:
+                inputs = build_analysis_inputs(selection, start_date, end_date)
+                analyses = {}
+                for metric in STORED_ANALYSES:
+                    compute_analysis(metric, inputs, start_date, end_date).to_parquet(range_dir / f'{metric}.parquet')
+                    analyses[metric] = f'ranges/{key}/{metric}.parquet'
+            except Exception as e:
+                logger.error(f"Error storing analyses for {name} ({start_date} to {end_date}): {str(e)}")
+                shutil.rmtree(range_dir, ignore_errors=True)
+                continue
+            ranges[key] = {'names': [name], 'start_date': start_date, 'end_date': end_date, 'analyses': analyses}
+            logger.info(f"Stored {len(analyses)} analyses for {name} ({start_date} to {end_date})")
+
+        manifest = {
+            'version': version,
+            'cache_version': CACHE_VERSION,
+            'sources': {
+                str(source): file_fingerprint(source) if Path(source).exists() else 'missing'
+                for source in (sources or [])
+            },
+            'created': pd.Timestamp.now().isoformat(),
+            'rows': int(len(dataset)),
+            'time_sorted': bool(dataset.time_sorted),
+            'dataset': {'facts': 'facts.parquet', 'employees': 'employees.parquet', 'doors': 'doors.parquet'},
+            'ranges': ranges
+        }
+
+        # The manifest marks the version as complete, so it is written last and atomically
+        manifest_path = version_dir / MANIFEST_NAME
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_path, manifest_path)
+        logger.info(f"Wrote results store {version_dir} ({len(dataset):,} swipes, {len(ranges)} date ranges)")
+
+        _prune_versions(store_dir, keep=version)
+        return manifest
+
+    except Exception as e:
+        logger.error(f"Error writing results store {version_dir}: {str(e)}")
+        return None
+
+def _prune_versions(store_dir: Path, keep: str) -> None:
+    """Remove all but the newest RESULTS_STORE_KEEP_VERSIONS version directories (never keep itself)."""
+    others = sorted((path for path in store_dir.iterdir() if path.is_dir() and path.name != keep),
+                    key=lambda path: path.stat().st_mtime, reverse=True)
+    for path in others[max(RESULTS_STORE_KEEP_VERSIONS - 1, 0):]:
+        shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Removed old results store version {path.name}")
+
+def load_results_manifest(version: str, store_dir: Path = None):
+    """
+    Load the manifest of a data version from the store.
+
+    Args:
+        version: Data version of the raw files (from data_version)
+        store_dir: Root directory of the store (default: RESULTS_STORE_DIR)
+
+    Returns:
+        Manifest dictionary with the version directory added as 'path', or
+        None if the version is not stored (or was stored by other code)
+    """
+    manifest_path = Path(store_dir or RESULTS_STORE_DIR) / version / MANIFEST_NAME
+    if not parquet_available() or not manifest_path.exists():
+        return None
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except Exception as e:
+        logger.warning(f"Error reading results manifest {manifest_path}: {str(e)}")
+        return None
+
+    if manifest.get('version') != version or manifest.get('cache_version') != CACHE_VERSION:
+        logger.info(f"Results manifest {manifest_path} does not match the data version, ignoring it")
+        return None
+    manifest['path'] = str(manifest_path.parent)
+    return manifest
+
+def read_stored_dataset(manifest: dict):
+    """
+    Read the stored combined dataset tables.
+
+    Args:
+        manifest: Manifest from load_results_manifest
+
+    Returns:
+        Tuple of (facts, employees, doors) for CombinedDataset, or None if they could not be read
+    """
+    version_dir = Path(manifest['path'])
+    try:
+        facts = pd.read_parquet(version_dir / manifest['dataset']['facts'])
+        employees = _read_frame(version_dir / manifest['dataset']['employees'])
+        doors = pd.Index(pd.read_parquet(version_dir / manifest['dataset']['doors'])['door'].to_numpy(dtype=object))
+        logger.info(f"Read stored dataset with {len(facts):,} swipes from {version_dir}")
+        return facts, employees, doors
+    except Exception as e:
+        logger.error(f"Error reading stored dataset from {version_dir}: {str(e)}")
+        return None
+
+def read_stored_analysis(manifest: dict, start_date, end_date, metric: str):
+    """
+    Read a stored analysis of a date range.
+
+    Args:
+        manifest: Manifest from load_results_manifest
+        start_date: First date of the range
+        end_date: Last date of the range
+        metric: One of STORED_ANALYSES
+
+    Returns:
+        DataFrame, or None if the analysis is not stored for the range
+    """
+    stored_range = manifest['ranges'].get(range_key(start_date, end_date))
+    if stored_range is None or metric not in stored_range['analyses']:
+        return None
+    try:
+        return _read_frame(Path(manifest['path']) / stored_range['analyses'][metric])
+    except Exception as e:
+        logger.error(f"Error reading stored {metric} for {start_date} to {end_date}: {str(e)}")
+        return None
+
+def update_results_store(store_dir: Path = None, today=None, force: bool = False):
+    """
+    Build the results store for the current raw files, unless it is up to date.
+
+    Loads and processes all the data the way the dashboard does and stores
+    the analyses of every standard date range (see standard_date_ranges).
+
+    Args:
+        store_dir: Root directory of the store (default: RESULTS_STORE_DIR)
+        today: Date the "Last 30 Days" range ends on (default: now)
+        force: Rewrite the store even if the current version is already stored
+
+    Returns:
+        The manifest dictionary, or None if the store could not be written
+    """
+    sources = source_paths()
+    version = data_version(sources)
+    if not force:
+        manifest = load_results_manifest(version, store_dir)
+        if manifest is not None:
+            logger.info(f"Results store is up to date (version {version})")
+            return manifest
+
+    key_card_manifest = load_dataset_manifest(str(KEY_CARD_DATA_PATH))
+    if key_card_manifest is None or key_card_manifest['max_timestamp'] is None:
+        logger.error("Key card data not found or contains no valid timestamps - skipping the results store")
+        return None
+
+    key_card_df, employee_df, history_df = load_sources_concurrently(*sources)
+    if key_card_df is None or employee_df is None:
+        logger.error("Failed to load the raw data - skipping the results store")
+        return None
+
+    dataset = build_base_dataset(key_card_df, employee_df, history_df, cache_key=version).sort_by_time()
+    date_ranges = standard_date_ranges(key_card_manifest['max_timestamp'], today)
+    return write_results_store(dataset, version, date_ranges, sources=sources, store_dir=store_dir)
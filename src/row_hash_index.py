@@ -0,0 +1,148 @@
+"""
+Persisted row-hash index used to de-duplicate appends to the key card CSV.
+
+Every row of the CSV is reduced to a 64-bit hash of its normalised values and
+the hashes are kept as a sorted NumPy array in a sidecar file next to the CSV.
+Checking a batch of new rows against the history is then a vectorized
+np.searchsorted over that array instead of reloading and de-duplicating the
+whole file. The sidecar also keeps the sorted set of employee keys so the
+dataset manifest can be updated without re-reading the CSV.
+"""
+import pandas as pd
+import numpy as np
+import logging
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.config import ROW_HASH_INDEX_SUFFIX, KEY_CARD_DATETIME_FORMAT, KEY_CARD_CHUNK_SIZE
+from src.utils import parse_key_card_datetime
+from src.data_cache import file_fingerprint, employee_keys
+
+logger = logging.getLogger("attendance_dashboard.row_hash_index")
+
+def row_hash_index_path(filepath: str) -> Path:
+    """Return the path of the row-hash index for a CSV file."""
+    return Path(filepath).with_suffix(ROW_HASH_INDEX_SUFFIX)
+
+def normalize_key_card_rows(df: pd.DataFrame, columns: list) -> pd.DataFrame:
+    """
+    Put key card rows in the form they are stored in the CSV.
+
+    Columns are reordered to match the file and timestamps are rewritten in
+    KEY_CARD_DATETIME_FORMAT, so '01/03/2024 09:15' and '01/03/2024 09:15:00'
+    are recognised as the same swipe. Unparseable timestamps are kept as-is.
+    """
+    df = df[columns].copy()
+    if 'Date/time' in columns:
+        original = df['Date/time']
+        formatted = parse_key_card_datetime(original).dt.strftime(KEY_CARD_DATETIME_FORMAT)
+        df['Date/time'] = formatted.where(formatted.notna(), original)
+    return df
+
+def hash_key_card_rows(df: pd.DataFrame) -> np.ndarray:
+    """Hash each row of a normalised key card DataFrame to a uint64."""
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+def build_row_hash_index(filepath: str, chunksize: int = KEY_CARD_CHUNK_SIZE):
+    """
+    Hash every row of a key card CSV and save the sorted hashes next to it.
+
+    The file is read in chunks so memory stays bounded by the chunk size plus
+    8 bytes per row for the hashes.
+
+    Args:
+        filepath: Path to the CSV file
+        chunksize: Number of rows read per chunk
+
+    Returns:
+        Tuple of (sorted hashes, sorted employee keys), or None on failure
+    """
+    logger.info(f"Building row-hash index for {filepath}")
+    try:
+        fingerprint = file_fingerprint(filepath)
+        columns = pd.read_csv(filepath, nrows=0).columns.tolist()
+
+        hash_chunks = []
+        employees = set()
+        for chunk in pd.read_csv(filepath, dtype=str, chunksize=chunksize):
+            hash_chunks.append(hash_key_card_rows(normalize_key_card_rows(chunk, columns)))
+            if 'User' in chunk.columns:
+                employees.update(employee_keys(chunk['User']))
+
+        hashes = np.sort(np.concatenate(hash_chunks)) if hash_chunks else np.array([], dtype=np.uint64)
+        employee_array = np.array(sorted(employees), dtype=str)
+        save_row_hash_index(filepath, hashes, employee_array, fingerprint)
+
+        logger.info(f"Indexed {len(hashes):,} row hashes and {len(employee_array):,} employees")
+        return hashes, employee_array
+
+    except Exception as e:
+        logger.error(f"Error building row-hash index for {filepath}: {str(e)}")
+        return None
+
+def save_row_hash_index(filepath: str, hashes: np.ndarray, employees: np.ndarray,
+                        fingerprint: str = None) -> None:
+    """Write the row-hash index atomically, recording the fingerprint of the CSV it describes."""
+    index_path = row_hash_index_path(filepath)
+    tmp_path = index_path.with_name(index_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        np.savez(f, hashes=hashes, employees=employees,
+                 fingerprint=np.array(fingerprint or file_fingerprint(filepath)))
+    os.replace(tmp_path, index_path)
+
+def load_row_hash_index(filepath: str, build: bool = True):
+    """
+    Load the row-hash index for a CSV file.
+
+    Args:
+        filepath: Path to the CSV file
+        build: Rebuild a missing or stale index instead of returning None
+
+    Returns:
+        Tuple of (sorted hashes, sorted employee keys), or None if unavailable
+    """
+    index_path = row_hash_index_path(filepath)
+    if index_path.exists():
+        try:
+            with np.load(index_path) as data:
+                if str(data['fingerprint']) == file_fingerprint(filepath):
+                    return data['hashes'], data['employees']
+            logger.info(f"Row-hash index for {filepath} is stale")
+        except Exception as e:
+            logger.warning(f"Could not read row-hash index {index_path}: {str(e)}")
+
+    return build_row_hash_index(filepath) if build else None
+
+def find_new_rows(index_hashes: np.ndarray, row_hashes: np.ndarray) -> np.ndarray:
+    """
+    Select the rows whose hash is not in the index, keeping the first of any repeats.
+
+    Args:
+        index_hashes: Sorted hashes of the rows already stored
+        row_hashes: Hashes of the candidate rows
+
+    Returns:
+        Positions of the new rows in row_hashes, in their original order
+    """
+    if len(row_hashes) == 0:
+        return np.array([], dtype=np.int64)
+
+    # Vectorized membership test against the sorted history
+    positions = np.searchsorted(index_hashes, row_hashes)
+    positions = np.minimum(positions, max(len(index_hashes) - 1, 0))
+    seen = (index_hashes[positions] == row_hashes) if len(index_hashes) else np.zeros(len(row_hashes), bool)
+
+    # Drop repeats within the batch itself
+    _, first = np.unique(row_hashes, return_index=True)
+    is_first = np.zeros(len(row_hashes), dtype=bool)
+    is_first[first] = True
+
+    return np.flatnonzero(~seen & is_first)
+
+def insert_hashes(index_hashes: np.ndarray, new_hashes: np.ndarray) -> np.ndarray:
+    """Merge new hashes into the sorted index without re-sorting the history."""
+    new_hashes = np.sort(new_hashes)
+    return np.insert(index_hashes, np.searchsorted(index_hashes, new_hashes), new_hashes)
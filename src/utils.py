@@ -2,8 +2,10 @@ import logging
 import sys
 import os
 import pandas as pd
+import numpy as np
 from pathlib import Path
 from datetime import datetime
+from .config import KEY_CARD_DATETIME_FORMAT
 
 # Configure basic logging if not already configured
 logging.basicConfig(
@@ -184,4 +186,260 @@ def optimize_dataframe_memory(df, logger=None):
         reduction = 100 * (start_mem - end_mem) / start_mem
         logger.debug(f"Memory usage after optimization: {end_mem:.2f} MB ({reduction:.1f}% reduction)")
     
-    return result
\ No newline at end of file
+    return result
+
+def concat_chunks(chunks: list) -> pd.DataFrame:
+    """
+    Concatenate DataFrame chunks without decoding categorical columns.
+    
+    pd.concat turns categoricals with different categories back into object
+    columns; this unions the categories instead so memory stays proportional
+    to the number of distinct values.
+    
+    Args:
+        chunks: List of DataFrames with the same columns
+        
+    Returns:
+        Concatenated DataFrame with a fresh RangeIndex
+    """
+    if not chunks:
+        return pd.DataFrame()
+    if len(chunks) == 1:
+        return chunks[0].reset_index(drop=True)
+    
+    columns = {}
+    for col in chunks[0].columns:
+        if isinstance(chunks[0][col].dtype, pd.CategoricalDtype):
+            columns[col] = pd.api.types.union_categoricals(
+                [chunk[col] for chunk in chunks], ignore_order=True
+            )
+        else:
+            columns[col] = pd.concat([chunk[col] for chunk in chunks], ignore_index=True)
+    return pd.DataFrame(columns)
+
+def schema_read_options(schema: dict) -> dict:
+    """
+    Build pd.read_csv arguments that load only the columns of a schema.
+    
+    Columns that need conversion after parsing ('numeric', 'datetime') are read
+    as strings; see apply_schema_types.
+    
+    Args:
+        schema: Column schema from the registry in src/config.py
+        
+    Returns:
+        Dictionary with 'usecols' and 'dtype' entries for pd.read_csv
+    """
+    read_dtypes = {'category': 'category'}
+    return {
+        'usecols': lambda col: col in schema,
+        'dtype': {col: read_dtypes.get(spec['dtype'], str) for col, spec in schema.items()}
+    }
+
+def apply_schema_types(df: pd.DataFrame, schema: dict, logger=None) -> pd.DataFrame:
+    """
+    Convert the columns of a DataFrame to their schema dtypes.
+    
+    Columns that are absent or already have the target type are left alone,
+    so this is safe to call on data read from a cache.
+    
+    Args:
+        df: DataFrame read with schema_read_options
+        schema: Column schema from the registry in src/config.py
+        logger: Optional logger for reporting invalid values
+        
+    Returns:
+        The DataFrame with converted columns
+    """
+    for col, spec in schema.items():
+        if col not in df.columns:
+            continue
+        dtype = spec['dtype']
+        
+        if dtype == 'datetime' and not pd.api.types.is_datetime64_any_dtype(df[col]):
+            if spec.get('format') == KEY_CARD_DATETIME_FORMAT:
+                df[col] = parse_key_card_datetime(df[col])
+            elif spec.get('format'):
+                df[col] = pd.to_datetime(df[col], format=spec['format'], errors='coerce')
+            else:
+                df[col] = pd.to_datetime(df[col], dayfirst=spec.get('dayfirst', False), errors='coerce')
+            
+            nan_dates = df[col].isna().sum()
+            if nan_dates > 0 and logger:
+                logger.warning(f"Found {nan_dates} invalid dates in column '{col}'")
+        
+        elif dtype == 'numeric' and not pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+        
+        elif dtype == 'category' and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    
+    return df
+
+# Byte positions of the fields in a KEY_CARD_DATETIME_FORMAT ("dd/mm/YYYY HH:MM:SS") timestamp
+_TIMESTAMP_LENGTH = 19
+_TIMESTAMP_DIGIT_POSITIONS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15, 17, 18]
+_TIMESTAMP_SEPARATORS = {2: '/', 5: '/', 10: ' ', 13: ':', 16: ':'}
+_TIMESTAMP_PARSE_BLOCK_SIZE = 1 << 19  # Rows per block, bounds the temporary character arrays
+_DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int64)
+# Whole seconds since the epoch that fit in datetime64[ns] (pd.Timestamp.min to pd.Timestamp.max)
+_MIN_TIMESTAMP_SECONDS = -(-pd.Timestamp.min.value // 1_000_000_000)
+_MAX_TIMESTAMP_SECONDS = pd.Timestamp.max.value // 1_000_000_000
+
+# pandas 2 parses a whole Series in the format inferred from its first value unless
+# format='mixed' is given; pandas 1.x inferred the format of each value
+_MIXED_FORMAT_OPTIONS = {'format': 'mixed'} if int(pd.__version__.split('.')[0]) >= 2 else {}
+
+def _parse_fixed_format_block(values: np.ndarray):
+    """
+    Parse a block of "dd/mm/YYYY HH:MM:SS" strings from their fixed character positions.
+    
+    Args:
+        values: Object array of raw timestamp values
+        
+    Returns:
+        Tuple of (int64 nanoseconds since epoch, boolean mask of rows that matched the layout)
+    """
+    # Fixed-width unicode array; anything longer than the layout is truncated to
+    # _TIMESTAMP_LENGTH + 1 characters so it fails the length check below
+    text = np.asarray(values, dtype=f'U{_TIMESTAMP_LENGTH + 1}')
+    codes = text.view(np.uint32).reshape(len(text), _TIMESTAMP_LENGTH + 1)
+    
+    valid = np.char.str_len(text) == _TIMESTAMP_LENGTH
+    digits = codes[:, _TIMESTAMP_DIGIT_POSITIONS].astype(np.int64) - ord('0')
+    valid &= ((digits >= 0) & (digits <= 9)).all(axis=1)
+    for position, separator in _TIMESTAMP_SEPARATORS.items():
+        valid &= codes[:, position] == ord(separator)
+    
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 2] * 10 + digits[:, 3]
+    year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+    second = digits[:, 12] * 10 + digits[:, 13]
+    
+    # Validate calendar ranges, including leap years
+    month_ok = (month >= 1) & (month <= 12)
+    valid &= month_ok
+    is_leap = ((year % 4 == 0) & (year % 100 != 0)) | (year % 400 == 0)
+    month_length = _DAYS_IN_MONTH[np.where(month_ok, month, 0)] + ((month == 2) & is_leap)
+    valid &= (day >= 1) & (day <= month_length) & (hour < 24) & (minute < 60) & (second < 60)
+    
+    # Days since 1970-01-01 from the civil date (proleptic Gregorian calendar)
+    shifted_year = year - (month <= 2)
+    era = shifted_year // 400
+    year_of_era = shifted_year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+    
+    # Times outside the datetime64[ns] range would overflow, so they are left to the fallback
+    seconds = days * 86400 + hour * 3600 + minute * 60 + second
+    valid &= (seconds >= _MIN_TIMESTAMP_SECONDS) & (seconds <= _MAX_TIMESTAMP_SECONDS)
+    
+    nanoseconds = np.where(valid, seconds, 0) * 1_000_000_000
+    return nanoseconds, valid
+
+def parse_key_card_datetime(values) -> pd.Series:
+    """
+    Parse key card timestamps in the "%d/%m/%Y %H:%M:%S" layout.
+    
+    Rows that match the layout are decoded directly from their fixed character
+    positions with NumPy and converted to int64 nanoseconds; only rows that do
+    not match fall back to pd.to_datetime(dayfirst=True), which infers the
+    format of each value (format='mixed' on pandas 2). Values that cannot be
+    parsed at all become NaT.
+    
+    Args:
+        values: Series (or array-like) of raw timestamp strings
+        
+    Returns:
+        Series of datetime64[ns] values with the same index as the input
+    """
+    series = values if isinstance(values, pd.Series) else pd.Series(values)
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    
+    raw = series.to_numpy(dtype=object)
+    result = np.empty(len(raw), dtype=np.int64)
+    matched = np.empty(len(raw), dtype=bool)
+    
+    # Work in blocks to bound the size of the temporary character arrays
+    for start in range(0, len(raw), _TIMESTAMP_PARSE_BLOCK_SIZE):
+        stop = start + _TIMESTAMP_PARSE_BLOCK_SIZE
+        # Non-string values (NaN, None) render as short text and never match the layout
+        result[start:stop], matched[start:stop] = _parse_fixed_format_block(raw[start:stop])
+    
+    parsed = pd.Series(result.view('datetime64[ns]'), index=series.index)
+    
+    # Slow path only for rows that did not match the fixed layout
+    if not matched.all():
+        unmatched = ~matched
+        parsed[unmatched] = pd.to_datetime(series[unmatched], dayfirst=True, errors='coerce',
+                                           **_MIXED_FORMAT_OPTIONS)
+    
+    return parsed
+
+# Day names by weekday number (0=Monday), used to label weekdays for display
+WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Sentinels for rows without a date (integer columns cannot hold NaT)
+MISSING_DAY_NUMBER = np.iinfo(np.int32).min
+MISSING_WEEKDAY = -1
+
+def add_calendar_columns(df: pd.DataFrame, date_column: str = 'date_only',
+                         core_weekdays: list = None) -> pd.DataFrame:
+    """
+    Add compact integer calendar columns derived from a date column.
+    
+    Adds 'day_number' (int32 days since 1970-01-01), 'weekday' (int8, 0=Monday),
+    'iso_week' (int32 ISO year * 100 + ISO week, e.g. 202410) and 'is_core_day'
+    (bool). Rows without a date get MISSING_DAY_NUMBER, MISSING_WEEKDAY, 0 and
+    False. The DataFrame is modified in place and returned.
+    
+    Args:
+        df: DataFrame with a datetime column
+        date_column: Name of the datetime column
+        core_weekdays: Weekday numbers of the core office days (default: CORE_WEEKDAY_INDICES)
+        
+    Returns:
+        The DataFrame with the calendar columns added
+    """
+    if core_weekdays is None:
+        # Import config here to avoid circular imports
+        from .config import CORE_WEEKDAY_INDICES
+        core_weekdays = CORE_WEEKDAY_INDICES
+    
+    dates = pd.to_datetime(df[date_column]).to_numpy()
+    missing = np.isnat(dates)
+    days = dates.astype('datetime64[D]').astype(np.int64)
+    days[missing] = 0
+    
+    # 1970-01-01 was a Thursday
+    weekdays = (days + 3) % 7
+    
+    # The ISO year is the year containing the Thursday of the date's week
+    thursdays = (days - weekdays + 3).astype('datetime64[D]')
+    iso_years = thursdays.astype('datetime64[Y]')
+    iso_weeks = (thursdays - iso_years).astype(np.int64) // 7 + 1
+    iso_week_keys = (iso_years.astype(np.int64) + 1970) * 100 + iso_weeks
+    
+    df['day_number'] = np.where(missing, MISSING_DAY_NUMBER, days).astype(np.int32)
+    df['weekday'] = np.where(missing, MISSING_WEEKDAY, weekdays).astype(np.int8)
+    df['iso_week'] = np.where(missing, 0, iso_week_keys).astype(np.int32)
+    df['is_core_day'] = np.isin(weekdays, core_weekdays) & ~missing
+    return df
+
+def weekday_labels(weekdays) -> pd.Categorical:
+    """
+    Label weekday numbers (0=Monday) with day names for display.
+    
+    Returns a categorical backed by the integer codes, so no per-row strings
+    are created. MISSING_WEEKDAY becomes NaN.
+    """
+    codes = np.asarray(weekdays, dtype=np.int8)
+    return pd.Categorical.from_codes(codes, categories=WEEKDAY_NAMES, ordered=True)
+
+def day_numbers_to_dates(day_numbers) -> np.ndarray:
+    """Convert day numbers (days since 1970-01-01) to datetime64[ns] values."""
+    return np.asarray(day_numbers, dtype=np.int64).astype('datetime64[D]').astype('datetime64[ns]')
@@ -0,0 +1,156 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+import unittest
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_cleaning import clean_key_card_data, merge_key_card_with_employee_info
+from src.combined_dataset import build_combined_dataset
+from src.analysis_pipeline import build_analysis_inputs
+from src.data_analysis import build_attendance_table, build_daily_aggregate
+
+class TestCombinedDataset(unittest.TestCase):
+
+    def setUp(self):
+        """Set up cleaned key card, employee and history data."""
+        self.key_card_df = clean_key_card_data(pd.DataFrame({
+            'User': ['123 Doe, John', '456 Smith, Jane', 'Visitor', '123 Doe, John', '999 Unknown, Person',
+                     'Hindhaugh, Robert', '456 Smith, Jane'],
+            'Date/time': ['01/03/2024 09:15:30', '01/03/2024 08:30:00', '02/03/2024 10:00:00',
+                          '04/03/2024 17:45:10', '04/03/2024 09:00:00', 'bad timestamp', '05/03/2024 23:59:59'],
+            'Event': ['Valid Access'] * 7,
+            'Where': ['Main Entrance', 'Side Entrance', 'Main Entrance', None, 'Main Entrance',
+                      'Main Entrance', 'Side Entrance']
+        }))
+
+        self.employee_df = pd.DataFrame({
+            'employee_id': [123.0, 456.0, 849.0],
+            'Last name, First name': ['Doe, John', 'Smith, Jane', 'Hindhaugh, Robert'],
+            'Location': ['London UK', 'Paris FR', 'London UK'],
+            'Working Status': ['Hybrid', 'Office', 'Hybrid'],
+            'Division': ['Operations', 'Finance', 'Technology'],
+            'Combined hire date': pd.to_datetime(['2022-01-01', '2022-02-15', '2022-01-03']),
+            'Most recent day worked': pd.to_datetime([None, '2024-03-04', None])
+        })
+
+        self.history_df = pd.DataFrame({
+            'Employee': ['Doe, John', 'Smith, Jane', 'Smith, Jane'],
+            'Date': pd.to_datetime(['2022-01-01', '2022-02-15', '2024-03-05']),
+            'Employment Status': ['Full-Time', 'Part-Time', 'Full-Time']
+        })
+
+    def test_to_frame_matches_merge(self):
+        """Test that the materialized frame matches merge_key_card_with_employee_info."""
+        merged = merge_key_card_with_employee_info(self.key_card_df, self.employee_df, self.history_df)
+        dataset = build_combined_dataset(self.key_card_df, self.employee_df, self.history_df)
+        frame = dataset.to_frame()
+
+        columns = [col for col in merged.columns if col in frame.columns and col != 'Where']
+        pd.testing.assert_frame_equal(frame[columns].reset_index(drop=True), merged[columns].reset_index(drop=True))
+        self.assertEqual(frame['Where'].astype(object).fillna('').tolist(), merged['Where'].fillna('').tolist())
+        self.assertEqual(frame['is_full_time'].tolist(), [True, False, False, True, False, True, True])
+
+        # Attributes live in the dimension, not on each swipe
+        self.assertEqual(len(dataset.employees), 4)
+        self.assertEqual(dataset.facts['employee_code'].dtype, np.int32)
+        self.assertNotIn('Location', dataset.facts.columns)
+
+    def test_filter_dates_and_columns(self):
+        """Test date filtering, column selection and the date range."""
+        dataset = build_combined_dataset(self.key_card_df, self.employee_df)
+
+        self.assertEqual(dataset.date_range(), (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-03-05')))
+
+        selected = dataset.filter_dates('2024-03-02', '2024-03-04')
+        frame = selected.to_frame(['employee_id', 'date_only', 'Location'])
+        self.assertEqual(frame.columns.tolist(), ['employee_id', 'date_only', 'Location'])
+        self.assertEqual(frame['date_only'].dt.day.tolist(), [2, 4, 4])
+        self.assertEqual(frame['Location'].tolist()[1:], ['London UK', np.nan])
+
+        # Without employment history there is no full-time flag, as with the merge
+        self.assertNotIn('is_full_time', dataset.to_frame().columns)
+        self.assertEqual(dataset.cache_key(), build_combined_dataset(self.key_card_df, self.employee_df).cache_key())
+        self.assertNotEqual(dataset.cache_key(), selected.cache_key())
+        
+        # A key given at build time is used without hashing the data
+        keyed = build_combined_dataset(self.key_card_df, self.employee_df, cache_key='v1:2024-03-01:2024-03-05')
+        self.assertEqual(keyed.cache_key(), 'v1:2024-03-01:2024-03-05')
+
+    def test_sorted_dataset_slices(self):
+        """Test that date filtering on a time-sorted dataset matches filtering the unsorted one."""
+        dataset = build_combined_dataset(self.key_card_df, self.employee_df, self.history_df, cache_key='v1')
+        sorted_dataset = dataset.sort_by_time()
+        self.assertTrue(sorted_dataset.time_sorted)
+        self.assertEqual(sorted_dataset.date_range(), dataset.date_range())
+        
+        for start_date, end_date in [(None, None), ('2024-03-01', '2024-03-01'), ('2024-03-02', '2024-03-04'),
+                                     ('2024-03-06', None), (None, '2024-02-29')]:
+            expected = dataset.filter_dates(start_date, end_date).to_frame().sort_values('parsed_time', kind='mergesort')
+            selected = sorted_dataset.filter_dates(start_date, end_date)
+            pd.testing.assert_frame_equal(selected.to_frame(), expected)
+            self.assertEqual(selected.cache_key(), dataset.filter_dates(start_date, end_date).cache_key())
+        
+        # Swipes without a date are never selected
+        self.assertEqual(len(sorted_dataset.filter_dates()), len(dataset) - 1)
+        self.assertNotEqual(sorted_dataset.filter_dates('2024-03-01', '2024-03-04').cache_key(),
+                            sorted_dataset.filter_dates('2024-03-01', '2024-03-05').cache_key())
+
+    def test_daily_visits_match_attendance_table_merge(self):
+        """Test that per-swipe visits match merging the attendance table back onto the swipes."""
+        # John swipes twice on his first day
+        key_card_df = pd.concat([self.key_card_df, self.key_card_df.iloc[[0]]], ignore_index=True)
+        dataset = build_combined_dataset(key_card_df, self.employee_df, self.history_df)
+        frame = dataset.to_frame()
+        merged = frame.merge(build_attendance_table(frame)[['employee_id', 'date_only', 'visits']],
+                             on=['employee_id', 'date_only'], how='left')
+        self.assertEqual(dataset.daily_visits().tolist(), merged['visits'].tolist())
+        self.assertEqual(dataset.daily_visits().tolist(), [2.0, 1.0, 0.0, 1.0, 1.0, 0.0, 1.0, 2.0])
+
+        # The analysis frame only has the columns the analyses use
+        filtered_df, _, _ = build_analysis_inputs(dataset)
+        self.assertNotIn('Where', filtered_df.columns)
+        self.assertEqual(filtered_df['present'].tolist(), ['Yes', 'Yes', 'No', 'Yes', 'Yes', 'No', 'Yes', 'Yes'])
+
+    def test_analysis_inputs_match_merge_with_status_change(self):
+        """Test that eligible denominators match the merged frame when a status changes mid-range."""
+        # Newest-first export, as the combiner writes it, with both employees changing status mid-range
+        days = ['13/03/2024', '12/03/2024', '11/03/2024', '08/03/2024', '07/03/2024', '06/03/2024', '05/03/2024',
+                '04/03/2024']
+        key_card_df = clean_key_card_data(pd.DataFrame({
+            'User': ['123 Doe, John', '456 Smith, Jane'] * len(days),
+            'Date/time': [f'{day} {time}' for day in days for time in ['09:15:00', '08:30:00']],
+            'Event': ['Valid Access'] * 2 * len(days),
+            'Where': ['Main Entrance'] * 2 * len(days)
+        }))
+        employee_df = self.employee_df.assign(**{'Location': 'London UK', 'Working Status': 'Hybrid',
+                                                 'Most recent day worked': pd.NaT})
+        history_df = pd.DataFrame({
+            'Employee': ['Doe, John', 'Doe, John', 'Smith, Jane', 'Smith, Jane'],
+            'Date': pd.to_datetime(['2022-01-01', '2024-03-07', '2022-02-15', '2024-03-06']),
+            'Employment Status': ['Full-Time', 'Part-Time', 'Part-Time', 'Full-Time']
+        })
+        start_date, end_date = '2024-03-04', '2024-03-13'
+
+        # Previous pipeline: merged frame, first row per employee for the denominators
+        merged = merge_key_card_with_employee_info(key_card_df, employee_df, history_df)
+        merged = merged[(merged['date_only'] >= start_date) & (merged['date_only'] <= end_date)]
+        full_employee_info = merged[['employee_id', 'Location', 'Working Status', 'is_full_time',
+                                     'Combined hire date', 'Most recent day worked',
+                                     'Division']].drop_duplicates('employee_id')
+        attendance_table = build_attendance_table(merged)
+        merged = merged.merge(attendance_table[['employee_id', 'date_only', 'present', 'is_present', 'visits']],
+                              on=['employee_id', 'date_only'], how='left')
+        expected = build_daily_aggregate(merged, full_employee_info)
+
+        dataset = build_combined_dataset(key_card_df, employee_df, history_df)
+        for selection in [dataset.filter_dates(start_date, end_date),
+                          dataset.sort_by_time().filter_dates(start_date, end_date)]:
+            filtered_df, _, daily_aggregate = build_analysis_inputs(selection, start_date, end_date)
+            info = filtered_df.attrs['full_employee_info'].set_index('employee_id')
+            self.assertEqual(info['is_full_time'].to_dict(), {123.0: False, 456.0: True})
+            pd.testing.assert_frame_equal(daily_aggregate, expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+import unittest
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.csv_combiner import combine_csv_files
+from src.key_card_index import load_key_card_index
+
+class TestCsvCombiner(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a directory of overlapping weekly exports."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        self.input_dir = self.temp_path / 'input_files'
+        self.input_dir.mkdir()
+        self.output_path = self.temp_path / 'key_card_access.csv'
+
+        # Exports are newest first, as they come from the access control system
+        pd.DataFrame({
+            'Date/time': ['05/03/2024 09:00:00', '04/03/2024 08:45:00', '04/03/2024 08:45:00'],
+            'User': ['123 Doe, John', '456 Smith, Jane', '123 Doe, John'],
+            'Where': ['Main Entrance', 'Side Entrance', 'Main Entrance'],
+            'Event': ['Valid Access'] * 3
+        }).to_csv(self.input_dir / 'week_1.csv', index=False)
+
+        # Overlaps week 1 on 04/03 and adds a column the first export doesn't have
+        pd.DataFrame({
+            'Date/time': ['07/03/2024 10:00:00', '04/03/2024 08:45:00', '01/03/2024 17:30:00'],
+            'User': ['789 Brown, Mark', '456 Smith, Jane', '456 Smith, Jane'],
+            'Where': ['Main Entrance', 'Side Entrance', 'Main Entrance'],
+            'Event': ['Valid Access'] * 3,
+            'Details': ['', 'Late', '']
+        }).to_csv(self.input_dir / 'week_2.csv', index=False)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+
+    def test_combine_dedupes_and_orders_newest_first(self):
+        """Test that exports are merged newest first with duplicate swipes removed."""
+        rows = combine_csv_files(str(self.input_dir), str(self.output_path), max_workers=2, chunksize=1)
+        combined = pd.read_csv(self.output_path, dtype=str, keep_default_na=False)
+
+        self.assertEqual(rows, 5)
+        self.assertEqual(combined.columns.tolist(), ['Date/time', 'User', 'Where', 'Event', 'Details'])
+        self.assertEqual(combined['Date/time'].tolist(), [
+            '07/03/2024 10:00:00', '05/03/2024 09:00:00', '04/03/2024 08:45:00',
+            '04/03/2024 08:45:00', '01/03/2024 17:30:00'
+        ])
+
+        # Both 04/03 08:45 swipes are kept (different users); the shared one comes from the first export
+        same_time = combined[combined['Date/time'] == '04/03/2024 08:45:00']
+        self.assertEqual(same_time['User'].tolist(), ['123 Doe, John', '456 Smith, Jane'])
+        self.assertEqual(same_time['Details'].tolist(), ['', ''])
+
+        # The combined file is indexed for date-range seeks
+        self.assertEqual(load_key_card_index(str(self.output_path))['order'], 'desc')
+
+    def test_combine_matches_in_memory_dedupe(self):
+        """Test that the streaming merge matches concatenating, de-duplicating and sorting in memory."""
+        combine_csv_files(str(self.input_dir), str(self.output_path), newest_first=False, max_workers=1)
+        combined = pd.read_csv(self.output_path, dtype=str)
+
+        frames = [pd.read_csv(path, dtype=str) for path in sorted(self.input_dir.glob('*.csv'))]
+        expected = pd.concat(frames, ignore_index=True).drop_duplicates(subset=['Date/time', 'User'])
+        expected['sort_time'] = pd.to_datetime(expected['Date/time'], format='%d/%m/%Y %H:%M:%S')
+        expected = expected.sort_values(['sort_time', 'User'], kind='stable').drop(columns='sort_time')
+
+        pd.testing.assert_frame_equal(combined, expected[combined.columns].reset_index(drop=True))
+
+    def test_combine_empty_directory(self):
+        """Test that an empty input directory is reported as an error."""
+        empty_dir = self.temp_path / 'empty'
+        empty_dir.mkdir()
+        self.assertEqual(combine_csv_files(str(empty_dir), str(self.output_path)), -1)
+        self.assertFalse(self.output_path.exists())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,11 +9,23 @@ from unittest.mock import patch, MagicMock
 # Add parent directory to path to allow imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.data_analysis.attendance_table import build_attendance_table
+from src.data_analysis.presence_matrix import build_presence_matrix
+from src.data_analysis.reports import calculate_daily_attendance_counts, calculate_weekly_attendance_counts
+from src.data_analysis.daily_aggregate import build_daily_aggregate
+from src.data_analysis.attendance_counts import calculate_first_arrival_minutes, calculate_arrival_time_statistics
+from src.data_analysis.employee_metrics import create_employee_summary
+from src.data_analysis.daily_lookup import build_daily_attendance_index
+from src.data_analysis.segmentation import (
+    calculate_attendance_by_weekday,
+    calculate_division_attendance_tue_thu,
+    calculate_division_attendance_by_location
+)
 from src.data_analysis.common import (
     get_employment_date_mask,
     get_london_hybrid_ft_mask,
     calculate_eligible_employees,
-    calculate_present_employees
+    calculate_present_employees,
+    build_headcount_timeline
 )
 
 class TestDataAnalysis(unittest.TestCase):
@@ -58,6 +70,33 @@ class TestDataAnalysis(unittest.TestCase):
         john_mask = result['employee_name'] == 'Doe, John'
         self.assertEqual(result.loc[john_mask, 'days_attended'].iloc[0], 2)
     
+    def test_presence_matrix_queries(self):
+        """Test row, column and window popcounts of the presence matrix."""
+        # Ten consecutive days so the packed bits span two bytes
+        dates = pd.date_range('2024-03-01', periods=10)
+        df = pd.DataFrame({
+            'employee_id': [123.0] * 4 + [456.0] * 3 + [np.nan],
+            'Last name, First name': ['Doe, John'] * 4 + ['Smith, Jane'] * 3 + [None],
+            'date_only': dates[[0, 0, 7, 9, 1, 8, 9, 2]]
+        })
+        
+        matrix = build_presence_matrix(df)
+        
+        self.assertEqual(matrix.shape, (3, 6))
+        self.assertEqual(matrix.visits.dtype, np.uint8)
+        self.assertEqual(matrix.visits[0].tolist(), [2, 0, 0, 1, 0, 1])
+        self.assertEqual(matrix.days_present().tolist(), [3, 3, 0])
+        self.assertEqual(matrix.days_present('2024-03-02', '2024-03-09').tolist(), [1, 2, 0])
+        self.assertEqual(matrix.days_present('2024-03-04', '2024-03-07').tolist(), [0, 0, 0])
+        self.assertEqual(matrix.employees_present().tolist(), [1, 1, 0, 1, 1, 2])
+        self.assertTrue(matrix.is_present(1, '2024-03-10'))
+        self.assertFalse(matrix.is_present(0, '2024-03-09'))
+        
+        # Long format: one row per employee per date
+        long_df = matrix.to_long()
+        self.assertEqual(len(long_df), 18)
+        self.assertEqual(long_df['visits'].sum(), 7)
+    
     def test_get_employment_date_mask(self):
         """Test the get_employment_date_mask function."""
         # Create a test date
@@ -94,6 +133,196 @@ class TestDataAnalysis(unittest.TestCase):
         # Expect 2 employees (Doe and Hindhaugh - London, Hybrid, Full-Time)
         self.assertEqual(eligible_count, 2)
     
+    def test_headcount_timeline(self):
+        """Test headcount lookups against the per-date eligibility masks."""
+        df = self.combined_df.copy()
+        df['Division'] = ['Ops', 'Ops', 'Finance', 'Finance', 'Tech']
+        df['Most recent day worked'] = pd.to_datetime([None, '2024-03-01', None, None, '2022-06-30'])
+        timeline = build_headcount_timeline(df, cohort_column='Division')
+        
+        dates = pd.to_datetime(['2021-12-31', '2022-01-01', '2022-01-03', '2022-06-30', '2022-07-01', '2024-03-02'])
+        expected = [calculate_eligible_employees(df, date) for date in dates]
+        self.assertEqual(timeline.count(dates).tolist(), expected)
+        self.assertEqual(expected, [0, 1, 2, 2, 1, 1])
+        
+        # John's rows overlap; he is counted once, until the later of his leave dates
+        self.assertEqual(timeline.count(dates, 'Ops').tolist(), [0, 1, 1, 1, 1, 1])
+        self.assertEqual(timeline.count(pd.Timestamp('2022-06-30'), 'Tech'), 1)
+        self.assertEqual(timeline.count(pd.Timestamp('2022-06-30'), 'Finance'), 0)
+        self.assertEqual(timeline.count(pd.NaT), 0)
+    
+    def test_calculate_daily_attendance_counts(self):
+        """Test daily counts per cohort against the per-date helpers."""
+        df = self.combined_df.copy()
+        df['date_only'] = pd.to_datetime(df['date_only'])
+        df['is_present'] = [True, True, True, False, True]
+        
+        counts = calculate_daily_attendance_counts(df)
+        self.assertEqual(counts['day_of_week'].tolist(), ['Friday', 'Saturday', 'Sunday'])
+        self.assertEqual(counts['london_hybrid_ft_count'].tolist(), [1, 2, 0])
+        self.assertEqual(counts['other_count'].tolist(), [1, 0, 0])
+        self.assertEqual(counts['eligible_london_hybrid_ft'].tolist(), [2, 2, 2])
+        self.assertEqual(counts['london_hybrid_ft_percentage'].tolist(), [50.0, 100.0, 0.0])
+        self.assertEqual(counts['total_attendance'].tolist(), [2, 2, 0])
+        
+        for row in counts.itertuples():
+            self.assertEqual(row.london_hybrid_ft_count, calculate_present_employees(df, row.date, lhft_only=True))
+    
+    def test_daily_aggregate_rollups(self):
+        """Test the daily aggregate table and a weekly rollup over it."""
+        df = self.combined_df.copy()
+        df['date_only'] = pd.to_datetime(df['date_only'])
+        df['is_present'] = [True, True, True, False, True]
+        
+        aggregate = build_daily_aggregate(df)
+        # Whole weeks: Monday 2024-02-26 to Sunday 2024-03-03
+        self.assertEqual(len(aggregate), 7)
+        self.assertEqual(aggregate['date'].iloc[0], pd.Timestamp('2024-02-26'))
+        self.assertEqual(aggregate['has_data'].tolist(), [False] * 4 + [True] * 3)
+        self.assertEqual(aggregate['is_core_day'].tolist(), [False, True, True, True, False, False, False])
+        self.assertEqual(aggregate['london_hybrid_ft_present'].tolist(), [0, 0, 0, 0, 1, 2, 0])
+        self.assertEqual(aggregate['london_hybrid_ft_eligible'].tolist(), [2] * 7)
+        
+        # The week has data, so it is averaged over its (empty) core days
+        weekly = calculate_weekly_attendance_counts(df, aggregate)
+        self.assertEqual(weekly['week_start'].tolist(), [pd.Timestamp('2024-02-26')])
+        self.assertEqual(weekly['avg_eligible_london_hybrid_ft'].tolist(), [2.0])
+        self.assertEqual(weekly['london_hybrid_ft_percentage'].tolist(), [0.0])
+        pd.testing.assert_frame_equal(calculate_daily_attendance_counts(df, aggregate),
+                                      calculate_daily_attendance_counts(df))
+    
+    def test_division_attendance(self):
+        """Test the division reports on core-day data."""
+        df = pd.DataFrame({
+            'employee_id': [1.0, 1.0, 2.0, 3.0, 4.0],
+            'Division': ['Ops', 'Ops', 'Ops', 'Tech', 'Tech'],
+            'Location': ['London UK', 'London UK', 'London UK', 'Paris FR', 'London UK'],
+            'Working Status': ['Hybrid', 'Hybrid', 'Hybrid', 'Hybrid', 'Office'],
+            'is_full_time': [True, True, True, True, True],
+            'is_present': [True, True, False, True, True],
+            'date_only': pd.to_datetime(['2024-03-05', '2024-03-06', '2024-03-06', '2024-03-05', '2024-03-06']),
+            'Combined hire date': pd.to_datetime(['2022-01-01', '2022-01-01', '2024-03-06', '2022-01-01', '2022-01-01']),
+            'Most recent day worked': pd.NaT
+        })
+        
+        tue_thu = calculate_division_attendance_tue_thu(df)
+        self.assertEqual(tue_thu['division'].tolist(), ['Ops', 'Tech'])
+        self.assertEqual(tue_thu['attendance_count'].tolist(), [1.0, 0.0])
+        # Jane (2) is only employed from the second day: (1 + 2) / 2 days
+        self.assertEqual(tue_thu['eligible_count'].tolist(), [1.5, 0.0])
+        self.assertEqual(tue_thu['attendance_percentage'].tolist(), [66.7, 0])
+        
+        by_location = calculate_division_attendance_by_location(df)
+        self.assertEqual(by_location['london_hybrid_ft_count'].tolist(), [1.0, 0])
+        self.assertEqual(by_location['hybrid_count'].tolist(), [0, 1.0])
+        self.assertEqual(by_location['full_time_count'].tolist(), [0, 1.0])
+        self.assertEqual(by_location['other_count'].tolist(), [0, 0])
+    
+    def test_arrival_time_statistics(self):
+        """Test per-employee arrival statistics and the employee summary built from them."""
+        df = pd.DataFrame({
+            'employee_id': [1.0, 1.0, 1.0, 1.0, 2.0],
+            'Last name, First name': ['Doe, John'] * 4 + ['Smith, Jane'],
+            'Location': ['London UK'] * 4 + ['Paris FR'],
+            'Working Status': ['Hybrid'] * 5,
+            'is_full_time': [True] * 5,
+            'is_present': [True] * 5,
+            'date_only': pd.to_datetime(['2024-03-05', '2024-03-05', '2024-03-06', '2024-03-07', '2024-03-05']),
+            'parsed_time': pd.to_datetime(['2024-03-05 09:30', '2024-03-05 09:00', '2024-03-06 09:10',
+                                           '2024-03-07 14:00', '2024-03-05 08:00']),
+            'Combined hire date': pd.to_datetime(['2022-01-01'] * 4 + ['2024-03-06']),
+            'Most recent day worked': pd.NaT
+        })
+        
+        # First swipe of each day: 09:00, 09:10 and 14:00 for John
+        minutes = calculate_first_arrival_minutes(df, 'parsed_time')
+        self.assertEqual(minutes.loc[1.0].tolist(), [540, 550, 840])
+        statistics = calculate_arrival_time_statistics(minutes)
+        self.assertEqual(statistics.loc[1.0, 'median'], 550)
+        # 14:00 is more than two hours after the median
+        self.assertEqual(statistics.loc[1.0, 'mean_no_outliers'], 545)
+        
+        summary = create_employee_summary(df).set_index('Employee ID')
+        self.assertEqual(summary.loc[1.0, 'Tuesday-Thursday Days'], 3)
+        self.assertEqual(summary.loc[1.0, 'Median Arrival Time'], '09:10')
+        self.assertEqual(summary.loc[1.0, 'Mean Arrival Time (No Outliers)'], '09:05')
+        # Jane is hired on Wednesday, so only two core days are possible
+        self.assertEqual(summary.loc[2.0, 'Potential Office Days'], 2)
+        self.assertEqual(summary.loc[2.0, 'Mean Arrival Time (All)'], '08:00')
+
+    def test_attendance_by_weekday_with_attrs(self):
+        """Test weekday counts on a frame carrying the full employee info in attrs, as the pipeline passes it."""
+        df = pd.DataFrame({
+            'employee_id': [1.0, 2.0, 1.0],
+            'Location': ['London UK', 'Paris FR', 'London UK'],
+            'Working Status': ['Hybrid'] * 3,
+            'is_full_time': [True] * 3,
+            'is_present': [True] * 3,
+            'date_only': pd.to_datetime(['2024-03-05', '2024-03-05', '2024-03-06']),
+            'weekday': [1, 1, 2]
+        })
+        df.attrs['full_employee_info'] = df[['employee_id', 'Location', 'Working Status', 'is_full_time']].copy()
+        
+        by_weekday = calculate_attendance_by_weekday(df)
+        self.assertEqual(by_weekday['day_of_week'].astype(str).tolist(), ['Tuesday', 'Wednesday'])
+        self.assertEqual(by_weekday['london_hybrid_ft_count'].tolist(), [1, 1])
+        self.assertEqual(by_weekday['other_count'].tolist(), [1, 0])
+    
+    def test_employee_summary_uses_latest_record(self):
+        """Test that the employee summary takes status from each employee's latest swipe, in any row order."""
+        df = pd.DataFrame({
+            'employee_id': [1.0, 2.0, 1.0, 2.0],
+            'Last name, First name': ['Doe, John', 'Smith, Jane', 'Doe, John', 'Smith, Jane'],
+            'Location': ['London UK'] * 4,
+            'Working Status': ['Hybrid'] * 4,
+            'is_full_time': [False, True, True, True],
+            'is_present': [True] * 4,
+            'date_only': pd.to_datetime(['2024-03-05', '2024-03-05', '2024-03-07', '2024-03-06']),
+            'parsed_time': pd.to_datetime(['2024-03-05 09:00', '2024-03-05 08:00', '2024-03-07 09:00',
+                                           '2024-03-06 08:00']),
+            'Combined hire date': pd.to_datetime(['2022-01-01'] * 4),
+            'Most recent day worked': pd.NaT
+        })
+
+        summary = create_employee_summary(df.copy())
+        self.assertEqual(summary['Employee ID'].tolist(), [1.0, 2.0])
+        self.assertEqual(summary['Full-Time'].tolist(), [True, True])
+        pd.testing.assert_frame_equal(create_employee_summary(df.iloc[::-1].copy()), summary)
+
+    def test_daily_attendance_index(self):
+        """Test the per-date attendance lookup."""
+        df = pd.DataFrame({
+            'employee_id': [1.0, 1.0, 2.0, 3.0, 1.0],
+            'Last name, First name': ['Doe, John', 'Doe, John', 'Smith, Jane', 'Brown, Bob', 'Doe, John'],
+            'Location': ['London UK', 'London UK', 'London UK', 'London UK', 'London UK'],
+            'Working Status': ['Hybrid'] * 5,
+            'Division': ['Ops', 'Ops', 'Tech', 'Tech', 'Ops'],
+            'Department': ['A', 'A', 'B', 'B', 'A'],
+            'is_full_time': [True, True, True, True, True],
+            'date_only': pd.to_datetime(['2024-03-05', '2024-03-05', '2024-03-06', '2024-03-05', '2024-03-06']),
+            'parsed_time': pd.to_datetime(['2024-03-05 09:30', '2024-03-05 08:45', pd.NaT, '2024-03-05 10:00',
+                                           '2024-03-06 09:00']),
+            'Combined hire date': pd.to_datetime(['2022-01-01', '2022-01-01', '2022-01-01', '2022-01-01', '2022-01-01']),
+            'Most recent day worked': pd.to_datetime([None, None, None, '2024-03-05', None])
+        })
+        index = build_daily_attendance_index(df)
+        
+        # Swipes of a day are a time-sorted slice
+        self.assertEqual(index.day_swipes('2024-03-05')['parsed_time'].dt.strftime('%H:%M').tolist(),
+                         ['08:45', '09:30', '10:00'])
+        self.assertTrue(index.day_swipes('2024-03-07').empty)
+        
+        lookup = index.lookup(pd.Timestamp('2024-03-05'))
+        self.assertEqual(lookup['Employee Name'].tolist(), ['Brown, Bob', 'Doe, John', 'Smith, Jane'])
+        self.assertEqual(lookup['Arrival Time'].tolist(), ['10:00', '08:45', 'N/A'])
+        
+        # Bob has left; Jane's swipe has no time
+        lookup = index.lookup(pd.Timestamp('2024-03-06'))
+        self.assertEqual(lookup['Employee Name'].tolist(), ['Doe, John', 'Smith, Jane'])
+        self.assertEqual(lookup['Attended'].tolist(), ['Yes', 'Yes'])
+        self.assertEqual(lookup['Arrival Time'].tolist(), ['09:00', 'Unknown'])
+        self.assertEqual(index.lookup(pd.Timestamp('2024-03-07'))['Attended'].tolist(), ['No', 'No'])
+    
     def test_calculate_present_employees(self):
         """Test the calculate_present_employees function."""
         # Test with a specific date
@@ -10,12 +10,17 @@ from unittest.mock import patch, MagicMock
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from src.data_cleaning import (
     clean_key_card_data,
+    extract_employee_ids,
     clean_employee_info, 
     add_full_time_indicators,
+    is_full_time_on_date,
     merge_key_card_with_employee_info,
     add_time_analysis_columns,
-    normalize_compliance_divisions
+    normalize_compliance_divisions,
+    create_employee_name_to_id_mapping,
+    create_employment_status_lookup
 )
+from src.employment_status import build_status_change_table, UNKNOWN_STATUS
 
 class TestDataCleaning(unittest.TestCase):
     
@@ -74,6 +79,40 @@ class TestDataCleaning(unittest.TestCase):
         # Check that date_only was added
         self.assertTrue('date_only' in result.columns)
     
+    def test_clean_key_card_data_calendar_columns(self):
+        """Test the integer calendar columns added by clean_key_card_data."""
+        df = pd.DataFrame({
+            'User': ['123 Doe, John'] * 4,
+            'Date/time': ['31/12/2024 09:00:00', '01/01/2025 09:00:00', '05/01/2025 09:00:00', 'not a date']
+        })
+        
+        result = clean_key_card_data(df)
+        
+        self.assertEqual(result['day_number'].dtype, np.int32)
+        self.assertEqual(result['weekday'].dtype, np.int8)
+        self.assertEqual(result['iso_week'].dtype, np.int32)
+        self.assertEqual(result['day_number'].iloc[0], (pd.Timestamp('2024-12-31') - pd.Timestamp('1970-01-01')).days)
+        self.assertEqual(result['weekday'].tolist(), [1, 2, 6, -1])
+        # 31/12/2024 falls in ISO week 1 of 2025
+        self.assertEqual(result['iso_week'].tolist(), [202501, 202501, 202501, 0])
+        self.assertEqual(result['is_core_day'].tolist(), [True, True, False, False])
+        self.assertNotIn('day_of_week', result.columns)
+    
+    def test_extract_employee_ids(self):
+        """Test ID extraction per distinct user, with name overrides and missing users."""
+        users = pd.Series(['123 Doe, John', 'Payne, James', '123 Doe, John', None,
+                           'Visitor Pass', '867 Mueller, Benjamin (old card)', 'Payne, James'],
+                          index=[10, 11, 12, 13, 14, 15, 16])
+        
+        result = extract_employee_ids(users)
+        
+        self.assertEqual(result.index.tolist(), users.index.tolist())
+        np.testing.assert_array_equal(result.to_numpy(), [123, 735, 123, np.nan, np.nan, 867, 735])
+        
+        # A custom override table replaces the configured one
+        result = extract_employee_ids(users.dropna(), overrides={'Visitor': 1})
+        np.testing.assert_array_equal(result.to_numpy(), [123, np.nan, 123, 1, 867, np.nan])
+    
     def test_clean_employee_info(self):
         """Test the clean_employee_info function."""
         # Create a test dataframe with the required columns for clean_employee_info
@@ -119,6 +158,68 @@ class TestDataCleaning(unittest.TestCase):
         hindhaugh_mask = result['User'] == 'Hindhaugh, Robert'
         self.assertTrue(result.loc[hindhaugh_mask, 'is_full_time'].all())
     
+    def test_add_full_time_indicators_matches_status_history(self):
+        """Test that the as-of join picks the most recent status change on or before each date."""
+        status_lookup = {
+            123: [(pd.Timestamp('2023-01-01'), 'Part-Time'), (pd.Timestamp('2023-06-01'), 'Full-Time')],
+            # Two changes on the same day - the last one recorded wins
+            456: [(pd.Timestamp('2023-03-01'), 'Full-Time'), (pd.Timestamp('2023-03-01'), 'Part-Time'),
+                  (pd.Timestamp('2023-09-01'), 'Full-Time')],
+            849: [(pd.Timestamp('2023-01-01'), 'Part-Time')]
+        }
+        dates = pd.to_datetime(['2022-12-31', '2023-01-01', '2023-05-31', '2023-06-01',
+                                '2023-03-01', '2023-08-31', '2023-09-01', '2023-02-01',
+                                '2023-07-01', '2023-07-01'])
+        df = pd.DataFrame({
+            'employee_id': [123.0, 123.0, 123.0, 123.0, 456.0, 456.0, 456.0, 849.0, 789.0, np.nan],
+            'date_only': dates
+        })
+        
+        result = add_full_time_indicators(df, status_lookup)
+        
+        # Same answer as the per-row reference, with special case 849 always full-time
+        expected = [emp_id == 849 or is_full_time_on_date(emp_id, date, status_lookup)
+                    for emp_id, date in zip(df['employee_id'], df['date_only'])]
+        self.assertEqual(result['is_full_time'].tolist(), expected)
+        self.assertEqual(expected, [False, False, False, True, False, False, True, True, False, False])
+    
+    def test_status_change_table_lookup(self):
+        """Test batched status lookups against the dict-based lookup built from the same history."""
+        employee_df = pd.DataFrame({
+            'Last name, First name': ['Doe, John', 'Smith, Jane', 'Smith, Jane', None],
+            'employee_id': [123.0, 455.0, 456.0, 789.0]
+        })
+        history_df = pd.DataFrame({
+            'Employee': ['Doe, John', 'Smith, Jane', 'Doe, John', 'Smith, Jane', 'Unknown, Person'],
+            'Date': pd.to_datetime(['2023-06-01', '2023-03-01', '2023-01-01', '2023-03-01', '2023-01-01']),
+            'Employment Status': ['Full-Time', 'Full-Time', 'Part-Time', 'Part-Time', 'Full-Time']
+        })
+        
+        # Repeated names map to the last ID, rows without a name are ignored
+        mapping = create_employee_name_to_id_mapping(employee_df)
+        self.assertEqual(mapping, {'Doe, John': 123.0, 'Smith, Jane': 456.0})
+        
+        table = build_status_change_table(history_df, employee_df)
+        self.assertEqual(table.status_codes.dtype, np.int8)
+        self.assertEqual(table.change_times.dtype, np.int64)
+        self.assertEqual(table.employee_ids.tolist(), [123.0, 123.0, 456.0, 456.0])
+        
+        status_lookup = create_employment_status_lookup(history_df, mapping)
+        self.assertEqual(status_lookup, table.to_lookup())
+        
+        ids = [123, 123, 123, 456, 456, 789, np.nan, 123]
+        dates = pd.to_datetime(['2022-12-31', '2023-01-01', '2023-06-01', '2023-03-01',
+                                '2023-12-31', '2023-06-01', '2023-06-01', None])
+        self.assertEqual(table.statuses_on(ids, dates).tolist(),
+                         [None, 'Part-Time', 'Full-Time', 'Part-Time', 'Part-Time', None, None, None])
+        self.assertEqual(table.status_codes_on([], []).tolist(), [])
+        self.assertEqual(table.status_codes_on([789], ['2023-06-01']).tolist(), [UNKNOWN_STATUS])
+        
+        # The table and the dict answer single lookups the same way
+        for emp_id, date in zip(ids[:6], dates[:6]):
+            self.assertEqual(is_full_time_on_date(emp_id, date, table),
+                             is_full_time_on_date(emp_id, date, status_lookup))
+    
     def test_add_time_analysis_columns(self):
         """Test the add_time_analysis_columns function."""
         # Set up the data
@@ -15,8 +15,28 @@ from src.data_ingestion import (
     load_employee_info,
     load_employment_history,
     calculate_default_date_range,
-    merge_key_card_data
+    merge_key_card_data,
+    load_sources_concurrently
 )
+from src.data_cache import (
+    file_fingerprint,
+    parquet_mirror_path,
+    read_mirror_fingerprint,
+    refresh_parquet_mirror,
+    select_row_groups,
+    dataset_manifest_path,
+    load_dataset_manifest,
+    data_version,
+    parquet_available
+)
+from src.row_hash_index import load_row_hash_index, find_new_rows, insert_hashes
+from src.key_card_index import build_key_card_index, load_key_card_index
+from src.utils import parse_key_card_datetime
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional - the Parquet mirror tests are skipped without it
+    pq = None
 
 class TestDataIngestion(unittest.TestCase):
     
@@ -74,6 +94,180 @@ class TestDataIngestion(unittest.TestCase):
         )
         self.assertEqual(len(df), 1)  # Only one record on March 2nd
     
+    @unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_load_key_card_data_builds_parquet_mirror(self):
+        """Test that loading creates a Parquet mirror tagged with the CSV fingerprint."""
+        df = load_key_card_data(str(self.key_card_path1))
+        mirror_path = parquet_mirror_path(str(self.key_card_path1))
+        
+        self.assertEqual(len(df), 3)
+        self.assertTrue(mirror_path.exists())
+        self.assertEqual(read_mirror_fingerprint(mirror_path), file_fingerprint(str(self.key_card_path1)))
+    
+    def test_parquet_mirror_matches_csv(self):
+        """Test that the cached and uncached loaders return the same rows."""
+        cached = load_key_card_data(str(self.key_card_path1), start_date='2024-03-01', end_date='2024-03-04')
+        uncached = load_key_card_data(str(self.key_card_path1), start_date='2024-03-01', end_date='2024-03-04',
+                                      use_cache=False)
+        
+        sort_cols = ['Date/time', 'User']
+        pd.testing.assert_frame_equal(
+            cached.sort_values(sort_cols).reset_index(drop=True),
+            uncached.sort_values(sort_cols).reset_index(drop=True)[cached.columns]
+        )
+    
+    @unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet_mirror_row_groups_by_month(self):
+        """Test that the mirror has one row group per month and date ranges prune them."""
+        multi_month = pd.DataFrame({
+            'Date/time': ['15/03/2024 09:00:00', '10/01/2024 09:00:00', '20/02/2024 09:00:00', '11/01/2024 10:00:00'],
+            'User': ['123 Doe, John', '456 Smith, Jane', '123 Doe, John', '789 Brown, Mark'],
+            'Where': ['Main Entrance'] * 4,
+            'Event': ['Valid Access'] * 4
+        })
+        path = self.temp_path / 'multi_month.csv'
+        multi_month.to_csv(path, index=False)
+        
+        mirror_path = refresh_parquet_mirror(str(path))
+        parquet_file = pq.ParquetFile(mirror_path)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        
+        # Only the February row group overlaps a February range
+        selected = select_row_groups(parquet_file, 'Date/time',
+                                     pd.Timestamp('2024-02-01'), pd.Timestamp('2024-02-29'))
+        self.assertEqual(selected, [1])
+        
+        df = load_key_card_data(str(path), start_date='2024-02-01', end_date='2024-02-29')
+        self.assertEqual(len(df), 1)
+    
+    @unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+    def test_parquet_mirror_refreshes_when_csv_changes(self):
+        """Test that a changed CSV invalidates the Parquet mirror."""
+        load_key_card_data(str(self.key_card_path1))
+        
+        extended = pd.concat([self.key_card_data1, self.key_card_data2.iloc[[2]]], ignore_index=True)
+        extended.to_csv(self.key_card_path1, index=False)
+        
+        df = load_key_card_data(str(self.key_card_path1))
+        self.assertEqual(len(df), 4)
+        self.assertEqual(
+            read_mirror_fingerprint(parquet_mirror_path(str(self.key_card_path1))),
+            file_fingerprint(str(self.key_card_path1))
+        )
+    
+    def test_parse_key_card_datetime_fixed_format(self):
+        """Test the fixed-format timestamp parser against pandas."""
+        raw = pd.Series([
+            '31/07/2023 22:48:58',
+            '29/02/2024 00:00:01',  # Leap day
+            '01/01/1970 00:00:00',
+            '31/12/2099 23:59:59'
+        ])
+        expected = pd.to_datetime(raw, format='%d/%m/%Y %H:%M:%S')
+        pd.testing.assert_series_equal(parse_key_card_datetime(raw), expected)
+    
+    def test_parse_key_card_datetime_fallback(self):
+        """Test that rows outside the fixed layout fall back to the slow path."""
+        raw = pd.Series(['01/03/2024 09:15', '29/02/2023 10:00:00', None, 'garbage', '2024-03-01 09:00:00',
+                         '2024-02-01 09:15', '1/2/2024 9:15:00'],
+                        index=[10, 11, 12, 13, 14, 15, 16])
+        result = parse_key_card_datetime(raw)
+        
+        self.assertEqual(result.index.tolist(), [10, 11, 12, 13, 14, 15, 16])
+        self.assertEqual(result[10], pd.Timestamp('2024-03-01 09:15'))
+        self.assertTrue(pd.isna(result[11]))  # 2023 is not a leap year
+        self.assertTrue(pd.isna(result[12]))
+        self.assertTrue(pd.isna(result[13]))
+        self.assertEqual(result[14], pd.Timestamp('2024-03-01 09:00'))
+        # Each value's layout is inferred on its own (ISO stays year-month-day)
+        self.assertEqual(result[15], pd.Timestamp('2024-02-01 09:15'))
+        self.assertEqual(result[16], pd.Timestamp('2024-02-01 09:15'))
+        
+        # Years outside the datetime64[ns] range are not parsed (instead of overflowing)
+        out_of_range = pd.Series(['01/01/0001 00:00:00', '01/01/9999 00:00:00', '31/12/2262 00:00:00',
+                                  '21/09/1677 00:12:44', '11/04/2262 23:47:16'])
+        result = parse_key_card_datetime(out_of_range)
+        self.assertTrue(result[:3].isna().all())
+        self.assertEqual(result[3], pd.Timestamp('1677-09-21 00:12:44'))
+        self.assertEqual(result[4], pd.Timestamp('2262-04-11 23:47:16'))
+    
+    def test_load_key_card_data_stream(self):
+        """Test that streaming in chunks matches a full load."""
+        streamed = load_key_card_data(str(self.key_card_path1), start_date='2024-03-01', end_date='2024-03-04',
+                                      use_cache=False, stream=True, chunksize=1)
+        full = load_key_card_data(str(self.key_card_path1), start_date='2024-03-01', end_date='2024-03-04',
+                                  use_cache=False)
+        
+        # Only the required columns are kept, with strings downcast to categoricals
+        self.assertNotIn('Token number', streamed.columns)
+        self.assertTrue(isinstance(streamed['User'].dtype, pd.CategoricalDtype))
+        self.assertEqual(streamed['User'].astype(str).tolist(), full['User'].tolist())
+        self.assertEqual(streamed['Date/time'].tolist(), full['Date/time'].tolist())
+    
+    def test_loaders_project_to_schema(self):
+        """Test that loaders read only the registry columns, with their schema dtypes."""
+        key_card_df = load_key_card_data(str(self.key_card_path1), use_cache=False)
+        self.assertNotIn('Token number', key_card_df.columns)
+        self.assertTrue(isinstance(key_card_df['Where'].dtype, pd.CategoricalDtype))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(key_card_df['Date/time']))
+        
+        employee_path = self.temp_path / 'employee_info.csv'
+        pd.DataFrame({
+            'Employee #': ['123', 'n/a'],
+            'Last name, First name': ['Doe, John', 'Smith, Jane'],
+            'Hire Date': ['05/02/2023', '11/12/2022'],
+            'Payroll Reference': ['P1', 'P2']
+        }).to_csv(employee_path, index=False)
+        employee_df = load_employee_info(str(employee_path))
+        
+        self.assertNotIn('Payroll Reference', employee_df.columns)
+        self.assertEqual(employee_df['Employee #'].tolist()[0], 123)
+        self.assertTrue(pd.isna(employee_df['Employee #'].iloc[1]))
+        self.assertEqual(employee_df['Hire Date'].tolist(), [pd.Timestamp('2023-02-05'), pd.Timestamp('2022-12-11')])
+        
+        history_path = self.temp_path / 'employment_status_history.csv'
+        pd.DataFrame({
+            'Employee': ['Doe, John'],
+            'Date': ['2023-02-05'],
+            'Employment Status': ['Full-Time'],
+            'Comment': ['Joined']
+        }).to_csv(history_path, index=False)
+        history_df = load_employment_history(str(history_path))
+        
+        self.assertEqual(history_df.columns.tolist(), ['Employee', 'Date', 'Employment Status'])
+        self.assertTrue(isinstance(history_df['Employment Status'].dtype, pd.CategoricalDtype))
+        self.assertEqual(history_df['Date'].iloc[0], pd.Timestamp('2023-02-05'))
+    
+    def test_load_sources_concurrently(self):
+        """Test that the concurrent loader returns the same frames as loading one by one."""
+        employee_path = self.temp_path / 'employee_info.csv'
+        pd.DataFrame({'Employee #': ['123'], 'Last name, First name': ['Doe, John']}).to_csv(employee_path, index=False)
+        
+        timings = {}
+        key_card_df, employee_df, history_df = load_sources_concurrently(
+            str(self.key_card_path1), str(employee_path), timings=timings, use_cache=False,
+            start_date='2024-03-01', end_date='2024-03-04'
+        )
+        
+        pd.testing.assert_frame_equal(
+            key_card_df,
+            load_key_card_data(str(self.key_card_path1), start_date='2024-03-01', end_date='2024-03-04',
+                               use_cache=False)
+        )
+        pd.testing.assert_frame_equal(employee_df, load_employee_info(str(employee_path)))
+        self.assertIsNone(history_df)
+        self.assertEqual(set(timings), {'key_card', 'employee_info', 'total'})
+        
+        # A source that fails is returned as None, with its error recorded
+        errors = {}
+        with patch('src.data_ingestion.load_key_card_data', side_effect=OSError('disk read failed')):
+            key_card_df, employee_df, _ = load_sources_concurrently(
+                str(self.key_card_path1), str(employee_path), errors=errors
+            )
+        self.assertIsNone(key_card_df)
+        self.assertIsNotNone(employee_df)
+        self.assertEqual(errors, {'key_card': 'disk read failed'})
+    
     def test_calculate_default_date_range(self):
         """Test calculating default date range."""
         start_date, end_date = calculate_default_date_range(days=7)
@@ -90,6 +284,43 @@ class TestDataIngestion(unittest.TestCase):
         expected_start = today - timedelta(days=7)
         self.assertEqual(start_dt.date(), expected_start.date())
     
+    def test_dataset_manifest(self):
+        """Test that loading data records a manifest of the file's metadata."""
+        load_key_card_data(str(self.key_card_path1))
+        self.assertTrue(dataset_manifest_path(self.key_card_path1).exists())
+        
+        manifest = load_dataset_manifest(str(self.key_card_path1), build=False)
+        self.assertEqual(manifest['rows'], 3)
+        self.assertEqual(manifest['distinct_employees'], 3)
+        self.assertEqual(manifest['min_timestamp'], pd.Timestamp('2024-03-01 08:30'))
+        self.assertEqual(manifest['max_timestamp'], pd.Timestamp('2024-03-02 10:00'))
+        self.assertEqual(manifest['fingerprint'], file_fingerprint(self.key_card_path1))
+        
+        # A changed file invalidates the manifest until it is rebuilt
+        self.key_card_data2.to_csv(self.key_card_path1, index=False)
+        self.assertIsNone(load_dataset_manifest(str(self.key_card_path1), build=False))
+        self.assertEqual(load_dataset_manifest(str(self.key_card_path1))['max_timestamp'],
+                         pd.Timestamp('2024-03-04 11:00'))
+    
+    def test_data_version(self):
+        """Test that the data version changes with any input file and the cache version."""
+        paths = [str(self.key_card_path1), str(self.key_card_path2), str(self.temp_path / 'missing.csv')]
+        version = data_version(paths)
+        self.assertEqual(version, data_version(paths))
+        self.assertNotEqual(version, data_version(paths[:2]))
+        
+        self.key_card_data1.to_csv(self.key_card_path2, index=False)
+        changed = data_version(paths)
+        self.assertNotEqual(version, changed)
+        
+        with patch('src.data_cache.CACHE_VERSION', -1):
+            self.assertNotEqual(data_version(paths), changed)
+    
+    def test_calculate_default_date_range_from_manifest(self):
+        """Test that the default range can end at the most recent swipe in the data."""
+        start_date, end_date = calculate_default_date_range(days=7, filepath=str(self.key_card_path2))
+        self.assertEqual((start_date, end_date), ('2024-02-26', '2024-03-04'))
+    
     def test_merge_key_card_data(self):
         """Test merging key card data files."""
         # Set output path for merged data
@@ -119,6 +350,61 @@ class TestDataIngestion(unittest.TestCase):
         loaded_df = pd.read_csv(output_path)
         self.assertEqual(len(loaded_df), 5)
     
+    def test_merge_key_card_data_incremental(self):
+        """Test that an incremental merge appends only rows not already in the file."""
+        output_path = self.temp_path / 'merged_key_card.csv'
+        
+        appended = merge_key_card_data(
+            str(self.key_card_path1),
+            str(self.key_card_path2),
+            str(output_path),
+            incremental=True
+        )
+        
+        # The 01/03/2024 09:15 swipe is already present in the existing file
+        self.assertEqual(len(appended), 2)
+        loaded_df = pd.read_csv(output_path)
+        self.assertEqual(len(loaded_df), 5)
+        self.assertEqual(loaded_df['User'].tolist()[:3], self.key_card_data1['User'].tolist())
+        self.assertEqual(loaded_df['Date/time'].tolist()[3:], ['03/03/2024 08:45:00', '04/03/2024 11:00:00'])
+        
+        # Merging the same file again adds nothing
+        appended = merge_key_card_data(str(output_path), str(self.key_card_path2), incremental=True)
+        self.assertTrue(appended.empty)
+        self.assertFalse(appended.columns.empty)
+        self.assertEqual(len(pd.read_csv(output_path)), 5)
+        
+        # The sidecars were extended to describe the whole file
+        manifest = load_dataset_manifest(str(output_path), build=False)
+        self.assertEqual(manifest['rows'], 5)
+        self.assertEqual(manifest['distinct_employees'], 4)
+        self.assertEqual(manifest['max_timestamp'], pd.Timestamp('2024-03-04 11:00'))
+        self.assertIsNotNone(load_row_hash_index(str(output_path), build=False))
+    
+    def test_merge_key_card_data_incremental_sort_order(self):
+        """Test that appending keeps an oldest-first file sorted and warns when a newest-first one is not."""
+        build_key_card_index(str(self.key_card_path1))
+        merge_key_card_data(str(self.key_card_path1), str(self.key_card_path2), incremental=True)
+        self.assertEqual(load_key_card_index(str(self.key_card_path1))['order'], 'asc')
+        
+        newest_first_path = self.temp_path / 'newest_first.csv'
+        self.key_card_data1.iloc[::-1].to_csv(newest_first_path, index=False)
+        self.assertEqual(build_key_card_index(str(newest_first_path))['order'], 'desc')
+        with self.assertLogs('attendance_dashboard.data_ingestion', level='WARNING') as logs:
+            merge_key_card_data(str(newest_first_path), str(self.key_card_path2), incremental=True)
+        self.assertIn('unsorted by time', logs.output[0])
+        self.assertEqual(load_key_card_index(str(newest_first_path))['order'], 'unsorted')
+    
+    def test_find_new_rows(self):
+        """Test the vectorized membership test against the sorted hash index."""
+        index_hashes = np.array([5, 10, 20], dtype=np.uint64)
+        row_hashes = np.array([10, 7, 25, 7, 1], dtype=np.uint64)
+        
+        new_positions = find_new_rows(index_hashes, row_hashes)
+        self.assertEqual(new_positions.tolist(), [1, 2, 4])
+        self.assertEqual(insert_hashes(index_hashes, row_hashes[new_positions]).tolist(), [1, 5, 7, 10, 20, 25])
+        self.assertEqual(find_new_rows(np.array([], dtype=np.uint64), row_hashes).tolist(), [0, 1, 2, 4])
+    
     def test_merge_key_card_data_missing_file(self):
         """Test merging when file is missing."""
         # Test with non-existent path
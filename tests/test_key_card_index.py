@@ -0,0 +1,131 @@
+import pandas as pd
+import numpy as np
+import sys
+import os
+import unittest
+import tempfile
+from pathlib import Path
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_ingestion import load_key_card_data
+from src.key_card_index import (
+    build_key_card_index,
+    load_key_card_index,
+    locate_byte_range,
+    open_key_card_range
+)
+
+class TestKeyCardIndex(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up a time-sorted key card file spanning several days."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.temp_path = Path(self.temp_dir.name)
+        
+        self.key_card_df = pd.DataFrame({
+            'Date/time': [
+                '01/03/2024 08:00:00', '01/03/2024 09:30:00',
+                '02/03/2024 10:00:00',
+                '04/03/2024 08:45:00', '04/03/2024 17:00:00',
+                '05/03/2024 09:00:00'
+            ],
+            'User': ['123 Doe, John', '456 Smith, Jane', '123 Doe, John',
+                     '789 Brown, Mark', '123 Doe, John', '456 Smith, Jane'],
+            'Where': ['Main Entrance'] * 6,
+            'Event': ['Valid Access'] * 6
+        })
+        self.csv_path = self.temp_path / 'key_card_access.csv'
+        self.key_card_df.to_csv(self.csv_path, index=False)
+    
+    def tearDown(self):
+        """Clean up after tests."""
+        self.temp_dir.cleanup()
+    
+    def read_range(self, start_date, end_date):
+        """Read the rows the index selects for a date range."""
+        reader = open_key_card_range(str(self.csv_path), start_date, end_date)
+        self.assertIsNotNone(reader)
+        with reader:
+            return pd.read_csv(reader)
+    
+    def test_build_index_records_day_offsets(self):
+        """Test that the index records one run per day in ascending order."""
+        index = build_key_card_index(str(self.csv_path))
+        
+        self.assertEqual(index['order'], 'asc')
+        self.assertEqual(index['rows'], 6)
+        self.assertEqual(len(index['days']), 4)
+        
+        # Every offset points at the start of a row
+        raw = self.csv_path.read_bytes()
+        for offset in index['offsets']:
+            self.assertEqual(raw[offset - 1:offset], b'\n')
+    
+    def test_seek_reads_only_requested_days(self):
+        """Test that a range read returns only rows from the requested days."""
+        build_key_card_index(str(self.csv_path))
+        
+        selected = self.read_range('2024-03-02', '2024-03-04')
+        self.assertEqual(selected['Date/time'].tolist(),
+                         ['02/03/2024 10:00:00', '04/03/2024 08:45:00', '04/03/2024 17:00:00'])
+    
+    def test_seek_descending_file(self):
+        """Test that a newest-first file is indexed and seeked correctly."""
+        self.key_card_df.iloc[::-1].to_csv(self.csv_path, index=False)
+        index = build_key_card_index(str(self.csv_path))
+        self.assertEqual(index['order'], 'desc')
+        
+        selected = self.read_range('2024-03-02', '2024-03-04')
+        self.assertEqual(sorted(selected['Date/time'].tolist()),
+                         ['02/03/2024 10:00:00', '04/03/2024 08:45:00', '04/03/2024 17:00:00'])
+    
+    def test_unsorted_file_falls_back_to_full_scan(self):
+        """Test that an unsorted file is flagged and still loads correctly."""
+        self.key_card_df.iloc[[3, 0, 5, 1, 2, 4]].to_csv(self.csv_path, index=False)
+        index = build_key_card_index(str(self.csv_path))
+        
+        self.assertEqual(index['order'], 'unsorted')
+        self.assertIsNone(locate_byte_range(index, pd.Timestamp('2024-03-02'), pd.Timestamp('2024-03-04')))
+        
+        df = load_key_card_data(str(self.csv_path), start_date='2024-03-02', end_date='2024-03-05',
+                                use_cache=False)
+        self.assertEqual(sorted(df['Date/time'].dt.strftime('%d/%m %H:%M')),
+                         ['02/03 10:00', '04/03 08:45', '04/03 17:00'])
+    
+    def test_stale_index_is_ignored(self):
+        """Test that an index is not used once the file changes."""
+        build_key_card_index(str(self.csv_path))
+        self.key_card_df.iloc[:3].to_csv(self.csv_path, index=False)
+        
+        self.assertIsNone(load_key_card_index(str(self.csv_path)))
+        self.assertIsNone(open_key_card_range(str(self.csv_path), '2024-03-01', '2024-03-02'))
+    
+    def test_incremental_update_matches_full_build(self):
+        """Test that extending the index after an append matches a full rebuild."""
+        self.key_card_df.iloc[:3].to_csv(self.csv_path, index=False)
+        build_key_card_index(str(self.csv_path))
+        
+        # Append the remaining rows without rewriting the file
+        self.key_card_df.iloc[3:].to_csv(self.csv_path, mode='a', header=False, index=False)
+        incremental = build_key_card_index(str(self.csv_path))
+        full = build_key_card_index(str(self.csv_path), incremental=False)
+        
+        for key in ['days', 'offsets', 'rows', 'order', 'size']:
+            self.assertEqual(incremental[key], full[key])
+    
+    def test_load_key_card_data_uses_index(self):
+        """Test that indexed and unindexed loads return the same rows."""
+        unindexed = load_key_card_data(str(self.csv_path), start_date='2024-03-02', end_date='2024-03-05',
+                                       use_cache=False)
+        build_key_card_index(str(self.csv_path))
+        indexed = load_key_card_data(str(self.csv_path), start_date='2024-03-02', end_date='2024-03-05',
+                                     use_cache=False)
+        streamed = load_key_card_data(str(self.csv_path), start_date='2024-03-02', end_date='2024-03-05',
+                                      use_cache=False, stream=True, chunksize=2)
+        
+        pd.testing.assert_frame_equal(indexed.reset_index(drop=True), unindexed.reset_index(drop=True))
+        self.assertEqual(streamed['Date/time'].tolist(), indexed['Date/time'].tolist())
+
+if __name__ == '__main__':
+    unittest.main()
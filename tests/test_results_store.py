@@ -0,0 +1,111 @@
+import pandas as pd
+import sys
+import os
+import unittest
+import tempfile
+
+# Add parent directory to path to allow imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.data_cleaning import clean_key_card_data, merge_key_card_with_employee_info
+from src.combined_dataset import build_combined_dataset, CombinedDataset
+from src.analysis_pipeline import build_analysis_inputs, compute_analysis
+from src.data_cache import parquet_available
+from src.data_analysis import build_attendance_table, build_daily_aggregate
+from src.results_store import (
+    write_results_store,
+    load_results_manifest,
+    read_stored_dataset,
+    read_stored_analysis,
+    STORED_ANALYSES
+)
+
+@unittest.skipUnless(parquet_available(), "pyarrow is not installed")
+class TestResultsStore(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a newest-first export, its time-sorted dataset and a temporary store directory."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        key_card_df = clean_key_card_data(pd.DataFrame({
+            'User': ['123 Doe, John', '456 Smith, Jane', '123 Doe, John', '456 Smith, Jane', '123 Doe, John'],
+            'Date/time': ['12/03/2024 09:00:00', '07/03/2024 17:45:10', '06/03/2024 10:00:00',
+                          '05/03/2024 08:30:00', '05/03/2024 09:15:30'],
+            'Event': ['Valid Access'] * 5,
+            'Where': ['Main Entrance', None, 'Main Entrance', 'Side Entrance', 'Main Entrance']
+        }))
+        employee_df = pd.DataFrame({
+            'employee_id': [123.0, 456.0],
+            'Last name, First name': ['Doe, John', 'Smith, Jane'],
+            'Location': ['London UK', 'London UK'],
+            'Working Status': ['Hybrid', 'Hybrid'],
+            'Division': ['Operations', None],
+            'Department': ['Support', 'Sales'],
+            'Combined hire date': pd.to_datetime(['2022-01-01', '2022-02-15']),
+            'Most recent day worked': pd.to_datetime([None, '2024-03-11'])
+        })
+        # Jane becomes full-time within the first week
+        history_df = pd.DataFrame({
+            'Employee': ['Doe, John', 'Smith, Jane', 'Smith, Jane'],
+            'Date': pd.to_datetime(['2022-01-01', '2022-02-15', '2024-03-06']),
+            'Employment Status': ['Full-Time', 'Part-Time', 'Full-Time']
+        })
+        self.merged = merge_key_card_with_employee_info(key_card_df, employee_df, history_df)
+        self.dataset = build_combined_dataset(key_card_df, employee_df, history_df, cache_key='v1').sort_by_time()
+        self.date_ranges = {'March': ('2024-03-01', '2024-03-31'), 'First week': ('2024-03-04', '2024-03-08'),
+                            'No data': ('2023-01-01', '2023-12-31')}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def merged_analysis_inputs(self, start_date, end_date) -> tuple:
+        """Build the analysis inputs of a range from the merged frame, as the dashboard used to."""
+        filtered_df = self.merged[(self.merged['date_only'] >= start_date) & (self.merged['date_only'] <= end_date)]
+        full_employee_info = filtered_df[[
+            'employee_id', 'Location', 'Working Status', 'is_full_time',
+            'Combined hire date', 'Most recent day worked', 'Division'
+        ]].drop_duplicates('employee_id')
+        attendance_table = build_attendance_table(filtered_df)
+        filtered_df = filtered_df.merge(
+            attendance_table[['employee_id', 'date_only', 'present', 'is_present', 'visits']],
+            on=['employee_id', 'date_only'],
+            how='left'
+        )
+        filtered_df.attrs['full_employee_info'] = full_employee_info
+        return filtered_df, attendance_table, None
+
+    def test_round_trip_matches_live_results(self):
+        """Test that the stored dataset and analyses match those calculated from the merged frame."""
+        written = write_results_store(self.dataset, 'v1', self.date_ranges, store_dir=self.temp_dir.name)
+        self.assertIsNotNone(written)
+        manifest = load_results_manifest('v1', self.temp_dir.name)
+        self.assertEqual(sorted(manifest['ranges']), ['2024-03-01_to_2024-03-31', '2024-03-04_to_2024-03-08'])
+
+        facts, employees, doors = read_stored_dataset(manifest)
+        stored_dataset = CombinedDataset(facts, employees, doors, cache_key='v1', time_sorted=manifest['time_sorted'])
+        pd.testing.assert_frame_equal(stored_dataset.to_frame(), self.dataset.to_frame())
+
+        for start_date, end_date in self.date_ranges.values():
+            if len(self.dataset.filter_dates(start_date, end_date)) == 0:
+                # Ranges without data are not stored, so the dashboard calculates them live
+                self.assertIsNone(read_stored_analysis(manifest, start_date, end_date, 'weekly_counts'))
+                continue
+            inputs = build_analysis_inputs(self.dataset.filter_dates(start_date, end_date), start_date, end_date)
+            merged_inputs = self.merged_analysis_inputs(start_date, end_date)
+            for metric in STORED_ANALYSES:
+                stored = read_stored_analysis(manifest, start_date, end_date, metric)
+                pd.testing.assert_frame_equal(stored, compute_analysis(metric, inputs, start_date, end_date))
+                if metric == 'daily_aggregate':
+                    expected = build_daily_aggregate(merged_inputs[0])
+                else:
+                    expected = compute_analysis(metric, merged_inputs, start_date, end_date)
+                pd.testing.assert_frame_equal(stored, expected, check_dtype=False)
+        self.assertIsNone(read_stored_analysis(manifest, '2024-03-01', '2024-03-30', 'weekly_counts'))
+
+    def test_manifest_must_match_version(self):
+        """Test that a store is only used for the data version it was written for."""
+        self.assertIsNone(load_results_manifest('v1', self.temp_dir.name))
+        write_results_store(self.dataset, 'v1', self.date_ranges, store_dir=self.temp_dir.name)
+        self.assertIsNone(load_results_manifest('v2', self.temp_dir.name))
+        self.assertEqual(load_results_manifest('v1', self.temp_dir.name)['version'], 'v1')
+
+if __name__ == '__main__':
+    unittest.main()